@@ -3,25 +3,63 @@ Django admin configuration for the attendance app.
 Registers all models for admin panel management.
 """
 
-from django.contrib import admin
-from .models import Student, Faculty, Schedule, Attendance
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.core.exceptions import PermissionDenied
+from django.http import Http404
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.views.decorators.http import require_POST
+from . import search, profiling, querycache
+from .models import (
+    Student, Faculty, Schedule, Attendance, AttendanceChange, LowAttendanceAlert, DailyCohortRollup,
+    CheckInWindow,
+)
+from .forms import RecurringScheduleForm
+from .timetable import generate_timetable, format_skipped_dates
+from .purge import deactivate_students, purge_students
+
+
+class IndexedSearchMixin:
+    """
+    Route the changelist search box through the search index instead of
+    unanchored LIKE scans across joins. Subclasses set `search_function`.
+    """
+    search_function = None
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return self.search_function(queryset, search_term), False
+
+
+class CachedChangelistMixin:
+    """
+    Serve changelist pages, their counts and list filter lookups from the
+    query cache; any write to the tables involved refreshes them.
+    """
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).cached()
 
 
 @admin.register(Student)
-class StudentAdmin(admin.ModelAdmin):
+class StudentAdmin(CachedChangelistMixin, IndexedSearchMixin, admin.ModelAdmin):
     """Admin configuration for Student model."""
-    list_display = ('hall_ticket_id', 'name', 'branch', 'year', 'created_at')
-    list_filter = ('branch', 'year', 'created_at')
+    list_display = ('hall_ticket_id', 'name', 'branch', 'year', 'is_active', 'created_at')
+    list_filter = ('is_active', 'branch', 'year', 'created_at')
     search_fields = ('hall_ticket_id', 'name', 'user__username')
+    search_function = staticmethod(search.search_students)
     ordering = ('-created_at',)
     readonly_fields = ('created_at', 'updated_at')
+    actions = ['deactivate_selected', 'purge_selected']
 
     fieldsets = (
         ('User Information', {
             'fields': ('user',)
         }),
         ('Personal Information', {
-            'fields': ('hall_ticket_id', 'name', 'branch', 'year')
+            'fields': ('hall_ticket_id', 'name', 'branch', 'year', 'is_active', 'photo')
         }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at'),
@@ -29,15 +67,42 @@ class StudentAdmin(admin.ModelAdmin):
         }),
     )
 
+    @admin.action(description='Deactivate selected students')
+    def deactivate_selected(self, request, queryset):
+        """Hide students from rosters and block their logins instantly."""
+        count = deactivate_students(queryset)
+        self.message_user(request, f'Deactivated {count} students.', messages.SUCCESS)
+
+    @admin.action(description='Permanently delete selected inactive students')
+    def purge_selected(self, request, queryset):
+        """
+        Delete inactive students with chunked set-based deletes instead of the
+        admin's default collector, which loads every attendance row.
+        """
+        skipped = queryset.filter(is_active=True).count()
+        purged, rows = purge_students(queryset)
+        self.message_user(
+            request,
+            f'Purged {purged} students and {rows} attendance records.',
+            messages.SUCCESS,
+        )
+        if skipped:
+            self.message_user(
+                request,
+                f'Skipped {skipped} active students. Deactivate them first.',
+                messages.WARNING,
+            )
+
 
 @admin.register(Faculty)
-class FacultyAdmin(admin.ModelAdmin):
+class FacultyAdmin(CachedChangelistMixin, admin.ModelAdmin):
     """Admin configuration for Faculty model."""
     list_display = ('name', 'subject', 'branch', 'year', 'created_at')
     list_filter = ('branch', 'year', 'created_at')
     search_fields = ('name', 'subject', 'user__username')
     ordering = ('-created_at',)
     readonly_fields = ('created_at', 'updated_at')
+    actions = ['generate_recurring_timetable']
 
     fieldsets = (
         ('User Information', {
@@ -52,13 +117,62 @@ class FacultyAdmin(admin.ModelAdmin):
         }),
     )
 
+    @admin.action(description='Generate recurring timetable for selected faculty')
+    def generate_recurring_timetable(self, request, queryset):
+        """
+        Create a recurring timetable for every selected faculty member.
+        Shows an intermediate form first, then inserts all classes with one
+        bulk insert and reports skipped dates per faculty.
+        """
+        if 'apply' in request.POST:
+            form = RecurringScheduleForm(request.POST)
+            if form.is_valid():
+                created, skipped = generate_timetable(
+                    queryset,
+                    form.get_dates(),
+                    topic=form.cleaned_data['topic'],
+                    subject=form.cleaned_data['subject'],
+                )
+                self.message_user(
+                    request,
+                    f'Created {created} classes for {queryset.count()} faculty.',
+                    messages.SUCCESS,
+                )
+                if skipped:
+                    summary = '; '.join(
+                        f'{faculty.name}: {format_skipped_dates(dates, limit=5)}'
+                        for faculty, dates in skipped.items()
+                    )
+                    total = sum(len(dates) for dates in skipped.values())
+                    self.message_user(
+                        request,
+                        f'Skipped {total} dates that already had a class. {summary}',
+                        messages.WARNING,
+                    )
+                return None
+        else:
+            form = RecurringScheduleForm()
+
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Generate recurring timetable',
+            'opts': self.model._meta,
+            'form': form,
+            'queryset': queryset,
+            'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+        }
+        return TemplateResponse(
+            request, 'admin/attendance/faculty/generate_timetable.html', context
+        )
+
 
 @admin.register(Schedule)
-class ScheduleAdmin(admin.ModelAdmin):
+class ScheduleAdmin(CachedChangelistMixin, IndexedSearchMixin, admin.ModelAdmin):
     """Admin configuration for Schedule model."""
     list_display = ('faculty', 'date', 'subject', 'topic', 'created_at')
     list_filter = ('date', 'faculty', 'created_at')
     search_fields = ('subject', 'topic', 'faculty__name')
+    search_function = staticmethod(search.search_schedules)
     ordering = ('-date',)
     readonly_fields = ('created_at',)
     date_hierarchy = 'date'
@@ -75,7 +189,7 @@ class ScheduleAdmin(admin.ModelAdmin):
 
 
 @admin.register(Attendance)
-class AttendanceAdmin(admin.ModelAdmin):
+class AttendanceAdmin(CachedChangelistMixin, admin.ModelAdmin):
     """Admin configuration for Attendance model."""
     list_display = ('student', 'schedule', 'status', 'marked_at')
     list_filter = ('status', 'marked_at', 'schedule__date')
@@ -93,3 +207,132 @@ class AttendanceAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+
+@admin.register(AttendanceChange)
+class AttendanceChangeAdmin(admin.ModelAdmin):
+    """Read-only admin for the append-only attendance change log."""
+    list_display = ('student', 'schedule', 'old_status', 'new_status', 'actor', 'changed_at')
+    list_filter = ('new_status', 'changed_at')
+    search_fields = ('student__hall_ticket_id', 'schedule__subject')
+    ordering = ('-changed_at',)
+    date_hierarchy = 'changed_at'
+    list_select_related = ('student', 'schedule', 'schedule__faculty', 'actor')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(LowAttendanceAlert)
+class LowAttendanceAlertAdmin(admin.ModelAdmin):
+    """Admin for low-attendance alerts raised by send_attendance_alerts."""
+    list_display = ('student', 'percentage', 'attended_classes', 'total_classes',
+                    'created_at', 'notified_at', 'resolved_at')
+    list_filter = ('resolved_at', 'notified_at', 'student__branch', 'student__year')
+    search_fields = ('student__hall_ticket_id', 'student__name')
+    readonly_fields = ('student', 'attended_classes', 'total_classes', 'percentage', 'created_at')
+    list_select_related = ('student',)
+
+
+@admin.register(DailyCohortRollup)
+class DailyCohortRollupAdmin(admin.ModelAdmin):
+    """Read-only view of the daily cohort rollups; rebuild with backfill_rollups."""
+    list_display = ('date', 'branch', 'year', 'faculty', 'present', 'total', 'updated_at')
+    list_filter = ('branch', 'year')
+    date_hierarchy = 'date'
+    list_select_related = ('faculty',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(CheckInWindow)
+class CheckInWindowAdmin(admin.ModelAdmin):
+    """Admin for self check-in windows; the secret behind the codes stays hidden."""
+    list_display = ('schedule', 'opened_by', 'opened_at', 'expires_at', 'closed_at')
+    list_filter = ('opened_at',)
+    list_select_related = ('schedule', 'schedule__faculty', 'opened_by')
+    exclude = ('secret',)
+    readonly_fields = ('schedule', 'opened_by', 'opened_at')
+
+
+# ============================================================================
+# STORED PROFILES (see attendance.profiling)
+# ============================================================================
+
+def _require_superuser(request):
+    if not request.user.is_superuser:
+        raise PermissionDenied
+
+
+def profile_list_view(request):
+    """List stored request profiles with their hottest functions."""
+    _require_superuser(request)
+    profiles = profiling.list_profiles()
+    for profile in profiles:
+        profile['hot_functions'] = profiling.hot_functions(profile['name'], limit=5)
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Request profiles',
+        'profiles': profiles,
+        'header': profiling.PROFILE_HEADER[len('HTTP_'):].replace('_', '-'),
+        'param': profiling.PROFILE_PARAM,
+    }
+    return TemplateResponse(request, 'admin/attendance/profiles/list.html', context)
+
+
+def profile_detail_view(request, name):
+    """Hot functions and top allocations of one stored profile."""
+    _require_superuser(request)
+    try:
+        functions = profiling.hot_functions(name)
+        allocations = profiling.allocation_report(name)
+    except ValueError:
+        raise Http404('Invalid profile name')
+    if not functions and not allocations:
+        raise Http404('Profile not found')
+    context = {
+        **admin.site.each_context(request),
+        'title': f'Profile {name}',
+        'name': name,
+        'functions': functions,
+        'allocations': allocations,
+    }
+    return TemplateResponse(request, 'admin/attendance/profiles/detail.html', context)
+
+
+@require_POST
+def profile_delete_view(request, name):
+    """Delete one stored profile."""
+    _require_superuser(request)
+    try:
+        profiling.delete_profile(name)
+    except ValueError:
+        raise Http404('Invalid profile name')
+    messages.success(request, f'Deleted profile {name}.')
+    return redirect('admin_profiles')
+
+
+# ============================================================================
+# QUERY CACHE (see attendance.querycache)
+# ============================================================================
+
+def query_cache_view(request):
+    """Hit rate and memory use of this process's query cache; POST clears it."""
+    _require_superuser(request)
+    if request.method == 'POST':
+        querycache.store.clear()
+        messages.success(request, 'Cleared the query cache of this process.')
+        return redirect('admin_query_cache')
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Query cache',
+        'stats': querycache.store.stats(),
+    }
+    return TemplateResponse(request, 'admin/attendance/query_cache.html', context)
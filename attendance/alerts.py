@@ -0,0 +1,171 @@
+"""
+Incremental low-attendance alerts.
+
+Each run only looks at students whose attendance rows changed since the
+previous run's high-water mark on Attendance.updated_at, recomputes their
+percentages in one aggregated query and compares them with the open alerts
+to find threshold crossings. Alerts and the new high-water mark are saved in
+one transaction; digests are then sent for every alert not yet notified, so
+rerunning after a crash or a failed send picks up exactly where it stopped.
+
+updated_at is stamped before a write commits, so a check-in flush or an
+import chunk committing during a run can leave rows older than the mark it
+saves. Each run therefore re-reads HIGH_WATER_MARK_LAG before the mark.
+Rechecking a student is harmless: an alert is only opened for a student
+without an open one, and only resolved once.
+"""
+
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import Attendance, Faculty, AlertCheckpoint, LowAttendanceAlert
+from .tenancy import current_database
+
+# Same threshold as the warning on the student dashboard
+ATTENDANCE_THRESHOLD = 75
+
+CHECKPOINT_NAME = 'low_attendance_alerts'
+
+# Longest a transaction may take between stamping updated_at and committing
+HIGH_WATER_MARK_LAG = timedelta(minutes=5)
+
+
+def attendance_percentage(attended, total):
+    """Percentage rounded the way the student dashboard shows it."""
+    return round((attended / total) * 100, 2) if total else 0
+
+
+def classes_needed(attended, total, threshold=ATTENDANCE_THRESHOLD):
+    """Consecutive classes to attend before the percentage reaches the threshold."""
+    # Smallest n with (attended + n) / (total + n) >= threshold / 100
+    shortfall = threshold * total - 100 * attended
+    if shortfall <= 0:
+        return 0
+    return -(-shortfall // (100 - threshold))
+
+
+def detect_crossings():
+    """
+    Open alerts for students who fell below the threshold and resolve those
+    who climbed back above it, then advance the checkpoint.
+    Returns (opened, resolved).
+    """
+    with transaction.atomic(using=current_database()):
+        checkpoint, _ = AlertCheckpoint.objects.select_for_update().get_or_create(
+            name=CHECKPOINT_NAME
+        )
+        changed = Attendance.objects.all()
+        if checkpoint.high_water_mark is not None:
+            changed = changed.filter(updated_at__gt=checkpoint.high_water_mark - HIGH_WATER_MARK_LAG)
+        high_water_mark = changed.aggregate(latest=Max('updated_at'))['latest']
+        if high_water_mark is None:
+            return 0, 0
+        changed = changed.filter(updated_at__lte=high_water_mark)
+
+        totals = (
+            Attendance.objects.filter(student__in=changed.values('student'))
+            .values('student')
+            .annotate(total=Count('id'), attended=Count('id', filter=Q(status='P')))
+            .order_by()
+        )
+        open_alerts = {
+            alert.student_id: alert
+            for alert in LowAttendanceAlert.objects.filter(
+                student__in=changed.values('student'), resolved_at__isnull=True
+            )
+        }
+
+        now = timezone.now()
+        to_open, to_resolve = [], []
+        for row in totals:
+            percentage = attendance_percentage(row['attended'], row['total'])
+            alert = open_alerts.get(row['student'])
+            if percentage < ATTENDANCE_THRESHOLD and alert is None:
+                to_open.append(LowAttendanceAlert(
+                    student_id=row['student'],
+                    attended_classes=row['attended'],
+                    total_classes=row['total'],
+                    percentage=percentage,
+                ))
+            elif percentage >= ATTENDANCE_THRESHOLD and alert is not None:
+                alert.resolved_at = now
+                to_resolve.append(alert)
+
+        LowAttendanceAlert.objects.bulk_create(to_open)
+        LowAttendanceAlert.objects.bulk_update(to_resolve, ['resolved_at'])
+        if checkpoint.high_water_mark is None or high_water_mark > checkpoint.high_water_mark:
+            checkpoint.high_water_mark = high_water_mark
+        checkpoint.save(update_fields=['high_water_mark', 'updated_at'])
+    return len(to_open), len(to_resolve)
+
+
+def build_digests(alerts):
+    """
+    One message per student and one digest per mentor, i.e. per faculty
+    member teaching the student's branch and year.
+    """
+    messages = []
+    by_cohort = {}
+    for alert in alerts:
+        student = alert.student
+        by_cohort.setdefault((student.branch, student.year), []).append(alert)
+        if student.user.email:
+            messages.append(EmailMessage(
+                subject='Low attendance warning',
+                body=render_to_string('emails/low_attendance_student.txt', {
+                    'alert': alert, 'student': student, 'threshold': ATTENDANCE_THRESHOLD,
+                }),
+                to=[student.user.email],
+            ))
+
+    cohort_filter = Q()
+    for branch, year in by_cohort:
+        cohort_filter |= Q(branch=branch, year=year)
+    mentors = Faculty.objects.filter(cohort_filter).exclude(user__email='').select_related('user')
+    for faculty in mentors:
+        messages.append(EmailMessage(
+            subject=f'Low attendance digest: {faculty.branch} Year {faculty.year}',
+            body=render_to_string('emails/low_attendance_digest.txt', {
+                'faculty': faculty,
+                'alerts': by_cohort[(faculty.branch, faculty.year)],
+                'threshold': ATTENDANCE_THRESHOLD,
+            }),
+            to=[faculty.user.email],
+        ))
+    return messages
+
+
+def send_pending_digests():
+    """
+    Send digests for every alert not yet notified over a single connection
+    and mark them notified. Returns (alerts, emails sent).
+    """
+    alerts = list(
+        LowAttendanceAlert.objects.filter(
+            notified_at__isnull=True, resolved_at__isnull=True, student__is_active=True
+        )
+        .select_related('student', 'student__user')
+        .order_by('student__branch', 'student__year', 'student__hall_ticket_id')
+    )
+    if not alerts:
+        return 0, 0
+
+    messages = build_digests(alerts)
+    sent = get_connection().send_messages(messages) if messages else 0
+
+    LowAttendanceAlert.objects.filter(pk__in=[alert.pk for alert in alerts]).update(
+        notified_at=timezone.now()
+    )
+    return len(alerts), sent or 0
+
+
+def run_alerts():
+    """Detect crossings since the last run, then send the pending digests."""
+    opened, resolved = detect_crossings()
+    notified, sent = send_pending_digests()
+    return {'opened': opened, 'resolved': resolved, 'notified': notified, 'emails': sent}
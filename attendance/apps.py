@@ -3,9 +3,17 @@ App configuration for the attendance application.
 """
 
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class AttendanceConfig(AppConfig):
     """Configuration class for the attendance app."""
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'attendance'
+
+    def ready(self):
+        """Connect signal handlers and register system checks once the app registry is ready."""
+        from . import checks, signals  # noqa: F401
+        from .querycache import install_write_tracking
+        connection_created.connect(install_write_tracking)
+        connection_created.connect(checks.apply_sqlite_pragmas)
@@ -0,0 +1,117 @@
+"""
+Append-only attendance change log.
+
+Writes that change a status record it in a per-request ChangeLog. Nothing
+is written while the marking transaction holds its locks: the buffered
+entries are flushed with one bulk_create once that transaction commits,
+and dropped if it rolls back.
+"""
+
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import AttendanceChange, AttendanceChangeSummary
+from .tenancy import current_database
+
+REQUEST_ATTRIBUTE = '_attendance_change_log'
+
+
+class ChangeLog:
+    """Buffer of AttendanceChange entries flushed after commit."""
+
+    def __init__(self, actor=None):
+        self.actor = actor if actor is not None and actor.is_authenticated else None
+        self.entries = []
+        self._flush_scheduled = False
+
+    def record(self, student_id, schedule_id, old_status, new_status):
+        """Buffer one change; no-ops are ignored."""
+        if old_status == new_status:
+            return
+        self.entries.append(AttendanceChange(
+            student_id=student_id,
+            schedule_id=schedule_id,
+            old_status=old_status or '',
+            new_status=new_status,
+            actor=self.actor,
+            changed_at=timezone.now(),
+        ))
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            transaction.on_commit(self.flush, using=current_database())
+
+    def flush(self):
+        """Write every buffered entry with a single bulk_create."""
+        entries, self.entries = self.entries, []
+        self._flush_scheduled = False
+        if entries:
+            AttendanceChange.objects.bulk_create(entries)
+
+
+def get_change_log(request):
+    """Return the ChangeLog for this request, creating it on first use."""
+    log = getattr(request, REQUEST_ATTRIBUTE, None)
+    if log is None:
+        log = ChangeLog(actor=request.user)
+        setattr(request, REQUEST_ATTRIBUTE, log)
+    return log
+
+
+def compact_day(day):
+    """
+    Roll one day's change entries up into AttendanceChangeSummary rows and
+    delete them, in one transaction. Returns the number of entries removed.
+    """
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    entries = AttendanceChange.objects.filter(
+        changed_at__gte=start, changed_at__lt=start + timedelta(days=1)
+    )
+
+    with transaction.atomic(using=current_database()):
+        groups = {}
+        rows = entries.order_by('changed_at').values_list(
+            'student_id', 'schedule_id', 'old_status', 'new_status'
+        )
+        for student_id, schedule_id, old_status, new_status in rows.iterator():
+            group = groups.get((student_id, schedule_id))
+            if group is None:
+                groups[(student_id, schedule_id)] = [1, old_status, new_status]
+            else:
+                group[0] += 1
+                group[2] = new_status
+
+        existing = {
+            (summary.student_id, summary.schedule_id): summary
+            for summary in AttendanceChangeSummary.objects.filter(date=day)
+        }
+        to_create, to_update = [], []
+        for (student_id, schedule_id), (count, first, final) in groups.items():
+            summary = existing.get((student_id, schedule_id))
+            if summary is None:
+                to_create.append(AttendanceChangeSummary(
+                    student_id=student_id, schedule_id=schedule_id, date=day,
+                    change_count=count, first_status=first, final_status=final,
+                ))
+            else:
+                summary.change_count += count
+                summary.final_status = final
+                to_update.append(summary)
+
+        AttendanceChangeSummary.objects.bulk_create(to_create)
+        AttendanceChangeSummary.objects.bulk_update(to_update, ['change_count', 'final_status'])
+        deleted, _ = entries.delete()
+    return deleted
+
+
+def days_to_compact(before):
+    """Distinct days that still have change entries older than `before`."""
+    return list(
+        AttendanceChange.objects.filter(changed_at__lt=before)
+        .annotate(day=TruncDate('changed_at'))
+        .order_by('day')
+        .values_list('day', flat=True)
+        .distinct()
+    )
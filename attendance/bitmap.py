@@ -0,0 +1,326 @@
+"""
+Bitmap attendance storage engine.
+
+Instead of one Attendance row per student per class, AttendanceBitmap keeps
+one row per Schedule with two packed bit planes (marked, present) indexed by
+a frozen CohortRoster. This module holds the encode/decode utilities, the
+write path and a query layer that answers per-student and per-cohort counts
+with popcounts instead of row scans. CohortRosterMember indexes each
+student's position in every roster, so a student's rosters are looked up
+rather than decoded.
+
+The student and faculty pages, alerts, exports and cache warmers read
+Attendance only, so converted schedules keep their rows: a bitmap is a
+compact copy of them, never their replacement.
+"""
+
+import hashlib
+import sys
+from array import array
+
+from django.db import transaction
+
+from .models import Student, Schedule, Attendance, CohortRoster, CohortRosterMember, AttendanceBitmap
+from .tenancy import current_database
+
+STATUS_PRESENT = 'P'
+STATUS_ABSENT = 'A'
+
+
+# ============================================================================
+# ENCODING
+# ============================================================================
+
+def popcount(value):
+    """Count the set bits in an int or a packed bytes bitmap."""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        value = int.from_bytes(bytes(value), 'little')
+    if hasattr(value, 'bit_count'):
+        return value.bit_count()
+    return bin(value).count('1')  # Python < 3.10
+
+
+def pack_ids(student_ids):
+    """Pack an ordered list of student ids into little-endian uint64 bytes."""
+    packed = array('Q', student_ids)
+    if packed.itemsize != 8:
+        raise ValueError('Unsigned 64-bit arrays are not 8 bytes on this platform.')
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def unpack_ids(data):
+    """Inverse of pack_ids."""
+    packed = array('Q')
+    packed.frombytes(bytes(data))
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tolist()
+
+
+def int_to_bitmap(bits, size):
+    """Serialise an int bitmap covering `size` students to bytes."""
+    return bits.to_bytes((size + 7) // 8, 'little')
+
+
+def bitmap_to_int(data):
+    """Deserialise bytes produced by int_to_bitmap."""
+    return int.from_bytes(bytes(data), 'little')
+
+
+def encode_statuses(roster_ids, statuses):
+    """
+    Encode {student_id: 'P' | 'A'} against an ordered roster.
+    Returns (marked, present) as bytes; students missing from statuses are
+    left unmarked and students missing from the roster are ignored.
+    """
+    marked = present = 0
+    for position, student_id in enumerate(roster_ids):
+        status = statuses.get(student_id)
+        if status is None:
+            continue
+        marked |= 1 << position
+        if status == STATUS_PRESENT:
+            present |= 1 << position
+    size = len(roster_ids)
+    return int_to_bitmap(marked, size), int_to_bitmap(present, size)
+
+
+def decode_statuses(roster_ids, marked, present):
+    """Decode bit planes back into {student_id: 'P' | 'A' | None}."""
+    marked = bitmap_to_int(marked)
+    present = bitmap_to_int(present)
+    statuses = {}
+    for position, student_id in enumerate(roster_ids):
+        bit = 1 << position
+        if not marked & bit:
+            statuses[student_id] = None
+        elif present & bit:
+            statuses[student_id] = STATUS_PRESENT
+        else:
+            statuses[student_id] = STATUS_ABSENT
+    return statuses
+
+
+# ============================================================================
+# ROSTERS
+# ============================================================================
+
+def roster_digest(branch, year, student_ids):
+    """Stable identity of a roster, used to share identical snapshots."""
+    payload = f'{branch}:{year}:'.encode() + pack_ids(student_ids)
+    return hashlib.sha1(payload).hexdigest()
+
+
+def freeze_roster(branch, year, student_ids, cache=None):
+    """Return the CohortRoster for this exact ordered id list, creating it once."""
+    student_ids = list(student_ids)
+    digest = roster_digest(branch, year, student_ids)
+    if cache is not None and digest in cache:
+        return cache[digest]
+    with transaction.atomic(using=current_database()):
+        roster, created = CohortRoster.objects.get_or_create(
+            digest=digest,
+            defaults={
+                'branch': branch,
+                'year': year,
+                'student_ids': pack_ids(student_ids),
+                'size': len(student_ids),
+            },
+        )
+        if created:
+            CohortRosterMember.objects.bulk_create([
+                CohortRosterMember(roster=roster, student_id=student_id, position=position)
+                for position, student_id in enumerate(student_ids)
+            ], batch_size=500)
+    if cache is not None:
+        cache[digest] = roster
+    return roster
+
+
+def current_cohort_ids(branch, year):
+    """Student ids of a cohort in roll-call order."""
+    return list(
+        Student.objects.filter(branch=branch, year=year, is_active=True)
+        .order_by('hall_ticket_id')
+        .values_list('id', flat=True)
+    )
+
+
+class RosterIndex:
+    """Decoded rosters, built once per query."""
+
+    def __init__(self, rosters):
+        self.ids = {roster.id: unpack_ids(roster.student_ids) for roster in rosters}
+
+
+# ============================================================================
+# WRITE PATH
+# ============================================================================
+
+def store_schedule_attendance(schedule, statuses):
+    """
+    Store {student_id: status} for a schedule as a single bitmap row.
+    The cohort roster is frozen on first write; later writes that mention a
+    student outside it re-freeze a widened roster and re-encode.
+    """
+    with transaction.atomic(using=current_database()):
+        faculty = schedule.faculty
+        existing = (
+            AttendanceBitmap.objects.select_related('roster').filter(schedule=schedule).first()
+        )
+
+        if existing is None:
+            roster_ids = current_cohort_ids(faculty.branch, faculty.year)
+            merged = dict(statuses)
+        else:
+            roster_ids = unpack_ids(existing.roster.student_ids)
+            merged = {
+                student_id: status
+                for student_id, status in decode_statuses(
+                    roster_ids, existing.marked, existing.present
+                ).items()
+                if status is not None
+            }
+            merged.update(statuses)
+
+        known = set(roster_ids)
+        roster_ids += [student_id for student_id in statuses if student_id not in known]
+        roster = freeze_roster(faculty.branch, faculty.year, roster_ids)
+        marked, present = encode_statuses(roster_ids, merged)
+
+        AttendanceBitmap.objects.update_or_create(
+            schedule=schedule,
+            defaults={'roster': roster, 'marked': marked, 'present': present},
+        )
+
+
+# ============================================================================
+# QUERY LAYER
+# ============================================================================
+
+def student_summary(student, faculty=None):
+    """
+    Return {'total_classes', 'attended_classes', 'absent_classes'} for a
+    student, optionally limited to one faculty's schedules.
+    """
+    # Roster id -> the student's bit position, from the membership index
+    positions = dict(
+        CohortRosterMember.objects.filter(student_id=student.id).values_list('roster_id', 'position')
+    )
+
+    bitmaps = AttendanceBitmap.objects.filter(roster_id__in=positions)
+    if faculty is not None:
+        bitmaps = bitmaps.filter(schedule__faculty=faculty)
+
+    # Gather the student's bit from every class into two column bitmaps
+    marked_column = present_column = 0
+    for i, (roster_id, marked, present) in enumerate(
+        bitmaps.values_list('roster_id', 'marked', 'present').iterator()
+    ):
+        shift = positions[roster_id]
+        marked_column |= ((bitmap_to_int(marked) >> shift) & 1) << i
+        present_column |= ((bitmap_to_int(present) >> shift) & 1) << i
+
+    total = popcount(marked_column)
+    attended = popcount(present_column)
+    return {
+        'total_classes': total,
+        'attended_classes': attended,
+        'absent_classes': total - attended,
+    }
+
+
+def cohort_summary(faculty):
+    """
+    Per-student and per-class counts for all of a faculty's bitmaps.
+    Returns (per_student, per_schedule) where per_student maps student id to
+    [total, attended] and per_schedule maps schedule id to
+    {'present', 'absent', 'unmarked'}.
+    """
+    bitmaps = list(
+        AttendanceBitmap.objects.filter(schedule__faculty=faculty)
+        .values_list('schedule_id', 'roster_id', 'marked', 'present')
+    )
+    index = RosterIndex(CohortRoster.objects.filter(pk__in={row[1] for row in bitmaps}))
+
+    per_student = {}
+    per_schedule = {}
+    for schedule_id, roster_id, marked, present in bitmaps:
+        roster_ids = index.ids[roster_id]
+        marked_bits = bitmap_to_int(marked)
+        present_bits = bitmap_to_int(present)
+
+        marked_count = popcount(marked_bits)
+        present_count = popcount(present_bits)
+        per_schedule[schedule_id] = {
+            'present': present_count,
+            'absent': marked_count - present_count,
+            'unmarked': len(roster_ids) - marked_count,
+        }
+
+        # Walk only the set bits of the marked plane
+        while marked_bits:
+            low_bit = marked_bits & -marked_bits
+            position = low_bit.bit_length() - 1
+            counts = per_student.setdefault(roster_ids[position], [0, 0])
+            counts[0] += 1
+            if present_bits & low_bit:
+                counts[1] += 1
+            marked_bits ^= low_bit
+
+    return per_student, per_schedule
+
+
+# ============================================================================
+# MIGRATION FROM ROW STORAGE
+# ============================================================================
+
+def convert_rows_to_bitmaps(schedule_ids):
+    """
+    Write bitmaps of the Attendance rows of the given schedules, keeping
+    the rows. Rosters are the faculty's current cohort plus anyone with a
+    row, in hall ticket order. Returns the number of bitmaps written.
+    """
+    schedules = Schedule.objects.filter(pk__in=schedule_ids).select_related('faculty')
+    rows = Attendance.objects.filter(schedule_id__in=schedule_ids).order_by().values_list(
+        'schedule_id', 'student_id', 'status', 'student__hall_ticket_id'
+    )
+
+    statuses = {}
+    tickets = {}
+    for schedule_id, student_id, status, hall_ticket_id in rows.iterator():
+        statuses.setdefault(schedule_id, {})[student_id] = status
+        tickets[student_id] = hall_ticket_id
+
+    cohorts = {}
+    rosters = {}
+    bitmaps = []
+    for schedule in schedules:
+        if schedule.pk not in statuses:
+            continue
+        faculty = schedule.faculty
+        cohort_key = (faculty.branch, faculty.year)
+        if cohort_key not in cohorts:
+            cohorts[cohort_key] = dict(
+                Student.objects.filter(
+                    branch=faculty.branch, year=faculty.year, is_active=True
+                )
+                .values_list('id', 'hall_ticket_id')
+            )
+        members = {**cohorts[cohort_key]}
+        for student_id in statuses[schedule.pk]:
+            members.setdefault(student_id, tickets[student_id])
+
+        roster_ids = sorted(members, key=members.get)
+        roster = freeze_roster(faculty.branch, faculty.year, roster_ids, cache=rosters)
+        marked, present = encode_statuses(roster_ids, statuses[schedule.pk])
+        bitmaps.append(AttendanceBitmap(
+            schedule=schedule, roster=roster, marked=marked, present=present
+        ))
+
+    with transaction.atomic(using=current_database()):
+        AttendanceBitmap.objects.filter(schedule_id__in=[b.schedule_id for b in bitmaps]).delete()
+        AttendanceBitmap.objects.bulk_create(bitmaps)
+    return len(bitmaps)
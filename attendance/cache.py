@@ -0,0 +1,296 @@
+"""
+Caching helpers for the attendance app.
+
+Cached data lives in namespaces. Every key embeds its namespace's current
+version number, so a whole namespace (every cohort roster, every dashboard)
+is invalidated with one counter bump instead of deleting keys one by one.
+
+Rosters and dashboard summaries are computed through cached_compute(),
+which lets one caller at a time recompute a missing key while the others
+wait for its result, and refreshes hot keys shortly before they expire.
+After attendance is marked, the affected summaries are recomputed in the
+background, before the students open their dashboards. Cached values are
+always computed from the primary database, never from a read replica
+that may not have caught up with the latest marks yet.
+
+Data versions are counters bumped whenever a student's attendance or a
+cohort's classes change. Pages build their ETags from them, so an
+unchanged page is recognised without querying the data it shows.
+"""
+
+import logging
+import math
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models import Count, Q
+
+from .alerts import ATTENDANCE_THRESHOLD, attendance_percentage, classes_needed
+from .models import Student, Attendance
+from .routers import primary_reads
+from .tenancy import current_database, current_tenant, use_tenant
+from .versions import bump_versions
+
+ROSTER_NAMESPACE = 'roster'
+DASHBOARD_NAMESPACE = 'dashboard'
+
+CACHE_TIMEOUT = 60 * 15
+
+# Seconds a computation may hold its key's lock, and a miss waits for it
+LOCK_TIMEOUT = 30
+LOCK_WAIT = 5
+LOCK_POLL_INTERVAL = 0.05
+
+# Larger values refresh hot keys earlier before they expire
+EARLY_REFRESH_BETA = 1.0
+
+logger = logging.getLogger('attendance.cache')
+
+_warm_executor = None
+
+
+def _version_key(namespace):
+    return f'attendance:version:{namespace}'
+
+
+def namespace_version(namespace):
+    """Return the current version of a namespace, starting at 1."""
+    return cache.get_or_set(_version_key(namespace), 1, timeout=None)
+
+
+def bump_namespace(namespace):
+    """Invalidate every key in a namespace at once."""
+    try:
+        cache.incr(_version_key(namespace))
+    except ValueError:
+        cache.set(_version_key(namespace), 2, timeout=None)
+
+
+def make_key(namespace, *parts):
+    """Build a versioned cache key."""
+    suffix = ':'.join(str(part) for part in parts)
+    return f'attendance:{namespace}:{namespace_version(namespace)}:{suffix}'
+
+
+# ============================================================================
+# STAMPEDE PROTECTION
+# ============================================================================
+
+def _lock_key(key):
+    return f'{key}:lock'
+
+
+def _store(key, value, cost, timeout):
+    # Kept with the value: when it expires and how long it took to compute
+    cache.set(key, (value, time.time() + timeout, cost), timeout)
+
+
+def _compute_and_store(key, compute, timeout, locked=True):
+    started = time.time()
+    try:
+        with primary_reads():
+            value = compute()
+        _store(key, value, time.time() - started, timeout)
+    finally:
+        if locked:
+            cache.delete(_lock_key(key))
+    return value
+
+
+def cached_compute(key, compute, timeout=CACHE_TIMEOUT):
+    """
+    Return the value cached under `key`, computing it with compute() when
+    missing. Concurrent misses wait for a single computation instead of
+    each running their own. A cached value is recomputed early by one
+    caller with a probability that rises as its expiry nears, scaled by
+    how long it takes to compute, so a hot key does not expire under load.
+    """
+    entry = cache.get(key)
+    if entry is not None:
+        value, expires, cost = entry
+        if time.time() - cost * EARLY_REFRESH_BETA * math.log(1 - random.random()) < expires:
+            return value
+        # One caller refreshes; the others keep using the current value
+        if not cache.add(_lock_key(key), 1, LOCK_TIMEOUT):
+            return value
+        return _compute_and_store(key, compute, timeout)
+
+    if cache.add(_lock_key(key), 1, LOCK_TIMEOUT):
+        return _compute_and_store(key, compute, timeout)
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+    # The computation holding the lock is stuck or died
+    return _compute_and_store(key, compute, timeout, locked=False)
+
+
+# ============================================================================
+# COHORT ROSTERS
+# ============================================================================
+
+def get_cohort_roster(branch, year):
+    """Active students of a cohort in hall ticket order, cached."""
+    return cached_compute(make_key(ROSTER_NAMESPACE, branch, year), lambda: list(
+        Student.objects.filter(branch=branch, year=year, is_active=True)
+        .order_by('hall_ticket_id')
+    ))
+
+
+def invalidate_cohort_rosters():
+    """Drop every cached roster, e.g. after a student joins or leaves a cohort."""
+    bump_namespace(ROSTER_NAMESPACE)
+
+
+# ============================================================================
+# DASHBOARDS
+# ============================================================================
+
+def _student_summary_key(student_id):
+    return make_key(DASHBOARD_NAMESPACE, 'student', student_id)
+
+
+def _subject_breakdowns(student_ids):
+    """
+    {student id: per subject and faculty attendance} of some students, from
+    one grouped query.
+    """
+    rows = (
+        Attendance.objects.filter(student__in=student_ids)
+        .values('student', 'schedule__subject', 'schedule__faculty', 'schedule__faculty__name')
+        .annotate(total=Count('id'), attended=Count('id', filter=Q(status='P')))
+        .order_by('student', 'schedule__subject', 'schedule__faculty__name')
+    )
+    breakdowns = {student_id: [] for student_id in student_ids}
+    for row in rows:
+        percentage = attendance_percentage(row['attended'], row['total'])
+        breakdowns[row['student']].append({
+            'subject': row['schedule__subject'],
+            'faculty_id': row['schedule__faculty'],
+            'faculty_name': row['schedule__faculty__name'],
+            'total_classes': row['total'],
+            'attended_classes': row['attended'],
+            'percentage': percentage,
+            'at_risk': percentage < ATTENDANCE_THRESHOLD,
+            'classes_needed': classes_needed(row['attended'], row['total']),
+        })
+    return breakdowns
+
+
+def _summary(subjects):
+    total_classes = sum(subject['total_classes'] for subject in subjects)
+    attended_classes = sum(subject['attended_classes'] for subject in subjects)
+    return {
+        'total_classes': total_classes,
+        'attended_classes': attended_classes,
+        'absent_classes': total_classes - attended_classes,
+        'subjects': subjects,
+    }
+
+
+def get_student_summary(student):
+    """
+    Attendance totals and the per-subject breakdown shown on the student
+    dashboard, cached per student.
+    """
+    return cached_compute(
+        _student_summary_key(student.id),
+        lambda: _summary(_subject_breakdowns([student.id])[student.id]),
+    )
+
+
+def invalidate_student_summaries(student_ids):
+    """Drop the cached dashboard data of specific students."""
+    cache.delete_many([_student_summary_key(student_id) for student_id in student_ids])
+
+
+def invalidate_dashboards():
+    """Drop every cached dashboard at once."""
+    bump_namespace(DASHBOARD_NAMESPACE)
+
+
+# ============================================================================
+# SUMMARY WARMING
+# ============================================================================
+
+WARM_CHUNK_SIZE = 500
+
+
+def warm_student_summaries(student_ids):
+    """Recompute and cache the dashboard summaries of some students in bulk."""
+    student_ids = list(student_ids)
+    for start in range(0, len(student_ids), WARM_CHUNK_SIZE):
+        chunk = student_ids[start:start + WARM_CHUNK_SIZE]
+        started = time.time()
+        with primary_reads():
+            breakdowns = _subject_breakdowns(chunk)
+        cost = (time.time() - started) / len(chunk)
+        expires = time.time() + CACHE_TIMEOUT
+        cache.set_many({
+            _student_summary_key(student_id): (_summary(subjects), expires, cost)
+            for student_id, subjects in breakdowns.items()
+        }, CACHE_TIMEOUT)
+    return len(student_ids)
+
+
+def _warm_job(student_ids, tenant):
+    try:
+        # Pool threads start outside the request's tenant
+        with use_tenant(tenant):
+            warm_student_summaries(student_ids)
+    except Exception:
+        logger.exception('Warming the summaries of %d students failed', len(student_ids))
+    finally:
+        # Pool threads keep no connections open between jobs
+        connections.close_all()
+
+
+def queue_summary_warming(student_ids):
+    """
+    Once the current transaction commits, recompute the summaries of
+    students whose attendance changed in a background thread, or right
+    away when SUMMARY_WARM_WORKERS is 0.
+    """
+    global _warm_executor
+    student_ids = list(student_ids)
+    if not student_ids:
+        return
+    if not settings.SUMMARY_WARM_WORKERS:
+        transaction.on_commit(lambda: warm_student_summaries(student_ids), using=current_database())
+        return
+    if _warm_executor is None:
+        _warm_executor = ThreadPoolExecutor(
+            max_workers=settings.SUMMARY_WARM_WORKERS, thread_name_prefix='summary-warm'
+        )
+    tenant = current_tenant()
+    transaction.on_commit(
+        lambda: _warm_executor.submit(_warm_job, student_ids, tenant), using=current_database()
+    )
+
+
+# ============================================================================
+# DATA VERSIONS
+# ============================================================================
+
+def student_version_key(student_id):
+    return f'attendance:data-version:student:{student_id}'
+
+
+def cohort_version_key(branch, year):
+    return f'attendance:data-version:cohort:{branch}:{year}'
+
+
+def bump_student_versions(student_ids):
+    """Record that the attendance of some students changed."""
+    bump_versions([student_version_key(student_id) for student_id in student_ids])
+
+
+def bump_cohort_version(branch, year):
+    """Record that the classes of a cohort changed."""
+    bump_versions([cohort_version_key(branch, year)])
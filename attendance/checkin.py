@@ -0,0 +1,406 @@
+"""
+Self check-in for a class with a rotating code.
+
+Faculty open a short-lived CheckInWindow on a schedule and show its code,
+which changes every CODE_STEP_SECONDS. Students submit the code from their
+phones. A check-in is validated against the window state and the cohort
+roster, both cached, and buffered as one cache key per student. Nothing is
+written to the database on the request path. Buffered check-ins are
+flushed to Attendance with a single bulk upsert per window: by a
+background thread at most once every FLUSH_INTERVAL_SECONDS
+(CHECKIN_FLUSH_WORKERS), when the window closes, when the faculty opens
+the marking page, or from the flush_checkins command.
+
+Each buffered key holds PENDING until a flush writes it and moves it to
+FLUSHED. A flush only moves the keys it read, so a check-in that arrives
+mid-flush stays pending for the next flush instead of being lost. A
+flusher first claims the window with cache.add(), so two flushers (say
+the background flush and a window closing) never write, and log, the same
+check-ins twice. The
+buffer lives only in the cache, so with several server processes the cache
+must be shared between them (SHARED_CACHE_PATH, Redis), which system check
+attendance.E004 enforces, and it must not evict buffered keys before they
+are flushed.
+"""
+
+import hashlib
+import hmac
+import logging
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .audit import ChangeLog
+from .cache import (
+    get_cohort_roster, invalidate_student_summaries, bump_student_versions, queue_summary_warming
+)
+from .models import Attendance, CheckInWindow, Schedule
+from .rollups import queue_rollup_refresh
+from .tenancy import current_database, current_tenant, use_tenant
+
+CODE_STEP_SECONDS = 30
+CODE_DIGITS = 6
+DEFAULT_WINDOW_MINUTES = 10
+MAX_WINDOW_MINUTES = 60
+FLUSH_INTERVAL_SECONDS = 5
+
+# Seconds a flusher may hold a window's claim, and another one waits for it
+FLUSH_CLAIM_TIMEOUT = 60
+FLUSH_CLAIM_WAIT = 10
+FLUSH_CLAIM_POLL_INTERVAL = 0.05
+
+# Wrong codes a student may submit per code rotation
+MAX_FAILED_ATTEMPTS = 5
+
+PENDING = 'P'
+FLUSHED = 'F'
+
+# Results of check_in()
+CHECKED_IN = 'checked_in'
+ALREADY_CHECKED_IN = 'already_checked_in'
+INVALID_CODE = 'invalid_code'
+NOT_ON_ROSTER = 'not_on_roster'
+NO_OPEN_WINDOW = 'no_open_window'
+
+logger = logging.getLogger('attendance.checkin')
+
+_flush_executor = None
+
+
+# ============================================================================
+# ROTATING CODES
+# ============================================================================
+
+def code_for_step(secret, step):
+    """The CODE_DIGITS-digit code of a window for one time step."""
+    digest = hmac.new(secret.encode(), str(step).encode(), hashlib.sha256).digest()
+    return str(int.from_bytes(digest[:8], 'big') % 10 ** CODE_DIGITS).zfill(CODE_DIGITS)
+
+
+def current_step(now=None):
+    """Index of the CODE_STEP_SECONDS time step containing `now`."""
+    return int((now if now is not None else time.time()) // CODE_STEP_SECONDS)
+
+
+def current_code(secret, now=None):
+    """Return (code, seconds until it rotates)."""
+    now = now if now is not None else time.time()
+    step = current_step(now)
+    return code_for_step(secret, step), int((step + 1) * CODE_STEP_SECONDS - now)
+
+
+def code_is_valid(secret, code, now=None):
+    """Accept the current code and the previous one, for students typing at a rotation."""
+    step = current_step(now)
+    return any(
+        hmac.compare_digest(code_for_step(secret, candidate), code)
+        for candidate in (step, step - 1)
+    )
+
+
+# ============================================================================
+# CACHE LAYOUT
+# ============================================================================
+
+def _window_key(window_id):
+    return f'attendance:checkin:window:{window_id}'
+
+
+def _cohort_key(branch, year):
+    return f'attendance:checkin:cohort:{branch}:{year}'
+
+
+def _student_key(window_id, student_id):
+    return f'attendance:checkin:{window_id}:{student_id}'
+
+
+def _count_key(window_id):
+    return f'attendance:checkin:{window_id}:count'
+
+
+def _flush_lock_key(window_id):
+    return f'attendance:checkin:{window_id}:flush'
+
+
+def _flush_claim_key(window_id):
+    return f'attendance:checkin:{window_id}:flushing'
+
+
+def _attempts_key(student_id):
+    return f'attendance:checkin:attempts:{student_id}:{current_step()}'
+
+
+def _buffer_timeout(expires_at):
+    # Outlive the window by an hour so late flushes still find the check-ins
+    return max(int(expires_at - time.time()), 0) + 3600
+
+
+def _window_state(window):
+    faculty = window.schedule.faculty
+    roster = get_cohort_roster(faculty.branch, faculty.year)
+    return {
+        'id': window.id,
+        'schedule_id': window.schedule_id,
+        'secret': window.secret,
+        'expires_at': window.expires_at.timestamp(),
+        'roster': frozenset(student.id for student in roster),
+    }
+
+
+def _cache_window(window):
+    """Store the window state and list it under its cohort."""
+    faculty = window.schedule.faculty
+    state = _window_state(window)
+    timeout = _buffer_timeout(state['expires_at'])
+    cache.set(_window_key(window.id), state, timeout)
+    cohort_key = _cohort_key(faculty.branch, faculty.year)
+    window_ids = [
+        window_id for window_id in cache.get(cohort_key, [])
+        if window_id != window.id and cache.get(_window_key(window_id))
+    ]
+    cache.set(cohort_key, window_ids + [window.id], timeout)
+    cache.add(_count_key(window.id), 0, timeout)
+    return state
+
+
+def _get_window_state(window_id):
+    state = cache.get(_window_key(window_id))
+    if state is None:
+        window = CheckInWindow.objects.select_related('schedule__faculty').filter(
+            pk=window_id, closed_at__isnull=True
+        ).first()
+        if window is None:
+            return None
+        state = _cache_window(window)
+    return state
+
+
+# ============================================================================
+# WINDOWS
+# ============================================================================
+
+def open_window(schedule, user=None, minutes=DEFAULT_WINDOW_MINUTES):
+    """Open a check-in window on a schedule, closing any window still open on it."""
+    for window in CheckInWindow.objects.filter(schedule=schedule, closed_at__isnull=True):
+        close_window(window)
+    window = CheckInWindow.objects.create(
+        schedule=schedule,
+        secret=secrets.token_hex(16),
+        opened_by=user if user is not None and user.is_authenticated else None,
+        expires_at=timezone.now() + timedelta(minutes=minutes),
+    )
+    _cache_window(window)
+    return window
+
+
+def close_window(window):
+    """Flush the window's buffered check-ins and close it."""
+    flush_window(window.id)
+    window.closed_at = timezone.now()
+    window.save(update_fields=['closed_at'])
+    cache.delete(_window_key(window.id))
+    faculty = window.schedule.faculty
+    cohort_key = _cohort_key(faculty.branch, faculty.year)
+    window_ids = cache.get(cohort_key)
+    if window_ids is not None:
+        cache.set(cohort_key, [window_id for window_id in window_ids if window_id != window.id])
+    return window
+
+
+def checked_in_count(window_id):
+    """Number of students checked in through a window so far."""
+    return cache.get(_count_key(window_id)) or 0
+
+
+# ============================================================================
+# INGESTION
+# ============================================================================
+
+def too_many_attempts(student):
+    """Whether a student has used up their wrong guesses for the current code."""
+    return (cache.get(_attempts_key(student.id)) or 0) >= MAX_FAILED_ATTEMPTS
+
+
+def record_failed_attempt(student):
+    """Count one wrong code against the student for the current rotation."""
+    key = _attempts_key(student.id)
+    if not cache.add(key, 1, CODE_STEP_SECONDS * 2):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, CODE_STEP_SECONDS * 2)
+
+
+def check_in(student, code, now=None, flush_interval=FLUSH_INTERVAL_SECONDS):
+    """
+    Validate and buffer one student's check-in against the open windows of
+    their cohort. Returns (result, window_id, flush_due); the caller
+    queues a flush of the window when flush_due is True.
+    """
+    now = now if now is not None else time.time()
+    window_ids = cache.get(_cohort_key(student.branch, student.year))
+    if window_ids is None:
+        window_ids = list(
+            CheckInWindow.objects.filter(
+                schedule__branch=student.branch,
+                schedule__year=student.year,
+                closed_at__isnull=True,
+                expires_at__gt=timezone.now(),
+            ).values_list('pk', flat=True)
+        )
+        cache.set(_cohort_key(student.branch, student.year), window_ids, FLUSH_INTERVAL_SECONDS)
+
+    open_states = []
+    for window_id in window_ids:
+        state = _get_window_state(window_id)
+        if state is not None and state['expires_at'] > now:
+            open_states.append(state)
+    if not open_states:
+        return NO_OPEN_WINDOW, None, False
+
+    state = next((s for s in open_states if code_is_valid(s['secret'], code, now)), None)
+    if state is None:
+        return INVALID_CODE, None, False
+    if student.id not in state['roster']:
+        return NOT_ON_ROSTER, state['id'], False
+
+    timeout = _buffer_timeout(state['expires_at'])
+    if not cache.add(_student_key(state['id'], student.id), PENDING, timeout):
+        return ALREADY_CHECKED_IN, state['id'], False
+    try:
+        cache.incr(_count_key(state['id']))
+    except ValueError:
+        cache.set(_count_key(state['id']), 1, timeout)
+
+    # Whoever takes the lock first in each interval triggers the flush
+    flush_due = cache.add(_flush_lock_key(state['id']), 1, flush_interval)
+    return CHECKED_IN, state['id'], flush_due
+
+
+def flush_window(window_id, wait=True):
+    """
+    Write a window's pending check-ins to Attendance with one bulk upsert.
+    Only one flusher at a time holds a window; with wait=False a window
+    being flushed elsewhere is skipped. Returns the number of students written.
+    """
+    claim_key, token = _flush_claim_key(window_id), secrets.token_hex(8)
+    deadline = time.monotonic() + (FLUSH_CLAIM_WAIT if wait else 0)
+    while not cache.add(claim_key, token, FLUSH_CLAIM_TIMEOUT):
+        if time.monotonic() >= deadline:
+            return 0
+        time.sleep(FLUSH_CLAIM_POLL_INTERVAL)
+    try:
+        return _flush_pending(window_id)
+    finally:
+        if cache.get(claim_key) == token:
+            cache.delete(claim_key)
+
+
+def _flush_pending(window_id):
+    state = _get_window_state(window_id)
+    if state is None:
+        window = CheckInWindow.objects.select_related('schedule__faculty').filter(pk=window_id).first()
+        if window is None:
+            return 0
+        state = _window_state(window)
+
+    keys = {_student_key(window_id, student_id): student_id for student_id in state['roster']}
+    pending = [
+        keys[key] for key, value in cache.get_many(list(keys)).items() if value == PENDING
+    ]
+    if not pending:
+        return 0
+
+    schedule_id = state['schedule_id']
+    cohort = Schedule.objects.values('faculty_id', 'branch', 'year').get(pk=schedule_id)
+    with transaction.atomic(using=current_database()):
+        previous = dict(
+            Attendance.objects.filter(schedule_id=schedule_id, student_id__in=pending)
+            .values_list('student_id', 'status')
+        )
+        changed = [student_id for student_id in pending if previous.get(student_id) != 'P']
+        Attendance.objects.bulk_create(
+            [Attendance(student_id=student_id, schedule_id=schedule_id, status='P', **cohort)
+             for student_id in changed],
+            update_conflicts=True,
+            unique_fields=['student', 'schedule'],
+            update_fields=['status', 'updated_at'],
+        )
+        change_log = ChangeLog()
+        for student_id in changed:
+            change_log.record(student_id, schedule_id, previous.get(student_id), 'P')
+        # bulk_create sends no signals: refresh what the post_save handlers would
+        transaction.on_commit(
+            lambda: invalidate_student_summaries(changed), using=current_database()
+        )
+        transaction.on_commit(lambda: bump_student_versions(changed), using=current_database())
+        queue_rollup_refresh([schedule_id])
+        queue_summary_warming(changed)
+
+    cache.set_many(
+        {_student_key(window_id, student_id): FLUSHED for student_id in pending},
+        _buffer_timeout(state['expires_at']),
+    )
+    return len(pending)
+
+
+def _flush_job(window_id, tenant):
+    try:
+        # Pool threads start outside the request's tenant
+        with use_tenant(tenant):
+            # A flush already running writes these check-ins or leaves them pending
+            flush_window(window_id, wait=False)
+    except Exception:
+        logger.exception('Flushing the check-ins of window %s failed', window_id)
+    finally:
+        # Pool threads keep no connections open between jobs
+        connections.close_all()
+
+
+def queue_flush(window_id):
+    """
+    Flush a window in a background thread, off the student's request.
+    With CHECKIN_FLUSH_WORKERS = 0 the check-ins wait for the marking page,
+    the window closing or the flush_checkins command.
+    """
+    global _flush_executor
+    if not settings.CHECKIN_FLUSH_WORKERS:
+        return
+    if _flush_executor is None:
+        _flush_executor = ThreadPoolExecutor(
+            max_workers=settings.CHECKIN_FLUSH_WORKERS, thread_name_prefix='checkin-flush'
+        )
+    _flush_executor.submit(_flush_job, window_id, current_tenant())
+
+
+def forget_window(window_id, student_ids):
+    """Drop every cache key of a window, e.g. after a rolled-back load test."""
+    cache.delete_many([
+        _window_key(window_id), _count_key(window_id), _flush_lock_key(window_id),
+        _flush_claim_key(window_id),
+        *(_student_key(window_id, student_id) for student_id in student_ids),
+    ])
+
+
+def flush_open_windows(schedule=None):
+    """Flush every window not closed yet, e.g. from the flush_checkins command."""
+    windows = CheckInWindow.objects.filter(closed_at__isnull=True)
+    if schedule is not None:
+        windows = windows.filter(schedule=schedule)
+    return sum(flush_window(window_id) for window_id in windows.values_list('pk', flat=True))
+
+
+def close_expired_windows():
+    """Close, and so flush, every window whose time is up."""
+    expired = CheckInWindow.objects.filter(closed_at__isnull=True, expires_at__lte=timezone.now())
+    closed = 0
+    for window in expired.select_related('schedule__faculty'):
+        close_window(window)
+        closed += 1
+    return closed
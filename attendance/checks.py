@@ -0,0 +1,199 @@
+"""
+System checks for configuration that hurts performance in production.
+
+Every check is tagged `performance` and registered as a deployment check:
+
+    python manage.py check --deploy --tag performance --database default
+
+Checks that read pragmas from a database only run for the databases named
+with --database, like Django's own database checks. The SQLite pragmas in
+settings.SQLITE_PRAGMAS are applied to every new SQLite connection by
+apply_sqlite_pragmas.
+
+check_profile_root is a security check run on every command: stored
+request profiles must never be served as media or static files. So is
+check_checkin_buffer: check-ins buffered in a per-process cache are lost.
+"""
+
+import os
+
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+from django.db import DatabaseError, connections
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+from django.template.loaders.cached import Loader as CachedLoader
+
+from .profiling import profile_root
+
+PERFORMANCE = 'performance'
+
+# Cache backends that each worker process keeps to itself, or that lose
+# concurrent incr() updates between processes
+UNSHARED_CACHES = {
+    'django.core.cache.backends.locmem.LocMemCache': 'keeps a separate cache in every worker',
+    'django.core.cache.backends.filebased.FileBasedCache': 'loses concurrent updates between workers',
+}
+
+# PRAGMA synchronous values
+SYNCHRONOUS_FULL = 2
+
+
+# ============================================================================
+# SQLITE PRAGMAS
+# ============================================================================
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """connection_created receiver running settings.SQLITE_PRAGMAS on SQLite connections."""
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    if connection.vendor != 'sqlite' or not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def _pragma(connection, name):
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA {name}')
+        return cursor.fetchone()[0]
+
+
+# ============================================================================
+# CHECKS
+# ============================================================================
+
+def _inside(path, directory):
+    path, directory = os.path.realpath(path), os.path.realpath(directory)
+    return os.path.commonpath([path, directory]) == directory
+
+
+@register(Tags.security)
+def check_profile_root(app_configs, **kwargs):
+    """Request profiles must not land in a publicly served directory."""
+    errors = []
+    for setting in ('MEDIA_ROOT', 'STATIC_ROOT'):
+        directory = getattr(settings, setting, None)
+        if directory and _inside(profile_root(), directory):
+            errors.append(Error(
+                f'PROFILE_ROOT is inside {setting}, so stored request profiles can be '
+                'downloaded by anyone who guesses their names.',
+                hint="Point PROFILE_ROOT at a directory that is not served, e.g. BASE_DIR / 'profiles'.",
+                id='attendance.E003',
+            ))
+    return errors
+
+
+@register(Tags.caches)
+def check_checkin_buffer(app_configs, **kwargs):
+    """Check-ins are buffered in the default cache, which every worker must share."""
+    workers = getattr(settings, 'WEB_CONCURRENCY', 1)
+    backend = settings.CACHES['default']['BACKEND']
+    problem = UNSHARED_CACHES.get(backend)
+    if workers < 2 or not problem:
+        return []
+    return [Error(
+        f"Student check-ins are buffered in the default cache, which uses "
+        f"{backend.rsplit('.', 1)[-1]} and {problem}, but WEB_CONCURRENCY is {workers}: "
+        'check-ins taken by one worker are never flushed by the others, or are lost.',
+        hint='Set SHARED_CACHE_PATH to a local file (attendance.sharedcache), or use Redis.',
+        id='attendance.E004',
+    )]
+
+
+@register(PERFORMANCE, deploy=True)
+def check_debug(app_configs, **kwargs):
+    """DEBUG makes every connection record the SQL it runs."""
+    if not settings.DEBUG:
+        return []
+    return [Error(
+        'DEBUG is True: every database connection records the SQL and timing of its '
+        'queries in connection.queries, up to 9000 per connection, so workers hold that '
+        'memory and every query pays for the bookkeeping.',
+        hint='Set DEBUG = False, e.g. with DJANGO_SETTINGS_MODULE=attendanceproject.settings_production.',
+        id='attendance.E001',
+    )]
+
+
+@register(PERFORMANCE, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """Several workers need one cache for rosters, versions and buffered check-ins."""
+    workers = getattr(settings, 'WEB_CONCURRENCY', 1)
+    if workers < 2:
+        return []
+    errors = []
+    for alias, cache_settings in settings.CACHES.items():
+        problem = UNSHARED_CACHES.get(cache_settings['BACKEND'])
+        if problem:
+            errors.append(Error(
+                f"Cache '{alias}' uses {cache_settings['BACKEND'].rsplit('.', 1)[-1]}, which "
+                f'{problem}, but WEB_CONCURRENCY is {workers}: invalidations and data versions '
+                'do not reach the other workers.',
+                hint='Set SHARED_CACHE_PATH to a local file (attendance.sharedcache), or use Redis.',
+                id='attendance.E002',
+            ))
+    return errors
+
+
+@register(PERFORMANCE, deploy=True)
+def check_template_loaders(app_configs, **kwargs):
+    """Without the cached loader every render reads and compiles its templates again."""
+    warnings = []
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        if not any(isinstance(loader, CachedLoader) for loader in engine.engine.template_loaders):
+            warnings.append(Warning(
+                f"Template engine '{engine.name}' does not use the cached template loader, "
+                'so every render reads and compiles its templates again.',
+                hint="Wrap the loaders in 'django.template.loaders.cached.Loader', or leave "
+                     "OPTIONS['loaders'] unset.",
+                id='attendance.W001',
+            ))
+    return warnings
+
+
+@register(PERFORMANCE, deploy=True)
+def check_persistent_connections(app_configs, **kwargs):
+    """CONN_MAX_AGE = 0 opens a new database connection for every request."""
+    return [
+        Warning(
+            f"Database '{alias}' has CONN_MAX_AGE = 0, so every request opens and closes "
+            'its own connection.',
+            hint='Set CONN_MAX_AGE (e.g. 600) with CONN_HEALTH_CHECKS = True.',
+            id='attendance.W002',
+        )
+        for alias, database in settings.DATABASES.items()
+        if not database.get('CONN_MAX_AGE')
+    ]
+
+
+@register(PERFORMANCE, deploy=True)
+def check_sqlite_pragmas(app_configs, databases=None, **kwargs):
+    """SQLite should run in WAL mode, with synchronous relaxed to NORMAL."""
+    warnings = []
+    for alias in databases or []:
+        connection = connections[alias]
+        if connection.vendor != 'sqlite':
+            continue
+        try:
+            journal_mode = str(_pragma(connection, 'journal_mode')).lower()
+            synchronous = _pragma(connection, 'synchronous')
+        except DatabaseError:
+            continue
+        if journal_mode != 'wal':
+            warnings.append(Warning(
+                f"SQLite database '{alias}' uses journal_mode={journal_mode}: a write "
+                'blocks every reader, and every commit rewrites the rollback journal.',
+                hint="Add 'journal_mode': 'WAL' to settings.SQLITE_PRAGMAS.",
+                id='attendance.W003',
+            ))
+        elif synchronous == SYNCHRONOUS_FULL:
+            warnings.append(Warning(
+                f"SQLite database '{alias}' uses synchronous=FULL in WAL mode, which "
+                'syncs the disk on every commit.',
+                hint="Add 'synchronous': 'NORMAL' to settings.SQLITE_PRAGMAS. In WAL mode the "
+                     'database stays consistent; a power loss can only undo the latest commits.',
+                id='attendance.W004',
+            ))
+    return warnings
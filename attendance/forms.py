@@ -7,6 +7,15 @@ from django import forms
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from .models import Student, Faculty, Schedule, Attendance, BRANCH_CHOICES, YEAR_CHOICES
+from .timetable import WEEKDAY_CHOICES, MAX_TIMETABLE_DAYS, expand_timetable_dates
+from .checkin import CODE_DIGITS, DEFAULT_WINDOW_MINUTES, MAX_WINDOW_MINUTES
+from .importer import DEFAULT_TOPIC
+
+# Largest student photo upload accepted
+MAX_PHOTO_BYTES = 5 * 1024 * 1024
+
+# Largest paper register upload accepted
+MAX_REGISTER_BYTES = 10 * 1024 * 1024
 
 # ============================================================================
 # ROLE CHOICE
@@ -474,6 +483,29 @@ class ScheduleForm(forms.ModelForm):
         }
 
 
+class StudentPhotoForm(forms.ModelForm):
+    """
+    Form for faculty to upload a student's photo for the roll-call page.
+    """
+    class Meta:
+        model = Student
+        fields = ('photo',)
+        widgets = {
+            'photo': forms.FileInput(attrs={
+                'class': 'form-control',
+                'accept': 'image/jpeg,image/png,image/webp'
+            }),
+        }
+
+    def clean_photo(self):
+        photo = self.cleaned_data.get('photo')
+        if photo and photo.size > MAX_PHOTO_BYTES:
+            raise forms.ValidationError(
+                f'Photos can be at most {MAX_PHOTO_BYTES // (1024 * 1024)} MB.'
+            )
+        return photo
+
+
 class AttendanceForm(forms.Form):
     """
     Form for marking attendance for multiple students.
@@ -491,3 +523,163 @@ class AttendanceForm(forms.Form):
                 }),
                 label=f"{student.hall_ticket_id} - {student.name}"
             )
+
+
+class AttendanceImportForm(forms.Form):
+    """
+    Form for faculty to upload a paper attendance register (CSV or XLSX).
+    """
+    sheet = forms.FileField(
+        widget=forms.FileInput(attrs={
+            'class': 'form-control',
+            'accept': '.csv,.xlsx,text/csv,application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        }),
+        label='Register'
+    )
+    topic = forms.CharField(
+        max_length=200,
+        initial=DEFAULT_TOPIC,
+        widget=forms.TextInput(attrs={
+            'class': 'form-control'
+        }),
+        label='Topic for new classes'
+    )
+    overwrite = forms.BooleanField(
+        required=False,
+        widget=forms.CheckboxInput(attrs={
+            'class': 'form-check-input'
+        }),
+        label='Overwrite marks that were already saved'
+    )
+
+    def clean_sheet(self):
+        sheet = self.cleaned_data.get('sheet')
+        if sheet and not sheet.name.lower().endswith(('.csv', '.xlsx')):
+            raise forms.ValidationError('Upload a .csv or .xlsx file.')
+        if sheet and sheet.size > MAX_REGISTER_BYTES:
+            raise forms.ValidationError(
+                f'Registers can be at most {MAX_REGISTER_BYTES // (1024 * 1024)} MB.'
+            )
+        return sheet
+
+
+class RecurringScheduleForm(forms.Form):
+    """
+    Form for generating a recurring timetable.
+    Expands the selected weekdays over a date range, skipping holidays.
+    """
+    start_date = forms.DateField(
+        widget=forms.DateInput(attrs={
+            'class': 'form-control',
+            'type': 'date'
+        }),
+        label='Start Date'
+    )
+    end_date = forms.DateField(
+        widget=forms.DateInput(attrs={
+            'class': 'form-control',
+            'type': 'date'
+        }),
+        label='End Date'
+    )
+    weekdays = forms.TypedMultipleChoiceField(
+        choices=WEEKDAY_CHOICES,
+        coerce=int,
+        widget=forms.CheckboxSelectMultiple(attrs={
+            'class': 'form-check-input'
+        }),
+        label='Class Days'
+    )
+    holidays = forms.CharField(
+        required=False,
+        widget=forms.Textarea(attrs={
+            'class': 'form-control',
+            'rows': 3,
+            'placeholder': 'YYYY-MM-DD, one per line or comma separated'
+        }),
+        label='Holidays'
+    )
+    subject = forms.CharField(
+        max_length=100,
+        required=False,
+        widget=forms.TextInput(attrs={
+            'class': 'form-control',
+            'placeholder': 'Leave blank to use the faculty subject'
+        })
+    )
+    topic = forms.CharField(
+        max_length=200,
+        widget=forms.TextInput(attrs={
+            'class': 'form-control',
+            'placeholder': 'Enter Topic'
+        })
+    )
+
+    def clean_holidays(self):
+        """Parse the holiday list into a set of dates."""
+        raw = self.cleaned_data.get('holidays') or ''
+        field = forms.DateField()
+        holidays = set()
+        for token in raw.replace(',', ' ').split():
+            try:
+                holidays.add(field.clean(token))
+            except forms.ValidationError:
+                raise forms.ValidationError(f'"{token}" is not a valid holiday date.')
+        return holidays
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start_date = cleaned_data.get('start_date')
+        end_date = cleaned_data.get('end_date')
+
+        if start_date and end_date:
+            if end_date < start_date:
+                raise forms.ValidationError('End date must be on or after the start date.')
+            if (end_date - start_date).days > MAX_TIMETABLE_DAYS:
+                raise forms.ValidationError(
+                    f'A timetable can cover at most {MAX_TIMETABLE_DAYS} days.'
+                )
+
+        return cleaned_data
+
+    def get_dates(self):
+        """Return the class dates described by the cleaned form."""
+        return expand_timetable_dates(
+            self.cleaned_data['start_date'],
+            self.cleaned_data['end_date'],
+            self.cleaned_data['weekdays'],
+            self.cleaned_data['holidays'],
+        )
+
+
+class CheckInWindowForm(forms.Form):
+    """
+    Form for faculty to open a check-in window on a class.
+    """
+    minutes = forms.IntegerField(
+        min_value=1,
+        max_value=MAX_WINDOW_MINUTES,
+        initial=DEFAULT_WINDOW_MINUTES,
+        widget=forms.NumberInput(attrs={
+            'class': 'form-control',
+        }),
+        label='Window Length (minutes)'
+    )
+
+
+class CheckInForm(forms.Form):
+    """
+    Form for students to check in with the code shown in class.
+    """
+    code = forms.RegexField(
+        regex=rf'^\d{{{CODE_DIGITS}}}$',
+        error_messages={'invalid': f'Enter the {CODE_DIGITS}-digit code shown in class.'},
+        widget=forms.TextInput(attrs={
+            'class': 'form-control form-control-lg text-center',
+            'placeholder': '0' * CODE_DIGITS,
+            'inputmode': 'numeric',
+            'autocomplete': 'off',
+            'maxlength': CODE_DIGITS,
+        }),
+        label='Check-in Code'
+    )
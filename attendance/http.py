@@ -0,0 +1,59 @@
+"""
+Conditional GET and compression for the HTML pages.
+
+Student pages carry an ETag built only from cached data version counters
+(see attendance.cache), so a reload of an unchanged page is answered with
+304 Not Modified before the view runs a single attendance query.
+"""
+
+import hashlib
+
+from django.contrib import messages
+from django.middleware.gzip import GZipMiddleware
+
+from .cache import DASHBOARD_NAMESPACE, namespace_version, student_version_key, cohort_version_key
+from .versions import get_versions
+
+# Content types worth compressing; images and archives are already compressed
+COMPRESSIBLE_PREFIXES = ('text/',)
+COMPRESSIBLE_TYPES = {
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+}
+
+
+def student_page_etag(request, *args, **kwargs):
+    """
+    ETag of a student's own page: the page, the student, and the versions of
+    their attendance, their cohort's classes and every dashboard. None when
+    messages are waiting, as a cached copy would not show them.
+    """
+    if len(messages.get_messages(request)):
+        return None
+    student = request.user.student_profile
+    parts = [
+        request.get_full_path(),
+        student.pk,
+        student.updated_at.timestamp(),
+        namespace_version(DASHBOARD_NAMESPACE),
+        *get_versions([
+            student_version_key(student.pk), cohort_version_key(student.branch, student.year)
+        ]),
+    ]
+    return hashlib.md5(':'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware restricted to compressible content types. Streaming
+    responses of those types are still compressed chunk by chunk, while
+    streamed files such as photos pass through untouched.
+    """
+
+    def process_response(self, request, response):
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if not (content_type.startswith(COMPRESSIBLE_PREFIXES) or content_type in COMPRESSIBLE_TYPES):
+            return response
+        return super().process_response(request, response)
@@ -0,0 +1,386 @@
+"""
+Bulk import of paper attendance registers.
+
+A register is a CSV or XLSX sheet for the faculty's cohort: one row per
+student keyed by hall ticket ID, one column per class date, and P or A in
+the cells (blank cells are skipped). The sheet is read one row at a time,
+so a large upload is never held in memory.
+
+Hall ticket IDs are resolved against the cohort roster, fetched once.
+Classes missing for the sheet's dates are created with one bulk insert.
+Statuses are upserted in transactions of CHUNK_SIZE marks. Problems with
+single rows or cells are collected in the ImportReport instead of aborting
+the import; only a sheet that cannot be read at all raises SheetError.
+"""
+
+import csv
+import io
+import re
+import zipfile
+from datetime import date, datetime, timedelta
+from xml.etree import ElementTree
+
+from django.db import transaction
+from django.utils import timezone
+
+from .audit import ChangeLog
+from .cache import (
+    get_cohort_roster, invalidate_student_summaries, bump_student_versions, queue_summary_warming
+)
+from .models import Schedule, Attendance
+from .rollups import queue_rollup_refresh
+from .tenancy import current_database
+from .timetable import MAX_TIMETABLE_DAYS, generate_timetable
+
+# Marks upserted per transaction
+CHUNK_SIZE = 2000
+
+# Problems listed per kind in a report; the rest are only counted
+REPORT_LIMIT = 50
+
+DEFAULT_TOPIC = 'Paper attendance'
+
+ID_HEADERS = {'hall ticket id', 'hall ticket', 'hall ticket no', 'hall_ticket_id', 'roll no', 'id'}
+
+# Columns a register may carry for people reading it, skipped silently
+NAME_HEADERS = {'name', 'student name', 'student'}
+
+STATUS_VALUES = {
+    'p': 'P', 'present': 'P', '1': 'P',
+    'a': 'A', 'absent': 'A', '0': 'A',
+}
+
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y')
+
+# Day zero of Excel's serial date numbers
+EXCEL_EPOCH = date(1899, 12, 30)
+
+XLSX_MAIN = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+XLSX_RELATIONSHIP = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id'
+PACKAGE_RELATIONSHIP = '{http://schemas.openxmlformats.org/package/2006/relationships}Relationship'
+
+
+class SheetError(Exception):
+    """Raised when an uploaded sheet cannot be imported at all."""
+
+
+class ImportReport:
+    """Counts of an import and the problems found along the way."""
+
+    KINDS = (
+        ('columns', 'Ignored columns'),
+        ('unknown', 'Unknown hall ticket IDs'),
+        ('duplicates', 'Students listed twice'),
+        ('invalid', 'Unreadable marks'),
+        ('conflicts', 'Conflicts with marks already saved'),
+    )
+
+    def __init__(self):
+        self.rows = 0
+        self.schedules_created = 0
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.problems = {kind: [] for kind, _ in self.KINDS}
+        self.problem_counts = {kind: 0 for kind, _ in self.KINDS}
+
+    def add_problem(self, kind, message):
+        self.problem_counts[kind] += 1
+        if len(self.problems[kind]) < REPORT_LIMIT:
+            self.problems[kind].append(message)
+
+    @property
+    def saved(self):
+        return self.created + self.updated
+
+    def sections(self):
+        """[(label, messages, count)] of the kinds of problem found."""
+        return [
+            (label, self.problems[kind], self.problem_counts[kind])
+            for kind, label in self.KINDS if self.problem_counts[kind]
+        ]
+
+
+# ============================================================================
+# READING SHEETS
+# ============================================================================
+
+def _csv_rows(upload):
+    text = io.TextIOWrapper(upload, encoding='utf-8-sig', newline='')
+    try:
+        yield from csv.reader(text)
+    except UnicodeDecodeError:
+        raise SheetError('CSV files must be saved as UTF-8.')
+    except csv.Error as error:
+        raise SheetError(f'The CSV file could not be read: {error}.')
+    finally:
+        text.detach()
+
+
+def _column_index(reference):
+    """Zero-based column of a cell reference such as 'AB12'."""
+    index = 0
+    for letter in re.match(r'[A-Z]+', reference).group():
+        index = index * 26 + ord(letter) - ord('A') + 1
+    return index - 1
+
+
+def _first_sheet(archive):
+    """Path inside the archive of the workbook's first worksheet."""
+    workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+    sheet = workbook.find(f'{XLSX_MAIN}sheets/{XLSX_MAIN}sheet')
+    if sheet is None:
+        raise SheetError('The workbook has no worksheets.')
+    relationships = ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    for relationship in relationships.iter(PACKAGE_RELATIONSHIP):
+        if relationship.get('Id') == sheet.get(XLSX_RELATIONSHIP):
+            target = relationship.get('Target')
+            return target.lstrip('/') if target.startswith('/') else f'xl/{target}'
+    raise SheetError('The first worksheet of the workbook is missing.')
+
+
+def _shared_strings(archive):
+    if 'xl/sharedStrings.xml' not in archive.namelist():
+        return []
+    strings = []
+    with archive.open('xl/sharedStrings.xml') as source:
+        for _, element in ElementTree.iterparse(source):
+            if element.tag == f'{XLSX_MAIN}si':
+                # Plain text or rich text runs; phonetic hints are left out
+                strings.append(''.join(
+                    text.text or '' for text in element.iter(f'{XLSX_MAIN}t')
+                    if text not in element.findall(f'{XLSX_MAIN}rPh/{XLSX_MAIN}t')
+                ))
+                element.clear()
+    return strings
+
+
+def _cell_value(cell, strings):
+    kind = cell.get('t', 'n')
+    if kind == 'inlineStr':
+        return ''.join(text.text or '' for text in cell.iter(f'{XLSX_MAIN}t'))
+    value = cell.findtext(f'{XLSX_MAIN}v')
+    if value is None:
+        return ''
+    if kind == 's':
+        return strings[int(value)]
+    if kind == 'n':
+        number = float(value)
+        return int(number) if number.is_integer() else number
+    return value
+
+
+def _xlsx_rows(upload):
+    try:
+        archive = zipfile.ZipFile(upload)
+        sheet = _first_sheet(archive)
+        strings = _shared_strings(archive)
+        with archive.open(sheet) as source:
+            for _, element in ElementTree.iterparse(source):
+                if element.tag != f'{XLSX_MAIN}row':
+                    continue
+                row = []
+                for cell in element.iter(f'{XLSX_MAIN}c'):
+                    reference = cell.get('r')
+                    if reference:
+                        row.extend([''] * (_column_index(reference) - len(row)))
+                    row.append(_cell_value(cell, strings))
+                element.clear()
+                yield row
+    except (zipfile.BadZipFile, KeyError, ElementTree.ParseError):
+        raise SheetError('The XLSX file could not be read.')
+
+
+def read_sheet(upload, name):
+    """Yield the rows of an uploaded CSV or XLSX sheet as lists of cell values."""
+    if name.lower().endswith('.xlsx'):
+        return _xlsx_rows(upload)
+    return _csv_rows(upload)
+
+
+# ============================================================================
+# IMPORT
+# ============================================================================
+
+def _text(value):
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def parse_header_date(value):
+    """The class date named by a header cell, or None."""
+    if isinstance(value, (int, float)):
+        # An Excel date cell holds the number of days since EXCEL_EPOCH
+        return EXCEL_EPOCH + timedelta(days=int(value)) if 20000 < value < 80000 else None
+    text = _text(value).split(' ')[0].split('T')[0]
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _parse_header(header, report):
+    """(index of the hall ticket column, [(index, date)]) of a header row."""
+    id_column = None
+    dates = []
+    seen = set()
+    today = timezone.localdate()
+    for index, value in enumerate(header):
+        label = _text(value)
+        day = parse_header_date(value)
+        if day is None:
+            if id_column is None and label.lower() in ID_HEADERS:
+                id_column = index
+            elif label and label.lower() not in NAME_HEADERS:
+                report.add_problem('columns', f'"{label}" is not a date.')
+        elif day in seen:
+            report.add_problem('columns', f'{day:%d/%m/%Y} appears twice; only the first column is used.')
+        elif day > today:
+            report.add_problem('columns', f'{day:%d/%m/%Y} is in the future.')
+        else:
+            seen.add(day)
+            dates.append((index, day))
+    if id_column is None:
+        raise SheetError('The first row needs a "Hall Ticket ID" column.')
+    if not dates:
+        raise SheetError('The first row has no class date columns (use YYYY-MM-DD or DD/MM/YYYY).')
+    if len(dates) > MAX_TIMETABLE_DAYS:
+        raise SheetError(f'A sheet can cover at most {MAX_TIMETABLE_DAYS} class dates.')
+    return id_column, dates
+
+
+def _write_chunk(marks, cohorts, overwrite, actor, report):
+    """
+    Upsert [(student_id, schedule_id, status, where)] in one transaction,
+    with the faculty and cohort of each class from `cohorts`.
+    Returns the (student ids, schedule ids) whose attendance changed.
+    """
+    student_ids = {student_id for student_id, _, _, _ in marks}
+    schedule_ids = {schedule_id for _, schedule_id, _, _ in marks}
+    # A change log of its own, flushed with this transaction or dropped with it
+    change_log = ChangeLog(actor=actor)
+    with transaction.atomic(using=current_database()):
+        previous = {
+            (student_id, schedule_id): status
+            for student_id, schedule_id, status in Attendance.objects.filter(
+                student_id__in=student_ids, schedule_id__in=schedule_ids
+            ).values_list('student_id', 'schedule_id', 'status')
+        }
+        writes = []
+        for student_id, schedule_id, status, where in marks:
+            old_status = previous.get((student_id, schedule_id))
+            if old_status == status:
+                report.unchanged += 1
+                continue
+            if old_status is not None:
+                if not overwrite:
+                    report.add_problem(
+                        'conflicts', f'{where}: already marked {old_status}, sheet says {status}.'
+                    )
+                    continue
+                report.updated += 1
+            else:
+                report.created += 1
+            writes.append(Attendance(
+                student_id=student_id, schedule_id=schedule_id, status=status, **cohorts[schedule_id]
+            ))
+            change_log.record(student_id, schedule_id, old_status, status)
+        if not writes:
+            return set(), set()
+        Attendance.objects.bulk_create(
+            writes,
+            update_conflicts=True,
+            unique_fields=['student', 'schedule'],
+            update_fields=['status', 'updated_at'],
+        )
+        changed = {mark.student_id for mark in writes}
+        # bulk_create sends no signals: refresh what the post_save handlers would
+        transaction.on_commit(
+            lambda: invalidate_student_summaries(changed), using=current_database()
+        )
+        transaction.on_commit(lambda: bump_student_versions(changed), using=current_database())
+    return changed, {mark.schedule_id for mark in writes}
+
+
+def import_register(upload, name, faculty, actor=None, topic=DEFAULT_TOPIC, overwrite=False):
+    """
+    Import a paper register for the faculty's cohort and return its
+    ImportReport. Marks that differ from ones already saved are reported
+    as conflicts and left alone, unless `overwrite` is set.
+    """
+    report = ImportReport()
+    rows = enumerate(read_sheet(upload, name), start=1)
+    header = next((row for _, row in rows if any(_text(cell) for cell in row)), None)
+    if header is None:
+        raise SheetError('The sheet is empty.')
+    id_column, dates = _parse_header(header, report)
+
+    roster = {
+        student.hall_ticket_id.upper(): student.id
+        for student in get_cohort_roster(faculty.branch, faculty.year)
+    }
+    report.schedules_created, _ = generate_timetable(
+        [faculty], [day for _, day in dates], topic=topic
+    )
+    # A faculty holds at most one class a day (Schedule.unique_together),
+    # so each date column maps to exactly one of the faculty's classes
+    schedule_by_date, cohorts = {}, {}
+    for schedule in Schedule.objects.filter(
+        faculty=faculty, date__in=[day for _, day in dates]
+    ).values('id', 'date', 'branch', 'year'):
+        schedule_by_date[schedule['date']] = schedule['id']
+        cohorts[schedule['id']] = {
+            'faculty_id': faculty.id, 'branch': schedule['branch'], 'year': schedule['year']
+        }
+
+    seen = {}
+    marks = []
+    changed_students, changed_schedules = set(), set()
+    for line, row in rows:
+        if not any(_text(cell) for cell in row):
+            continue
+        report.rows += 1
+        hall_ticket = _text(row[id_column]) if id_column < len(row) else ''
+        student_id = roster.get(hall_ticket.upper())
+        if student_id is None:
+            report.add_problem(
+                'unknown', f'Row {line}: "{hall_ticket}" is not in your cohort.'
+                if hall_ticket else f'Row {line}: no hall ticket ID.'
+            )
+            continue
+        if student_id in seen:
+            report.add_problem(
+                'duplicates', f'Row {line}: {hall_ticket} was already listed on row {seen[student_id]}.'
+            )
+            continue
+        seen[student_id] = line
+
+        for index, day in dates:
+            value = _text(row[index]) if index < len(row) else ''
+            if not value:
+                continue
+            status = STATUS_VALUES.get(value.lower())
+            where = f'Row {line}, {hall_ticket} on {day:%d/%m/%Y}'
+            if status is None:
+                report.add_problem('invalid', f'{where}: "{value}" is not P or A.')
+                continue
+            marks.append((student_id, schedule_by_date[day], status, where))
+
+        if len(marks) >= CHUNK_SIZE:
+            students, classes = _write_chunk(marks, cohorts, overwrite, actor, report)
+            changed_students |= students
+            changed_schedules |= classes
+            marks = []
+    if marks:
+        students, classes = _write_chunk(marks, cohorts, overwrite, actor, report)
+        changed_students |= students
+        changed_schedules |= classes
+
+    # Once for the whole sheet rather than per chunk
+    if changed_schedules:
+        queue_rollup_refresh(changed_schedules)
+        queue_summary_warming(changed_students)
+    return report
@@ -0,0 +1,40 @@
+"""
+Management command that fails when a hot query regresses to a full table scan.
+"""
+
+from django.core.management.base import CommandError
+
+from attendance.query_plans import audit
+from attendance.tenancy import TenantCommand, current_connection
+
+
+class Command(TenantCommand):
+    help = 'Capture EXPLAIN QUERY PLAN for the hot queries and fail on full table scans.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verbose-plans',
+            action='store_true',
+            help='Print the full plan for every query, not only failures.',
+        )
+
+    def handle(self, *args, **options):
+        if current_connection().vendor != 'sqlite':
+            raise CommandError('Query plan audit reads SQLite EXPLAIN QUERY PLAN output only.')
+
+        failures = 0
+        for name, plan, scanned in audit():
+            if scanned:
+                failures += 1
+                self.stdout.write(self.style.ERROR(
+                    f'FAIL  {name}: full scan of {", ".join(scanned)}'
+                ))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'ok    {name}'))
+
+            if scanned or options['verbose_plans']:
+                for line in plan:
+                    self.stdout.write(f'        {line}')
+
+        if failures:
+            raise CommandError(f'{failures} hot queries regressed to a full table scan.')
@@ -0,0 +1,33 @@
+"""
+Management command that (re)builds the daily cohort attendance rollups.
+"""
+
+from datetime import date
+
+from django.core.management.base import CommandError
+
+from attendance.rollups import backfill_rollups
+from attendance.tenancy import TenantCommand
+
+
+def _parse_date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f'Invalid date {value!r}, expected YYYY-MM-DD.')
+
+
+class Command(TenantCommand):
+    help = 'Recompute DailyCohortRollup rows from attendance, optionally within a date range.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=_parse_date, help='First class date (YYYY-MM-DD).')
+        parser.add_argument('--end', type=_parse_date, help='Last class date (YYYY-MM-DD).')
+
+    def handle(self, *args, **options):
+        refreshed = backfill_rollups(
+            start=options['start'],
+            end=options['end'],
+            progress=self.stdout.write,
+        )
+        self.stdout.write(self.style.SUCCESS(f'Refreshed rollups for {refreshed} schedules.'))
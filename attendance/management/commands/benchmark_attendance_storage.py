@@ -0,0 +1,164 @@
+"""
+Management command comparing row-per-student and bitmap attendance storage.
+All benchmark data is written inside a transaction that is rolled back.
+"""
+
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count, Q
+
+from attendance import bitmap
+from attendance.models import Student, Faculty, Schedule, Attendance
+
+ROW_TABLES = ['attendance_attendance']
+BITMAP_TABLES = ['attendance_attendancebitmap', 'attendance_cohortroster']
+
+
+def table_bytes(tables):
+    """Bytes used by tables and their indexes, or None without dbstat."""
+    placeholders = ', '.join(['%s'] * len(tables))
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT COALESCE(SUM(pgsize), 0) FROM dbstat WHERE name IN '
+                f'(SELECT name FROM sqlite_master WHERE tbl_name IN ({placeholders}))',
+                tables,
+            )
+            return cursor.fetchone()[0]
+    except Exception:
+        return None
+
+
+def timed(func, *args, **kwargs):
+    """Run func and return its duration in milliseconds."""
+    started = time.perf_counter()
+    func(*args, **kwargs)
+    return (time.perf_counter() - started) * 1000
+
+
+class Command(BaseCommand):
+    help = 'Benchmark disk size, write latency and summary latency of both attendance storages.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=200)
+        parser.add_argument('--schedules', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            self.stdout.write(self.style.WARNING('Disk sizes are only measured on SQLite.'))
+
+        random.seed(options['seed'])
+        with transaction.atomic():
+            self.run(options['students'], options['schedules'])
+            transaction.set_rollback(True)
+
+    def run(self, student_count, schedule_count):
+        faculty, students, schedules = self.create_fixtures(student_count, schedule_count)
+        statuses = [
+            {student.id: random.choice('PPPA') for student in students}
+            for _ in schedules
+        ]
+
+        rows_before = table_bytes(ROW_TABLES)
+        row_writes = [
+            timed(Attendance.objects.bulk_create, [
+                Attendance(
+                    student_id=student_id, schedule=schedule, status=status,
+                    faculty=faculty, branch=faculty.branch, year=faculty.year,
+                )
+                for student_id, status in marks.items()
+            ])
+            for schedule, marks in zip(schedules, statuses)
+        ]
+        rows_after = table_bytes(ROW_TABLES)
+
+        bitmaps_before = table_bytes(BITMAP_TABLES)
+        bitmap_writes = [
+            timed(bitmap.store_schedule_attendance, schedule, marks)
+            for schedule, marks in zip(schedules, statuses)
+        ]
+        bitmaps_after = table_bytes(BITMAP_TABLES)
+
+        sample = random.sample(students, min(20, len(students)))
+        row_student = [timed(self.row_student_summary, student, faculty) for student in sample]
+        bitmap_student = [
+            timed(bitmap.student_summary, student, faculty) for student in sample
+        ]
+        row_cohort = [timed(self.row_cohort_summary, faculty) for _ in range(5)]
+        bitmap_cohort = [timed(bitmap.cohort_summary, faculty) for _ in range(5)]
+
+        self.stdout.write(f'{student_count} students x {schedule_count} classes\n')
+        self.report_size('Disk size', rows_before, rows_after, bitmaps_before, bitmaps_after)
+        self.report('Write latency per class', row_writes, bitmap_writes)
+        self.report('Student summary latency', row_student, bitmap_student)
+        self.report('Cohort summary latency', row_cohort, bitmap_cohort)
+
+    def create_fixtures(self, student_count, schedule_count):
+        user = User.objects.create_user('bench_faculty')
+        faculty = Faculty.objects.create(
+            user=user, name='Benchmark Faculty', subject='Benchmark', branch='CE', year=4
+        )
+        users = User.objects.bulk_create([
+            User(username=f'bench_student_{i}') for i in range(student_count)
+        ])
+        Student.objects.bulk_create([
+            Student(
+                user=user,
+                hall_ticket_id=f'BENCH{i:06d}',
+                name=f'Benchmark Student {i}',
+                branch='CE',
+                year=4,
+            )
+            for i, user in enumerate(users)
+        ])
+        students = list(Student.objects.filter(hall_ticket_id__startswith='BENCH'))
+        start = date(2000, 1, 1)
+        Schedule.objects.bulk_create([
+            Schedule(
+                faculty=faculty, date=start + timedelta(days=i), subject='Bench', topic='Bench',
+                branch=faculty.branch, year=faculty.year,
+            )
+            for i in range(schedule_count)
+        ])
+        schedules = list(Schedule.objects.filter(faculty=faculty).select_related('faculty'))
+        return faculty, students, schedules
+
+    @staticmethod
+    def row_student_summary(student, faculty):
+        return Attendance.objects.filter(student=student, faculty=faculty).aggregate(
+            total=Count('pk'), attended=Count('pk', filter=Q(status='P'))
+        )
+
+    @staticmethod
+    def row_cohort_summary(faculty):
+        return list(
+            Attendance.objects.filter(faculty=faculty)
+            .values('student_id')
+            .annotate(total=Count('pk'), attended=Count('pk', filter=Q(status='P')))
+        )
+
+    def report_size(self, label, rows_before, rows_after, bitmaps_before, bitmaps_after):
+        if None in (rows_before, rows_after, bitmaps_before, bitmaps_after):
+            self.stdout.write(f'{label}: unavailable (SQLite built without dbstat)')
+            return
+        rows = rows_after - rows_before
+        bitmaps = bitmaps_after - bitmaps_before
+        ratio = rows / bitmaps if bitmaps else float('inf')
+        self.stdout.write(
+            f'{label:<26} rows {rows / 1024:>10.1f} KiB   bitmap {bitmaps / 1024:>10.1f} KiB   '
+            f'({ratio:.1f}x smaller)'
+        )
+
+    def report(self, label, row_timings, bitmap_timings):
+        rows = statistics.median(row_timings)
+        bitmaps = statistics.median(bitmap_timings)
+        self.stdout.write(
+            f'{label:<26} rows {rows:>10.2f} ms    bitmap {bitmaps:>10.2f} ms    (median)'
+        )
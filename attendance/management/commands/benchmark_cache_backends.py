@@ -0,0 +1,145 @@
+"""
+Management command comparing cache backends under concurrent worker processes,
+the way several WSGI workers share one host. Each backend gets a fresh
+location in a temporary directory, so the configured cache is not touched.
+"""
+
+import multiprocessing
+import random
+import shutil
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'shared': 'attendance.sharedcache.SharedSQLiteCache',
+}
+
+COUNTER_KEY = 'bench:counter'
+
+PHASES = ('set', 'get', 'incr')
+
+
+def _value(size):
+    """A cached value shaped like a roster slice, about `size` bytes pickled."""
+    return [
+        {'id': i, 'name': f'Student {i:05d}', 'branch': 'CSE', 'year': 2} for i in range(size // 60)
+    ]
+
+
+def _keys(seed, operations, key_count):
+    rng = random.Random(seed)
+    return [f'bench:{rng.randrange(key_count)}' for _ in range(operations)]
+
+
+def _worker(backend, location, options, operations, key_count, value_size, seeds, barrier, results):
+    """
+    Run every phase against one backend, in step with the other workers.
+    Reads look up the keys another worker wrote, so a cache that is not
+    shared between processes misses.
+    """
+    cache = import_string(backend)(location, {'OPTIONS': options, 'TIMEOUT': None})
+    own_seed, neighbour_seed = seeds
+    value = _value(value_size)
+    cache.add(COUNTER_KEY, 0)
+    hits = 0
+
+    barrier.wait()
+    for key in _keys(own_seed, operations, key_count):
+        cache.set(key, value)
+    barrier.wait()
+
+    keys = _keys(neighbour_seed, operations, key_count)
+    barrier.wait()
+    for key in keys:
+        if cache.get(key) is not None:
+            hits += 1
+    barrier.wait()
+
+    barrier.wait()
+    for _ in range(operations):
+        cache.incr(COUNTER_KEY)
+    barrier.wait()
+
+    results.put(hits)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark get/set/incr throughput of cache backends shared by several worker processes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=8)
+        parser.add_argument(
+            '--operations', type=int, default=2000, help='Operations per process and phase.'
+        )
+        parser.add_argument('--keys', type=int, default=2000, help='Distinct keys written.')
+        parser.add_argument('--value-size', type=int, default=2048, help='Approximate bytes per value.')
+        parser.add_argument(
+            '--backends', nargs='+', choices=sorted(BACKENDS), default=['locmem', 'file', 'shared'],
+        )
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        processes = options['processes']
+        self.stdout.write(
+            f"{processes} processes x {options['operations']} operations per phase, "
+            f"{options['keys']} keys, ~{options['value_size']} byte values\n"
+        )
+        self.stdout.write(
+            f"{'Backend':<8} {'set/s':>10} {'get/s':>10} {'get hits':>9} {'incr/s':>10}   counter"
+        )
+        directory = tempfile.mkdtemp(prefix='cache-bench-')
+        try:
+            for name in options['backends']:
+                self.run(name, directory, options)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def run(self, name, directory, options):
+        processes, operations = options['processes'], options['operations']
+        backend = BACKENDS[name]
+        location = f'{directory}/{name}' + ('.sqlite3' if name == 'shared' else '')
+        cache_options = {'MAX_ENTRIES': options['keys'] * 2}
+
+        context = multiprocessing.get_context('spawn')
+        barrier = context.Barrier(processes + 1)
+        results = context.Queue()
+        workers = [
+            context.Process(target=_worker, args=(
+                backend, location, cache_options, operations, options['keys'],
+                options['value_size'], (options['seed'] + i, options['seed'] + (i + 1) % processes),
+                barrier, results,
+            ))
+            for i in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+
+        # Workers start each phase together; its wall time runs until the last one finishes
+        rates = {}
+        for phase in PHASES:
+            barrier.wait()
+            started = time.perf_counter()
+            barrier.wait()
+            rates[phase] = processes * operations / (time.perf_counter() - started)
+
+        hits = sum(results.get() for _ in workers) / (processes * operations) * 100
+        for worker in workers:
+            worker.join()
+
+        expected = processes * operations
+        counter = import_string(backend)(location, {'OPTIONS': cache_options}).get(COUNTER_KEY)
+        if counter == expected:
+            verdict = self.style.SUCCESS(f'{counter}/{expected}')
+        elif counter is None:
+            verdict = self.style.WARNING('not shared between processes')
+        else:
+            verdict = self.style.ERROR(f'{counter}/{expected} (lost updates)')
+        self.stdout.write(
+            f"{name:<8} {rates['set']:>10.0f} {rates['get']:>10.0f} {hits:>8.1f}% "
+            f"{rates['incr']:>10.0f}   {verdict}"
+        )
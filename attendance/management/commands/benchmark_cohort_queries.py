@@ -0,0 +1,170 @@
+"""
+Management command comparing cohort queries that join Attendance through
+Schedule to Faculty against the same queries on the denormalized faculty,
+branch and year columns of Attendance.
+All benchmark data is written inside a transaction that is rolled back.
+"""
+
+import math
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count, Q
+
+from attendance.models import Student, Faculty, Schedule, Attendance, BRANCH_CHOICES, YEAR_CHOICES
+
+FACULTY_PER_COHORT = 6
+
+# One row per student of a class's cohort, so the rows need no Python round trip
+FILL_ATTENDANCE = """
+INSERT INTO attendance_attendance
+    (student_id, schedule_id, status, marked_at, updated_at, faculty_id, branch, year)
+SELECT st.id, sc.id, CASE WHEN (st.id + sc.id) % 4 = 0 THEN 'A' ELSE 'P' END,
+       CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, sc.faculty_id, sc.branch, sc.year
+FROM attendance_schedule sc
+JOIN attendance_student st ON st.branch = sc.branch AND st.year = sc.year
+WHERE sc.faculty_id IN (SELECT id FROM attendance_faculty WHERE name LIKE 'Benchmark %%')
+  AND st.hall_ticket_id LIKE 'BENCH%%'
+"""
+
+
+def _per_student(attendance):
+    return list(
+        attendance.values('student')
+        .annotate(total=Count('id'), attended=Count('id', filter=Q(status='P')))
+        .order_by()
+    )
+
+
+def _totals(attendance):
+    return attendance.aggregate(total=Count('id'), attended=Count('id', filter=Q(status='P')))
+
+
+# (label, joined query, single-table query) taking a faculty member
+QUERIES = [
+    (
+        'Faculty summary per student',
+        lambda f: _per_student(Attendance.objects.filter(schedule__faculty=f)),
+        lambda f: _per_student(Attendance.objects.filter(faculty=f)),
+    ),
+    (
+        'Cohort summary per student',
+        lambda f: _per_student(Attendance.objects.filter(
+            schedule__faculty__branch=f.branch, schedule__faculty__year=f.year
+        )),
+        lambda f: _per_student(Attendance.objects.filter(branch=f.branch, year=f.year)),
+    ),
+    (
+        'Cohort totals',
+        lambda f: _totals(Attendance.objects.filter(
+            schedule__faculty__branch=f.branch, schedule__faculty__year=f.year
+        )),
+        lambda f: _totals(Attendance.objects.filter(branch=f.branch, year=f.year)),
+    ),
+    (
+        'Cohort export',
+        lambda f: list(Attendance.objects.filter(
+            schedule__faculty__branch=f.branch, schedule__faculty__year=f.year
+        ).order_by().values_list('student_id', 'schedule_id', 'status')),
+        lambda f: list(Attendance.objects.filter(
+            branch=f.branch, year=f.year
+        ).order_by().values_list('student_id', 'schedule_id', 'status')),
+    ),
+]
+
+
+def timed(func, *args):
+    """Run func and return its duration in milliseconds."""
+    started = time.perf_counter()
+    func(*args)
+    return (time.perf_counter() - started) * 1000
+
+
+class Command(BaseCommand):
+    help = 'Benchmark cohort queries with joins against the denormalized Attendance columns.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10_000_000, help='Attendance rows to create.')
+        parser.add_argument('--students', type=int, default=60, help='Students per cohort.')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.run(options['rows'], options['students'], options['repeat'])
+            transaction.set_rollback(True)
+
+    def run(self, rows, students_per_cohort, repeat):
+        started = time.perf_counter()
+        faculties = self.create_fixtures(rows, students_per_cohort)
+        with connection.cursor() as cursor:
+            cursor.execute(FILL_ATTENDANCE)
+            created = cursor.rowcount
+            if connection.vendor == 'sqlite':
+                cursor.execute('ANALYZE')
+        self.stdout.write(
+            f'{created} attendance rows, {len(faculties)} faculty, '
+            f'{students_per_cohort} students per cohort '
+            f'(created in {time.perf_counter() - started:.1f} s)\n'
+        )
+
+        # Cycle through faculty of different cohorts, so no query reads a warm range
+        samples = [faculties[i * len(faculties) // repeat] for i in range(repeat)]
+        self.stdout.write(f"{'Query':<30} {'joined':>12} {'single-table':>14} {'speedup':>9}")
+        for label, joined, single in QUERIES:
+            joined_ms = statistics.median(timed(joined, faculty) for faculty in samples)
+            single_ms = statistics.median(timed(single, faculty) for faculty in samples)
+            speedup = joined_ms / single_ms if single_ms else float('inf')
+            self.stdout.write(
+                f'{label:<30} {joined_ms:>9.1f} ms {single_ms:>11.1f} ms {speedup:>8.1f}x'
+            )
+
+    def create_fixtures(self, rows, students_per_cohort):
+        cohorts = [(branch, year) for branch, _ in BRANCH_CHOICES for year, _ in YEAR_CHOICES]
+        classes_per_faculty = math.ceil(
+            rows / (len(cohorts) * FACULTY_PER_COHORT * students_per_cohort)
+        )
+
+        users = User.objects.bulk_create([
+            User(username=f'bench_student_{i}')
+            for i in range(len(cohorts) * students_per_cohort)
+        ])
+        Student.objects.bulk_create([
+            Student(
+                user=user,
+                hall_ticket_id=f'BENCH{i:06d}',
+                name=f'Benchmark Student {i}',
+                branch=cohorts[i // students_per_cohort][0],
+                year=cohorts[i // students_per_cohort][1],
+            )
+            for i, user in enumerate(users)
+        ], batch_size=500)
+
+        users = User.objects.bulk_create([
+            User(username=f'bench_faculty_{i}')
+            for i in range(len(cohorts) * FACULTY_PER_COHORT)
+        ])
+        faculties = Faculty.objects.bulk_create([
+            Faculty(
+                user=user,
+                name=f'Benchmark Faculty {i}',
+                subject=f'Subject {i % FACULTY_PER_COHORT}',
+                branch=cohorts[i // FACULTY_PER_COHORT][0],
+                year=cohorts[i // FACULTY_PER_COHORT][1],
+            )
+            for i, user in enumerate(users)
+        ], batch_size=500)
+
+        start = date(1900, 1, 1)
+        for faculty in faculties:
+            Schedule.objects.bulk_create([
+                Schedule(
+                    faculty=faculty, date=start + timedelta(days=i), subject=faculty.subject,
+                    topic='Bench', branch=faculty.branch, year=faculty.year,
+                )
+                for i in range(classes_per_faculty)
+            ], batch_size=500)
+        return faculties
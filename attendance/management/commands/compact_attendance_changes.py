@@ -0,0 +1,34 @@
+"""
+Management command that rolls old attendance changes up into daily summaries.
+"""
+
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+from attendance.audit import compact_day, days_to_compact
+from attendance.tenancy import TenantCommand
+
+
+class Command(TenantCommand):
+    help = 'Compact attendance change entries older than N days into daily summaries.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than',
+            type=int,
+            default=90,
+            help='Compact entries from days at least this many days ago (default: 90).',
+        )
+
+    def handle(self, *args, **options):
+        cutoff_day = timezone.localdate() - timedelta(days=options['older_than'])
+        cutoff = timezone.make_aware(datetime.combine(cutoff_day, time.min))
+
+        total = 0
+        for day in days_to_compact(cutoff):
+            removed = compact_day(day)
+            total += removed
+            self.stdout.write(f'{day}: compacted {removed} entries')
+
+        self.stdout.write(self.style.SUCCESS(f'Compacted {total} attendance change entries.'))
@@ -0,0 +1,36 @@
+"""
+Management command that converts row-per-student attendance into bitmaps.
+The rows are kept: every page and export still reads Attendance.
+"""
+
+from attendance.bitmap import convert_rows_to_bitmaps
+from attendance.models import Attendance
+from attendance.tenancy import TenantCommand
+
+
+class Command(TenantCommand):
+    help = 'Write one AttendanceBitmap per schedule from its Attendance rows, keeping the rows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of schedules converted per transaction.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        schedule_ids = list(
+            Attendance.objects.order_by('schedule_id')
+            .values_list('schedule_id', flat=True)
+            .distinct()
+        )
+
+        converted = 0
+        for start in range(0, len(schedule_ids), batch_size):
+            batch = schedule_ids[start:start + batch_size]
+            converted += convert_rows_to_bitmaps(batch)
+            self.stdout.write(f'Converted {converted}/{len(schedule_ids)} schedules...')
+
+        self.stdout.write(self.style.SUCCESS(f'Converted {converted} schedules to bitmap storage.'))
@@ -0,0 +1,33 @@
+"""
+Management command that deactivates a whole batch of students at once.
+"""
+
+from django.core.management.base import CommandError
+
+from attendance.models import Student, BRANCH_CHOICES, YEAR_CHOICES
+from attendance.purge import deactivate_students
+from attendance.tenancy import TenantCommand
+
+
+class Command(TenantCommand):
+    help = 'Deactivate students by branch/year or hall ticket ID without deleting anything.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--branch', choices=[code for code, _ in BRANCH_CHOICES])
+        parser.add_argument('--year', type=int, choices=[year for year, _ in YEAR_CHOICES])
+        parser.add_argument('--hall-tickets', nargs='+', metavar='ID')
+
+    def handle(self, *args, **options):
+        if not (options['branch'] or options['year'] or options['hall_tickets']):
+            raise CommandError('Select students with --branch, --year or --hall-tickets.')
+
+        students = Student.objects.filter(is_active=True)
+        if options['branch']:
+            students = students.filter(branch=options['branch'])
+        if options['year']:
+            students = students.filter(year=options['year'])
+        if options['hall_tickets']:
+            students = students.filter(hall_ticket_id__in=options['hall_tickets'])
+
+        count = deactivate_students(students)
+        self.stdout.write(self.style.SUCCESS(f'Deactivated {count} students.'))
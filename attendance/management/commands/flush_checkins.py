@@ -0,0 +1,18 @@
+"""
+Management command that writes buffered check-ins and closes expired windows.
+Run it every minute from cron so quiet windows are flushed too.
+"""
+
+from attendance.checkin import close_expired_windows, flush_open_windows
+from attendance.tenancy import TenantCommand
+
+
+class Command(TenantCommand):
+    help = 'Flush buffered self check-ins to Attendance and close expired check-in windows.'
+
+    def handle(self, *args, **options):
+        closed = close_expired_windows()
+        flushed = flush_open_windows()
+        self.stdout.write(self.style.SUCCESS(
+            f'Closed {closed} expired windows; flushed {flushed} check-ins from open windows.'
+        ))
@@ -0,0 +1,175 @@
+"""
+Management command that load tests self check-in with concurrent classrooms.
+Worker threads play the students and only touch the cache, like the request
+path; the main thread performs the flushes they trigger. All data is written
+inside a transaction that is rolled back, and the cache keys are dropped.
+"""
+
+import queue
+import random
+import statistics
+import threading
+import time
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from attendance import checkin
+from attendance.cache import invalidate_cohort_rosters
+from attendance.models import Student, Faculty, Schedule, Attendance, BRANCH_CHOICES, YEAR_CHOICES
+
+COHORTS = [(branch, year) for branch, _ in BRANCH_CHOICES for year, _ in YEAR_CHOICES]
+
+
+class Command(BaseCommand):
+    help = 'Simulate many classrooms checking in at once and report throughput and write batching.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--classrooms', type=int, default=30)
+        parser.add_argument('--students', type=int, default=200, help='Students per classroom.')
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument(
+            '--flush-interval',
+            type=float,
+            default=0.5,
+            help='Seconds between flushes of one window (production default: '
+                 f'{checkin.FLUSH_INTERVAL_SECONDS}).',
+        )
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        windows = []
+        try:
+            with transaction.atomic():
+                windows = self.run(options)
+                transaction.set_rollback(True)
+        finally:
+            for window, students in windows:
+                checkin.forget_window(window.id, [student.id for student in students])
+            invalidate_cohort_rosters()
+
+    def run(self, options):
+        classrooms = self.create_fixtures(options['classrooms'], options['students'])
+        windows = [
+            (checkin.open_window(schedule, minutes=10), students)
+            for schedule, students in classrooms
+        ]
+
+        # Every student of every classroom checks in, arriving in random order
+        arrivals = [(student, window) for window, students in windows for student in students]
+        random.shuffle(arrivals)
+        work = queue.Queue()
+        for arrival in arrivals:
+            work.put(arrival)
+        flushes = queue.Queue()
+        latencies, results = [], []
+        lock = threading.Lock()
+
+        def student_worker():
+            while True:
+                try:
+                    student, window = work.get_nowait()
+                except queue.Empty:
+                    return
+                code, _ = checkin.current_code(window.secret)
+                started = time.perf_counter()
+                result, window_id, flush_due = checkin.check_in(
+                    student, code, flush_interval=options['flush_interval']
+                )
+                elapsed = (time.perf_counter() - started) * 1000
+                with lock:
+                    latencies.append(elapsed)
+                    results.append(result)
+                if flush_due:
+                    flushes.put(window_id)
+
+        threads = [threading.Thread(target=student_worker) for _ in range(options['threads'])]
+        flush_count = flushed_rows = 0
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            for thread in threads:
+                thread.start()
+            while any(thread.is_alive() for thread in threads) or not flushes.empty():
+                try:
+                    window_id = flushes.get(timeout=0.05)
+                except queue.Empty:
+                    continue
+                flushed_rows += checkin.flush_window(window_id)
+                flush_count += 1
+            for thread in threads:
+                thread.join()
+            for window, _ in windows:
+                flushed_rows += checkin.flush_window(window.id)
+                flush_count += 1
+        duration = time.perf_counter() - started
+
+        checked_in = results.count(checkin.CHECKED_IN)
+        stored = Attendance.objects.filter(
+            schedule__in=[window.schedule_id for window, _ in windows], status='P'
+        ).count()
+        writes = [
+            query for query in queries.captured_queries
+            if query['sql'].lstrip().upper().startswith(('INSERT', 'UPDATE', 'DELETE'))
+        ]
+
+        self.stdout.write(
+            f"{len(windows)} classrooms x {options['students']} students, "
+            f"{options['threads']} threads\n"
+        )
+        self.stdout.write(f'Check-ins accepted      {checked_in}/{len(arrivals)}')
+        rejected = sorted(set(results) - {checkin.CHECKED_IN})
+        if rejected:
+            self.stdout.write(self.style.WARNING(f'Rejected results        {", ".join(rejected)}'))
+        self.stdout.write(f'Throughput              {len(arrivals) / duration:.0f} check-ins/s')
+        self.stdout.write(
+            f'Check-in latency        median {statistics.median(latencies):.3f} ms, '
+            f'p99 {statistics.quantiles(latencies, n=100)[98]:.3f} ms'
+        )
+        self.stdout.write(
+            f'Flushes                 {flush_count} ({flushed_rows} rows, '
+            f'{flushed_rows / max(flush_count, 1):.1f} rows per flush)'
+        )
+        self.stdout.write(
+            f'Write statements        {len(writes)} '
+            f'(one transaction per student would need {checked_in})'
+        )
+        if stored == checked_in:
+            self.stdout.write(self.style.SUCCESS(f'Attendance rows stored  {stored}'))
+        else:
+            self.stdout.write(self.style.ERROR(
+                f'Attendance rows stored  {stored}, expected {checked_in}'
+            ))
+        return windows
+
+    def create_fixtures(self, classroom_count, student_count):
+        """One faculty, class and set of fresh students per classroom."""
+        classrooms = []
+        today = date.today()
+        for i in range(classroom_count):
+            branch, year = COHORTS[i % len(COHORTS)]
+            user = User.objects.create_user(f'load_faculty_{i}')
+            faculty = Faculty.objects.create(
+                user=user, name=f'Load Faculty {i}', subject='Load', branch=branch, year=year
+            )
+            schedule = Schedule.objects.create(faculty=faculty, date=today, subject='Load', topic='Load')
+            users = User.objects.bulk_create([
+                User(username=f'load_student_{i}_{j}') for j in range(student_count)
+            ])
+            Student.objects.bulk_create([
+                Student(
+                    user=user,
+                    hall_ticket_id=f'LOAD{i:03d}{j:04d}',
+                    name=f'Load Student {i}-{j}',
+                    branch=branch,
+                    year=year,
+                )
+                for j, user in enumerate(users)
+            ])
+            students = list(Student.objects.filter(hall_ticket_id__startswith=f'LOAD{i:03d}'))
+            classrooms.append((schedule, students))
+        invalidate_cohort_rosters()
+        return classrooms
@@ -0,0 +1,19 @@
+"""
+Django's migrate, with --tenant and --all-tenants to migrate the databases
+of the colleges (see attendance/tenancy.py).
+"""
+
+from django.core.management.commands import migrate
+
+from attendance.tenancy import TenantCommandMixin, current_tenant, prepare_tenant_database, tenant_database
+
+
+class Command(TenantCommandMixin, migrate.Command):
+    help = migrate.Command.help + ' Use --tenant or --all-tenants to migrate college databases.'
+
+    def handle(self, *args, **options):
+        slug = current_tenant()
+        if slug is not None:
+            prepare_tenant_database(slug)
+            options['database'] = tenant_database(slug)
+        return super().handle(*args, **options)
@@ -0,0 +1,63 @@
+"""
+Management command for the year-end batch promotion.
+"""
+
+from django.core.management.base import CommandError
+
+from attendance.models import PromotionRun
+from attendance.promotion import plan_promotion, promote, rollback
+from attendance.tenancy import TenantCommand
+
+
+class Command(TenantCommand):
+    help = (
+        'Promote every active student by one year and graduate final-year students '
+        'in a single transaction. Use --dry-run to preview and --rollback to undo.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show the changes without applying them.',
+        )
+        parser.add_argument(
+            '--advance-faculty',
+            action='store_true',
+            help='Move faculty up with their batch (final-year faculty return to year 1).',
+        )
+        parser.add_argument(
+            '--rollback',
+            action='store_true',
+            help='Undo the most recent promotion.',
+        )
+
+    def handle(self, *args, **options):
+        if options['rollback']:
+            run = PromotionRun.objects.filter(rolled_back_at__isnull=True).first()
+            if run is None:
+                raise CommandError('There is no promotion to roll back.')
+            if options['dry_run']:
+                self.stdout.write(
+                    f'Would roll back {run}: {len(run.promoted_student_ids)} promoted, '
+                    f'{len(run.graduated_student_ids)} graduated, '
+                    f'{len(run.faculty_changes)} faculty changes.'
+                )
+                return
+            rollback(run)
+            self.stdout.write(self.style.SUCCESS(f'Rolled back {run}.'))
+            return
+
+        for kind, branch, from_year, to_year, count in plan_promotion(options['advance_faculty']):
+            target = f'Year {to_year}' if to_year else 'graduated'
+            self.stdout.write(f'  {kind:<9} {branch:<4} Year {from_year} -> {target:<10} {count}')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Dry run: nothing was changed.'))
+            return
+
+        run = promote(advance_faculty=options['advance_faculty'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Promoted {len(run.promoted_student_ids)} students, graduated '
+            f'{len(run.graduated_student_ids)} (run #{run.pk}).'
+        ))
@@ -0,0 +1,40 @@
+"""
+Management command that physically deletes deactivated students in chunks.
+"""
+
+from attendance.models import Student, BRANCH_CHOICES, YEAR_CHOICES
+from attendance.purge import DEFAULT_CHUNK_SIZE, purge_students
+from attendance.tenancy import TenantCommand
+
+
+class Command(TenantCommand):
+    help = (
+        'Delete inactive students, their attendance and their user accounts in '
+        'bounded chunks. Safe to interrupt and re-run.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--branch', choices=[code for code, _ in BRANCH_CHOICES])
+        parser.add_argument('--year', type=int, choices=[year for year, _ in YEAR_CHOICES])
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help='Maximum attendance rows deleted per transaction.',
+        )
+
+    def handle(self, *args, **options):
+        students = Student.objects.filter(is_active=False)
+        if options['branch']:
+            students = students.filter(branch=options['branch'])
+        if options['year']:
+            students = students.filter(year=options['year'])
+
+        purged, rows = purge_students(
+            students,
+            chunk_size=options['chunk_size'],
+            progress=self.stdout.write,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Purged {purged} students and {rows} attendance records.'
+        ))
@@ -0,0 +1,25 @@
+"""
+Management command to rebuild the student and schedule search index.
+"""
+
+from django.db import transaction
+
+from attendance import search
+from attendance.tenancy import TenantCommand, current_database
+
+
+class Command(TenantCommand):
+    help = 'Rebuild the full-text search index for students and schedules.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic(using=current_database()):
+            counts = search.rebuild_index()
+
+        if counts is None:
+            self.stdout.write('Search uses database trigram indexes on this backend; nothing to rebuild.')
+            return
+
+        students, schedules = counts
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {students} students and {schedules} schedules.'
+        ))
@@ -0,0 +1,53 @@
+"""
+Management command that regenerates student photo thumbnails and the
+per-cohort sprite sheets of the roll-call page.
+"""
+
+from django.conf import settings
+
+from attendance import photos
+from attendance.cache import get_cohort_roster
+from attendance.models import Student, CohortPhotoSheet, BRANCH_CHOICES, YEAR_CHOICES
+from attendance.tenancy import TenantCommand
+
+
+class Command(TenantCommand):
+    help = (
+        'Generate missing photo thumbnails in a process pool, then bring every '
+        'cohort sprite sheet up to date.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=max(settings.PHOTO_WORKERS, 1),
+            help='Processes generating thumbnails.',
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Regenerate every thumbnail and rebuild every sheet from scratch.',
+        )
+
+    def handle(self, *args, **options):
+        photo_names = [
+            name for name in
+            Student.objects.filter(is_active=True).exclude(photo='').values_list('photo', flat=True)
+            if options['all'] or not photos.thumbnails_ready(name)
+        ]
+        failed = photos.build_thumbnails(photo_names, options['workers']) if photo_names else []
+        self.stdout.write(f'Generated thumbnails of {len(photo_names) - len(failed)} photos.')
+        for name in failed:
+            self.stderr.write(f'Could not read {name}')
+
+        for branch, _ in BRANCH_CHOICES:
+            for year, _ in YEAR_CHOICES:
+                roster = get_cohort_roster(branch, year)
+                has_sheet = CohortPhotoSheet.objects.filter(branch=branch, year=year).exists()
+                if not has_sheet and not any(student.photo for student in roster):
+                    continue
+                sheet = photos.update_cohort_sheet(branch, year, roster, rebuild=options['all'])
+                if sheet.tiles:
+                    self.stdout.write(f'{branch} Year {year}: {len(sheet.tiles)} photos')
+        self.stdout.write(self.style.SUCCESS('Sprite sheets are up to date.'))
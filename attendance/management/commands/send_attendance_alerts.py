@@ -0,0 +1,22 @@
+"""
+Management command that emails low-attendance alert digests.
+"""
+
+from attendance.alerts import run_alerts, ATTENDANCE_THRESHOLD
+from attendance.tenancy import TenantCommand
+
+
+class Command(TenantCommand):
+    help = (
+        f'Email students and their faculty when attendance drops below {ATTENDANCE_THRESHOLD}%. '
+        'Only students whose attendance changed since the last run are checked.'
+    )
+
+    def handle(self, *args, **options):
+        result = run_alerts()
+        self.stdout.write(
+            f"Opened {result['opened']} alerts, resolved {result['resolved']}."
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Notified {result['notified']} alerts in {result['emails']} emails."
+        ))
@@ -0,0 +1,42 @@
+"""
+Management command that refreshes SQLite read replicas from the primary.
+A copy-based stand-in for real replication when running locally.
+"""
+
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from attendance.routers import PRIMARY_DB, get_replicas
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database into every configured read replica.'
+
+    def handle(self, *args, **options):
+        replicas = get_replicas()
+        if not replicas:
+            raise CommandError('No read replicas configured in DATABASE_REPLICAS.')
+
+        primary = settings.DATABASES[PRIMARY_DB]
+        if primary['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('sync_replicas only supports SQLite databases.')
+
+        source = sqlite3.connect(str(primary['NAME']))
+        try:
+            for alias in replicas:
+                target_settings = settings.DATABASES[alias]
+                if target_settings['ENGINE'] != 'django.db.backends.sqlite3':
+                    raise CommandError(f'Replica "{alias}" is not a SQLite database.')
+
+                # The online backup API gives a consistent snapshot while
+                # the primary keeps accepting writes
+                target = sqlite3.connect(str(target_settings['NAME']))
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(self.style.SUCCESS(f'Replica "{alias}" synced.'))
+        finally:
+            source.close()
@@ -0,0 +1,61 @@
+from django.db import migrations
+
+# FTS5 mirror tables on SQLite, trigram GIN indexes on PostgreSQL.
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS attendance_student_fts "
+    "USING fts5(hall_ticket_id, name, username, prefix='2 3')",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS attendance_schedule_fts "
+    "USING fts5(subject, topic, faculty_name, prefix='2 3')",
+    "INSERT INTO attendance_student_fts (rowid, hall_ticket_id, name, username) "
+    "SELECT s.id, s.hall_ticket_id, s.name, u.username "
+    "FROM attendance_student s JOIN auth_user u ON u.id = s.user_id",
+    "INSERT INTO attendance_schedule_fts (rowid, subject, topic, faculty_name) "
+    "SELECT sc.id, sc.subject, sc.topic, f.name "
+    "FROM attendance_schedule sc JOIN attendance_faculty f ON f.id = sc.faculty_id",
+]
+SQLITE_BACKWARD = [
+    'DROP TABLE IF EXISTS attendance_student_fts',
+    'DROP TABLE IF EXISTS attendance_schedule_fts',
+]
+
+# Django's icontains/istartswith compile to UPPER(col::text) LIKE UPPER(%s)
+POSTGRES_TRIGRAM_COLUMNS = [
+    ('attendance_student', 'hall_ticket_id'),
+    ('attendance_student', 'name'),
+    ('auth_user', 'username'),
+    ('attendance_schedule', 'subject'),
+    ('attendance_schedule', 'topic'),
+    ('attendance_faculty', 'name'),
+]
+POSTGRES_FORWARD = ['CREATE EXTENSION IF NOT EXISTS pg_trgm'] + [
+    f'CREATE INDEX IF NOT EXISTS {table}_{column}_trgm '
+    f'ON {table} USING gin (UPPER({column}::text) gin_trgm_ops)'
+    for table, column in POSTGRES_TRIGRAM_COLUMNS
+]
+POSTGRES_BACKWARD = [
+    f'DROP INDEX IF EXISTS {table}_{column}_trgm'
+    for table, column in POSTGRES_TRIGRAM_COLUMNS
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        statements = statements_by_vendor.get(schema_editor.connection.vendor, [])
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('attendance', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD}),
+            _run({'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRES_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2 on 2026-10-19 06:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0002_search_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='attendance',
+            name='attendance__student_09e99a_idx',
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['student', 'schedule', 'status'], name='attendance__student_d2c506_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['schedule', 'status'], name='attendance__schedul_80cfc6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['branch', 'year', 'hall_ticket_id'], name='attendance__branch_fdcd2b_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2 on 2026-10-19 06:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0003_query_plan_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CohortRoster',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('branch', models.CharField(choices=[('CSE', 'Computer Science & Engineering'), ('ECE', 'Electronics & Communication Engineering'), ('IT', 'Information Technology'), ('ME', 'Mechanical Engineering'), ('CE', 'Civil Engineering')], max_length=10)),
+                ('year', models.IntegerField(choices=[(1, '1st Year'), (2, '2nd Year'), (3, '3rd Year'), (4, '4th Year')])),
+                ('student_ids', models.BinaryField()),
+                ('size', models.PositiveIntegerField()),
+                ('digest', models.CharField(max_length=40, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Cohort Roster',
+                'verbose_name_plural': 'Cohort Rosters',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='AttendanceBitmap',
+            fields=[
+                ('schedule', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='bitmap', serialize=False, to='attendance.schedule')),
+                ('marked', models.BinaryField()),
+                ('present', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('roster', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='bitmaps', to='attendance.cohortroster')),
+            ],
+            options={
+                'verbose_name': 'Attendance Bitmap',
+                'verbose_name_plural': 'Attendance Bitmaps',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 06:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0004_attendance_bitmap'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='is_active',
+            field=models.BooleanField(default=True),
+        ),
+    ]
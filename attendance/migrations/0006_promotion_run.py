@@ -0,0 +1,29 @@
+# Generated by Django 4.2 on 2026-10-19 06:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0005_student_is_active'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PromotionRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('promoted_student_ids', models.JSONField(default=list)),
+                ('graduated_student_ids', models.JSONField(default=list)),
+                ('faculty_changes', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('rolled_back_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Promotion Run',
+                'verbose_name_plural': 'Promotion Runs',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
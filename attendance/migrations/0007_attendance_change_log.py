@@ -0,0 +1,66 @@
+# Generated by Django 4.2 on 2026-10-19 06:49
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('attendance', '0006_promotion_run'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceChangeSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('change_count', models.PositiveIntegerField()),
+                ('first_status', models.CharField(blank=True, choices=[('P', 'Present'), ('A', 'Absent')], max_length=1)),
+                ('final_status', models.CharField(choices=[('P', 'Present'), ('A', 'Absent')], max_length=1)),
+                ('schedule', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_change_summaries', to='attendance.schedule')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_change_summaries', to='attendance.student')),
+            ],
+            options={
+                'verbose_name': 'Attendance Change Summary',
+                'verbose_name_plural': 'Attendance Change Summaries',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='AttendanceChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('old_status', models.CharField(blank=True, choices=[('P', 'Present'), ('A', 'Absent')], max_length=1)),
+                ('new_status', models.CharField(choices=[('P', 'Present'), ('A', 'Absent')], max_length=1)),
+                ('changed_at', models.DateTimeField(db_index=True)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='attendance_changes', to=settings.AUTH_USER_MODEL)),
+                ('schedule', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_changes', to='attendance.schedule')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_changes', to='attendance.student')),
+            ],
+            options={
+                'verbose_name': 'Attendance Change',
+                'verbose_name_plural': 'Attendance Changes',
+                'ordering': ['-changed_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='attendancechangesummary',
+            index=models.Index(fields=['schedule', '-date'], name='attendance__schedul_d930c4_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='attendancechangesummary',
+            unique_together={('student', 'schedule', 'date')},
+        ),
+        migrations.AddIndex(
+            model_name='attendancechange',
+            index=models.Index(fields=['student', '-changed_at'], name='attendance__student_a6c0b5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendancechange',
+            index=models.Index(fields=['schedule', '-changed_at'], name='attendance__schedul_d4cb66_idx'),
+        ),
+    ]
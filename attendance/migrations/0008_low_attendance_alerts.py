@@ -0,0 +1,61 @@
+# Generated by Django 4.2 on 2026-10-19 06:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0007_attendance_change_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlertCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('high_water_mark', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Alert Checkpoint',
+                'verbose_name_plural': 'Alert Checkpoints',
+            },
+        ),
+        migrations.CreateModel(
+            name='LowAttendanceAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attended_classes', models.PositiveIntegerField()),
+                ('total_classes', models.PositiveIntegerField()),
+                ('percentage', models.FloatField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('notified_at', models.DateTimeField(blank=True, null=True)),
+                ('resolved_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Low Attendance Alert',
+                'verbose_name_plural': 'Low Attendance Alerts',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['updated_at', 'student'], name='attendance__updated_8d0a90_idx'),
+        ),
+        migrations.AddField(
+            model_name='lowattendancealert',
+            name='student',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='low_attendance_alerts', to='attendance.student'),
+        ),
+        migrations.AddIndex(
+            model_name='lowattendancealert',
+            index=models.Index(fields=['student', 'resolved_at'], name='attendance__student_afef65_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lowattendancealert',
+            index=models.Index(fields=['notified_at'], name='attendance__notifie_61ba61_idx'),
+        ),
+    ]
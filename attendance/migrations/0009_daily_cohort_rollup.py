@@ -0,0 +1,44 @@
+# Generated by Django 4.2 on 2026-10-19 06:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0008_low_attendance_alerts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyCohortRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('branch', models.CharField(choices=[('CSE', 'Computer Science & Engineering'), ('ECE', 'Electronics & Communication Engineering'), ('IT', 'Information Technology'), ('ME', 'Mechanical Engineering'), ('CE', 'Civil Engineering')], max_length=10)),
+                ('year', models.IntegerField(choices=[(1, '1st Year'), (2, '2nd Year'), (3, '3rd Year'), (4, '4th Year')])),
+                ('date', models.DateField()),
+                ('present', models.PositiveIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('faculty', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='attendance.faculty')),
+            ],
+            options={
+                'verbose_name': 'Daily Cohort Rollup',
+                'verbose_name_plural': 'Daily Cohort Rollups',
+                'ordering': ['date'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='dailycohortrollup',
+            index=models.Index(fields=['branch', 'year', 'date'], name='attendance__branch_2d3825_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dailycohortrollup',
+            index=models.Index(fields=['faculty', 'date'], name='attendance__faculty_a312b6_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='dailycohortrollup',
+            unique_together={('branch', 'year', 'faculty', 'date')},
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2 on 2026-10-19 06:58
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('attendance', '0009_daily_cohort_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CheckInWindow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('secret', models.CharField(max_length=64)),
+                ('opened_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField()),
+                ('closed_at', models.DateTimeField(blank=True, null=True)),
+                ('opened_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='checkin_windows', to=settings.AUTH_USER_MODEL)),
+                ('schedule', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checkin_windows', to='attendance.schedule')),
+            ],
+            options={
+                'verbose_name': 'Check-in Window',
+                'verbose_name_plural': 'Check-in Windows',
+                'ordering': ['-opened_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='checkinwindow',
+            index=models.Index(fields=['schedule', 'closed_at'], name='attendance__schedul_29e1e9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='checkinwindow',
+            index=models.Index(fields=['closed_at', 'expires_at'], name='attendance__closed__d2d3cd_idx'),
+        ),
+    ]
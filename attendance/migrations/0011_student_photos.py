@@ -0,0 +1,36 @@
+# Generated by Django 4.2 on 2026-10-19 07:05
+
+import attendance.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0010_checkin_window'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='photo',
+            field=models.ImageField(blank=True, upload_to=attendance.models.student_photo_path),
+        ),
+        migrations.CreateModel(
+            name='CohortPhotoSheet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('branch', models.CharField(choices=[('CSE', 'Computer Science & Engineering'), ('ECE', 'Electronics & Communication Engineering'), ('IT', 'Information Technology'), ('ME', 'Mechanical Engineering'), ('CE', 'Civil Engineering')], max_length=10)),
+                ('year', models.IntegerField(choices=[(1, '1st Year'), (2, '2nd Year'), (3, '3rd Year'), (4, '4th Year')])),
+                ('version', models.CharField(blank=True, max_length=12)),
+                ('tiles', models.JSONField(default=dict)),
+                ('slot_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Cohort Photo Sheet',
+                'verbose_name_plural': 'Cohort Photo Sheets',
+                'unique_together': {('branch', 'year')},
+            },
+        ),
+    ]
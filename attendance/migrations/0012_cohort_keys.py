@@ -0,0 +1,74 @@
+# Generated by Django 4.2 on 2026-10-19 07:41
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+
+def backfill_cohort_keys(apps, schema_editor):
+    """Copy each class's cohort from its faculty, then each record's from its class."""
+    Faculty = apps.get_model('attendance', 'Faculty')
+    Schedule = apps.get_model('attendance', 'Schedule')
+    Attendance = apps.get_model('attendance', 'Attendance')
+    db_alias = schema_editor.connection.alias
+
+    faculty = Faculty.objects.using(db_alias).filter(pk=OuterRef('faculty_id'))
+    Schedule.objects.using(db_alias).update(
+        branch=Subquery(faculty.values('branch')),
+        year=Subquery(faculty.values('year')),
+    )
+    schedule = Schedule.objects.using(db_alias).filter(pk=OuterRef('schedule_id'))
+    Attendance.objects.using(db_alias).update(
+        faculty_id=Subquery(schedule.values('faculty_id')),
+        branch=Subquery(schedule.values('branch')),
+        year=Subquery(schedule.values('year')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0011_student_photos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendance',
+            name='branch',
+            field=models.CharField(choices=[('CSE', 'Computer Science & Engineering'), ('ECE', 'Electronics & Communication Engineering'), ('IT', 'Information Technology'), ('ME', 'Mechanical Engineering'), ('CE', 'Civil Engineering')], editable=False, max_length=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='attendance',
+            name='faculty',
+            field=models.ForeignKey(db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='attendances', to='attendance.faculty'),
+        ),
+        migrations.AddField(
+            model_name='attendance',
+            name='year',
+            field=models.IntegerField(choices=[(1, '1st Year'), (2, '2nd Year'), (3, '3rd Year'), (4, '4th Year')], editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='schedule',
+            name='branch',
+            field=models.CharField(choices=[('CSE', 'Computer Science & Engineering'), ('ECE', 'Electronics & Communication Engineering'), ('IT', 'Information Technology'), ('ME', 'Mechanical Engineering'), ('CE', 'Civil Engineering')], editable=False, max_length=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='schedule',
+            name='year',
+            field=models.IntegerField(choices=[(1, '1st Year'), (2, '2nd Year'), (3, '3rd Year'), (4, '4th Year')], editable=False, null=True),
+        ),
+        # Indexes are built after the backfill rather than updated row by row
+        migrations.RunPython(backfill_cohort_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['faculty', 'student', 'status'], name='attendance__faculty_b8d1df_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['branch', 'year', 'student', 'schedule', 'status'], name='attendance__branch_7fa013_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(fields=['branch', 'year', 'date'], name='attendance__branch_f73f8d_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.2 on 2026-10-19 08:08
+
+import sys
+from array import array
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def index_roster_members(apps, schema_editor):
+    """Record every student's position in the rosters frozen so far."""
+    CohortRoster = apps.get_model('attendance', 'CohortRoster')
+    CohortRosterMember = apps.get_model('attendance', 'CohortRosterMember')
+    db_alias = schema_editor.connection.alias
+    rosters = CohortRoster.objects.using(db_alias).values_list('id', 'student_ids')
+    for roster_id, packed in rosters.iterator():
+        student_ids = array('Q')
+        student_ids.frombytes(bytes(packed))
+        if sys.byteorder == 'big':
+            student_ids.byteswap()
+        CohortRosterMember.objects.using(db_alias).bulk_create([
+            CohortRosterMember(roster_id=roster_id, student_id=student_id, position=position)
+            for position, student_id in enumerate(student_ids)
+        ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0012_cohort_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CohortRosterMember',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('student_id', models.BigIntegerField()),
+                ('position', models.PositiveIntegerField()),
+                ('roster', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='members', to='attendance.cohortroster')),
+            ],
+            options={
+                'verbose_name': 'Cohort Roster Member',
+                'verbose_name_plural': 'Cohort Roster Members',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='cohortrostermember',
+            index=models.Index(fields=['student_id', 'roster', 'position'], name='attendance__student_2b8785_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='cohortrostermember',
+            unique_together={('roster', 'student_id')},
+        ),
+        migrations.RunPython(index_roster_members, migrations.RunPython.noop),
+    ]
@@ -4,10 +4,18 @@ This module contains all database models for managing students, faculty,
 schedules, and attendance records.
 """
 
+import os
+import secrets
+
 from django.db import models
+from django.db.models import Count, Exists, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
 from django.contrib.auth.models import User
+from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 
+from .querycache import CachingQuerySet
+
 # Choice tuples for branches and years
 BRANCH_CHOICES = [
     ('CSE', 'Computer Science & Engineering'),
@@ -30,6 +38,15 @@ ATTENDANCE_STATUS_CHOICES = [
 ]
 
 
+def student_photo_path(instance, filename):
+    """
+    Upload path of a student photo. The random suffix gives every upload new
+    file names, so its thumbnails can be cached by browsers indefinitely.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    return f'photos/originals/{instance.hall_ticket_id}-{secrets.token_hex(4)}{extension}'
+
+
 class Student(models.Model):
     """
     Student model linked to Django's User model.
@@ -40,13 +57,21 @@ class Student(models.Model):
     name = models.CharField(max_length=100)
     branch = models.CharField(max_length=10, choices=BRANCH_CHOICES)
     year = models.IntegerField(choices=YEAR_CHOICES)
+    is_active = models.BooleanField(default=True)  # False once graduated or removed
+    photo = models.ImageField(upload_to=student_photo_path, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CachingQuerySet.as_manager()
+
     class Meta:
         ordering = ['hall_ticket_id']
         verbose_name = 'Student'
         verbose_name_plural = 'Students'
+        indexes = [
+            # Cohort rosters: filter by branch and year, ordered by hall ticket
+            models.Index(fields=['branch', 'year', 'hall_ticket_id']),
+        ]
 
     def __str__(self):
         """Return a string representation of the student."""
@@ -66,6 +91,8 @@ class Faculty(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CachingQuerySet.as_manager()
+
     class Meta:
         ordering = ['name']
         verbose_name = 'Faculty'
@@ -76,22 +103,74 @@ class Faculty(models.Model):
         return f"{self.name} - {self.subject}"
 
 
+class ScheduleQuerySet(CachingQuerySet):
+    """QuerySet with attendance marking completeness helpers."""
+
+    def with_marking_counts(self):
+        """
+        Annotate each schedule with present, absent and unmarked counts in
+        the same query. Counts come from the (schedule, status) index and the
+        cohort size from the (branch, year, hall_ticket_id) index.
+        """
+        cohort_size = Student.objects.filter(
+            branch=OuterRef('branch'),
+            year=OuterRef('year'),
+            is_active=True,
+        ).order_by().values('branch').annotate(total=Count('pk')).values('total')
+
+        return self.annotate(
+            cohort_size=Coalesce(Subquery(cohort_size), Value(0)),
+            present_count=Count('attendances', filter=Q(attendances__status='P')),
+            absent_count=Count('attendances', filter=Q(attendances__status='A')),
+        ).annotate(
+            unmarked_count=Greatest(
+                F('cohort_size') - F('present_count') - F('absent_count'),
+                Value(0),
+            ),
+        )
+
+    def incomplete(self):
+        """
+        Schedules where at least one active student in the cohort is
+        unmarked. Each schedule is checked with a NOT EXISTS probe of the
+        (student, schedule) index that stops at the first unmarked student,
+        so no attendance is counted; add with_marking_counts() for counts.
+        """
+        unmarked = Student.objects.filter(
+            branch=OuterRef('branch'),
+            year=OuterRef('year'),
+            is_active=True,
+        ).exclude(
+            Exists(Attendance.objects.filter(schedule=OuterRef(OuterRef('pk')), student=OuterRef('pk')))
+        )
+        return self.filter(Exists(unmarked))
+
+
 class Schedule(models.Model):
     """
     Schedule model for storing class schedules.
     Links faculty, date, subject, and topic information.
+    branch and year copy the faculty's cohort when the class is created,
+    so cohort queries need no join to Faculty.
     """
     faculty = models.ForeignKey(Faculty, on_delete=models.CASCADE, related_name='schedules')
     date = models.DateField(db_index=True)
     subject = models.CharField(max_length=100)
     topic = models.CharField(max_length=200)
+    branch = models.CharField(max_length=10, choices=BRANCH_CHOICES, null=True, editable=False)
+    year = models.IntegerField(choices=YEAR_CHOICES, null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = ScheduleQuerySet.as_manager()
+
     class Meta:
         ordering = ['-date']
         unique_together = ('faculty', 'date')  # No duplicate classes for same faculty on same day
         verbose_name = 'Schedule'
         verbose_name_plural = 'Schedules'
+        indexes = [
+            models.Index(fields=['branch', 'year', 'date']),
+        ]
 
     def __str__(self):
         """Return a string representation of the schedule."""
@@ -102,23 +181,316 @@ class Attendance(models.Model):
     """
     Attendance model for recording student attendance.
     Links student and schedule records with attendance status.
+    faculty, branch and year copy the schedule's, so per-faculty and
+    per-cohort counts are read from this table's indexes alone.
     """
     student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='attendances')
     schedule = models.ForeignKey(Schedule, on_delete=models.CASCADE, related_name='attendances')
     status = models.CharField(max_length=1, choices=ATTENDANCE_STATUS_CHOICES, default='A')
+    faculty = models.ForeignKey(
+        Faculty, on_delete=models.CASCADE, related_name='attendances',
+        null=True, editable=False, db_index=False,
+    )
+    branch = models.CharField(max_length=10, choices=BRANCH_CHOICES, null=True, editable=False)
+    year = models.IntegerField(choices=YEAR_CHOICES, null=True, editable=False)
     marked_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CachingQuerySet.as_manager()
+
     class Meta:
         unique_together = ('student', 'schedule')  # One attendance record per student per class
         ordering = ['-marked_at']
         verbose_name = 'Attendance'
         verbose_name_plural = 'Attendance Records'
         indexes = [
-            models.Index(fields=['student', 'schedule']),
+            # Covering indexes: counts by status are answered from the index alone
+            models.Index(fields=['student', 'schedule', 'status']),
+            models.Index(fields=['schedule', 'status']),
             models.Index(fields=['student', '-marked_at']),
+            # Alert runs look up the students changed since a high-water mark
+            models.Index(fields=['updated_at', 'student']),
+            # Per-student counts of a faculty's or a cohort's classes, without joins
+            models.Index(fields=['faculty', 'student', 'status']),
+            models.Index(fields=['branch', 'year', 'student', 'schedule', 'status']),
         ]
 
     def __str__(self):
         """Return a string representation of the attendance record."""
         return f"{self.student.hall_ticket_id} - {self.schedule.date} - {self.get_status_display()}"
+
+
+class AttendanceChange(models.Model):
+    """
+    Append-only log of attendance status changes.
+    old_status is empty when the student was first marked.
+    """
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='attendance_changes')
+    schedule = models.ForeignKey(Schedule, on_delete=models.CASCADE, related_name='attendance_changes')
+    old_status = models.CharField(max_length=1, choices=ATTENDANCE_STATUS_CHOICES, blank=True)
+    new_status = models.CharField(max_length=1, choices=ATTENDANCE_STATUS_CHOICES)
+    actor = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='attendance_changes'
+    )
+    changed_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        ordering = ['-changed_at']
+        verbose_name = 'Attendance Change'
+        verbose_name_plural = 'Attendance Changes'
+        indexes = [
+            models.Index(fields=['student', '-changed_at']),
+            models.Index(fields=['schedule', '-changed_at']),
+        ]
+
+    def __str__(self):
+        """Return a string representation of the change."""
+        return f"{self.student_id} @ {self.schedule_id}: {self.old_status or '-'} -> {self.new_status}"
+
+
+class AttendanceChangeSummary(models.Model):
+    """
+    Daily roll-up of compacted AttendanceChange entries for one student
+    and schedule.
+    """
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='attendance_change_summaries')
+    schedule = models.ForeignKey(Schedule, on_delete=models.CASCADE, related_name='attendance_change_summaries')
+    date = models.DateField()
+    change_count = models.PositiveIntegerField()
+    first_status = models.CharField(max_length=1, choices=ATTENDANCE_STATUS_CHOICES, blank=True)
+    final_status = models.CharField(max_length=1, choices=ATTENDANCE_STATUS_CHOICES)
+
+    class Meta:
+        ordering = ['-date']
+        unique_together = ('student', 'schedule', 'date')
+        verbose_name = 'Attendance Change Summary'
+        verbose_name_plural = 'Attendance Change Summaries'
+        indexes = [
+            models.Index(fields=['schedule', '-date']),
+        ]
+
+    def __str__(self):
+        """Return a string representation of the summary."""
+        return f"{self.student_id} @ {self.schedule_id} on {self.date}: {self.change_count} changes"
+
+
+class CohortRoster(models.Model):
+    """
+    Frozen, ordered snapshot of the students in a cohort.
+    Bit positions in AttendanceBitmap refer to positions in this roster,
+    so a roster is never modified once created; identical rosters are shared.
+    """
+    branch = models.CharField(max_length=10, choices=BRANCH_CHOICES)
+    year = models.IntegerField(choices=YEAR_CHOICES)
+    student_ids = models.BinaryField()
+    size = models.PositiveIntegerField()
+    digest = models.CharField(max_length=40, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Cohort Roster'
+        verbose_name_plural = 'Cohort Rosters'
+
+    def __str__(self):
+        """Return a string representation of the roster."""
+        return f"{self.branch} Year {self.year} ({self.size} students)"
+
+
+class CohortRosterMember(models.Model):
+    """
+    One student's bit position in a frozen roster, so a student's rosters
+    are found by index instead of unpacking every roster.
+    student_id is a plain id, like the packed ids of the roster.
+    """
+    roster = models.ForeignKey(CohortRoster, on_delete=models.CASCADE, related_name='members')
+    student_id = models.BigIntegerField()
+    position = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ('roster', 'student_id')
+        verbose_name = 'Cohort Roster Member'
+        verbose_name_plural = 'Cohort Roster Members'
+        indexes = [
+            # A student's rosters with their positions, from the index alone
+            models.Index(fields=['student_id', 'roster', 'position']),
+        ]
+
+    def __str__(self):
+        """Return a string representation of the membership."""
+        return f"Student {self.student_id} at {self.position} in roster {self.roster_id}"
+
+
+class AttendanceBitmap(models.Model):
+    """
+    Compact attendance storage: one row per schedule.
+    Bit i of `marked` says whether roster student i was marked, and bit i of
+    `present` whether they were present.
+    """
+    schedule = models.OneToOneField(
+        Schedule, on_delete=models.CASCADE, primary_key=True, related_name='bitmap'
+    )
+    roster = models.ForeignKey(CohortRoster, on_delete=models.PROTECT, related_name='bitmaps')
+    marked = models.BinaryField()
+    present = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Attendance Bitmap'
+        verbose_name_plural = 'Attendance Bitmaps'
+
+    def __str__(self):
+        """Return a string representation of the bitmap."""
+        return f"Bitmap for schedule {self.schedule_id}"
+
+
+class PromotionRun(models.Model):
+    """
+    Record of one year-end batch promotion.
+    Keeps the affected ids so the promotion can be rolled back.
+    """
+    promoted_student_ids = models.JSONField(default=list)
+    graduated_student_ids = models.JSONField(default=list)
+    faculty_changes = models.JSONField(default=list)  # [faculty_id, old_year, new_year]
+    created_at = models.DateTimeField(auto_now_add=True)
+    rolled_back_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Promotion Run'
+        verbose_name_plural = 'Promotion Runs'
+
+    def __str__(self):
+        """Return a string representation of the promotion run."""
+        return f"Promotion on {self.created_at:%Y-%m-%d}"
+
+
+class AlertCheckpoint(models.Model):
+    """
+    High-water mark of an incremental job: the latest Attendance.updated_at
+    the job has already processed.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    high_water_mark = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Alert Checkpoint'
+        verbose_name_plural = 'Alert Checkpoints'
+
+    def __str__(self):
+        """Return a string representation of the checkpoint."""
+        return f"{self.name} @ {self.high_water_mark}"
+
+
+class LowAttendanceAlert(models.Model):
+    """
+    A student's attendance dropping below the threshold.
+    The alert stays open until the student climbs back above it;
+    notified_at is set once the digest emails have been sent.
+    """
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='low_attendance_alerts')
+    attended_classes = models.PositiveIntegerField()
+    total_classes = models.PositiveIntegerField()
+    percentage = models.FloatField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    notified_at = models.DateTimeField(null=True, blank=True)
+    resolved_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Low Attendance Alert'
+        verbose_name_plural = 'Low Attendance Alerts'
+        indexes = [
+            models.Index(fields=['student', 'resolved_at']),
+            models.Index(fields=['notified_at']),
+        ]
+
+    def __str__(self):
+        """Return a string representation of the alert."""
+        return f"{self.student.hall_ticket_id} at {self.percentage}%"
+
+
+class DailyCohortRollup(models.Model):
+    """
+    Present and total attendance counts of one faculty member's class for a
+    cohort on one day. Refreshed whenever the class is marked, so calendar
+    and trend queries never touch the Attendance table.
+    """
+    branch = models.CharField(max_length=10, choices=BRANCH_CHOICES)
+    year = models.IntegerField(choices=YEAR_CHOICES)
+    faculty = models.ForeignKey(Faculty, on_delete=models.CASCADE, related_name='daily_rollups')
+    date = models.DateField()
+    present = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['date']
+        unique_together = ('branch', 'year', 'faculty', 'date')
+        verbose_name = 'Daily Cohort Rollup'
+        verbose_name_plural = 'Daily Cohort Rollups'
+        indexes = [
+            models.Index(fields=['branch', 'year', 'date']),
+            models.Index(fields=['faculty', 'date']),
+        ]
+
+    def __str__(self):
+        """Return a string representation of the rollup."""
+        return f"{self.branch} Year {self.year} - {self.date}: {self.present}/{self.total}"
+
+
+class CheckInWindow(models.Model):
+    """
+    Short-lived window in which students check themselves in to a class
+    with a rotating code derived from `secret`.
+    """
+    schedule = models.ForeignKey(Schedule, on_delete=models.CASCADE, related_name='checkin_windows')
+    secret = models.CharField(max_length=64)
+    opened_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='checkin_windows'
+    )
+    opened_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+    closed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-opened_at']
+        verbose_name = 'Check-in Window'
+        verbose_name_plural = 'Check-in Windows'
+        indexes = [
+            models.Index(fields=['schedule', 'closed_at']),
+            models.Index(fields=['closed_at', 'expires_at']),
+        ]
+
+    def __str__(self):
+        """Return a string representation of the window."""
+        return f"Check-in for {self.schedule} until {self.expires_at:%H:%M}"
+
+    @property
+    def is_open(self):
+        """Whether students can still check in."""
+        return self.closed_at is None and self.expires_at > timezone.now()
+
+
+class CohortPhotoSheet(models.Model):
+    """
+    Sprite sheet holding the photo thumbnails of a whole cohort, so the
+    roll-call page loads one image. `tiles` maps student ids to their slot
+    and the photo painted there; `version` names the current files.
+    """
+    branch = models.CharField(max_length=10, choices=BRANCH_CHOICES)
+    year = models.IntegerField(choices=YEAR_CHOICES)
+    version = models.CharField(max_length=12, blank=True)
+    tiles = models.JSONField(default=dict)
+    slot_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('branch', 'year')
+        verbose_name = 'Cohort Photo Sheet'
+        verbose_name_plural = 'Cohort Photo Sheets'
+
+    def __str__(self):
+        """Return a string representation of the sheet."""
+        return f"{self.branch} Year {self.year} - {len(self.tiles)} photos"
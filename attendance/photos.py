@@ -0,0 +1,297 @@
+"""
+Student photos, their thumbnails and per-cohort sprite sheets.
+
+An uploaded photo is stored unchanged. Once the upload commits, a process
+pool resizes it into square WebP and JPEG thumbnails off the request path
+(attendance.thumbnails). File names carry the upload's random stem, so a
+new photo gets new URLs.
+
+The roll-call page shows a whole cohort from one sprite sheet and a
+generated stylesheet of tile offsets. The sheet records which photo sits
+in each slot. When photos change, only their slots are repainted onto the
+lossless master copy, and the sheet is re-encoded under a new version.
+"""
+
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.db import transaction
+
+from . import thumbnails
+from .models import CohortPhotoSheet
+from .tenancy import current_database
+
+logger = logging.getLogger('attendance.photos')
+
+PHOTO_DIR = 'photos'
+
+# Thumbnail edge lengths in pixels. The roll-call tile is written last, so
+# its JPEG existing means all thumbnails of a photo are ready.
+PROFILE_SIZE = 256
+TILE_SIZE = 64
+THUMBNAIL_SIZES = (PROFILE_SIZE, TILE_SIZE)
+
+SHEET_COLUMNS = 20
+
+_executor = None
+
+
+# ============================================================================
+# FILE LAYOUT
+# ============================================================================
+
+def _media_path(name):
+    return os.path.join(settings.MEDIA_ROOT, name)
+
+
+def _photo_stem(photo_name):
+    return os.path.splitext(os.path.basename(photo_name))[0]
+
+
+def _thumbnail_stem(photo_name, size):
+    return f'{PHOTO_DIR}/thumbs/{size}/{_photo_stem(photo_name)}'
+
+
+def _sheet_stem(sheet):
+    return f'{PHOTO_DIR}/sheets/{sheet.branch}-{sheet.year}-{sheet.version}'
+
+
+def thumbnails_ready(photo_name):
+    """Whether every thumbnail of a stored photo has been written."""
+    return os.path.exists(_media_path(f'{_thumbnail_stem(photo_name, TILE_SIZE)}.jpg'))
+
+
+def thumbnail_urls(student, size=PROFILE_SIZE):
+    """{'webp': url, 'jpg': url} of a student's thumbnail, or None until it is ready."""
+    if not student.photo or not thumbnails_ready(student.photo.name):
+        return None
+    stem = settings.MEDIA_URL + _thumbnail_stem(student.photo.name, size)
+    return {extension: f'{stem}.{extension}' for extension, _, _ in thumbnails.ENCODINGS}
+
+
+def sheet_stylesheet_url(sheet):
+    """URL of the stylesheet placing each student's tile of a sheet."""
+    return f'{settings.MEDIA_URL}{_sheet_stem(sheet)}.css'
+
+
+def _remove(names):
+    for name in names:
+        try:
+            os.remove(_media_path(name))
+        except FileNotFoundError:
+            pass
+
+
+def delete_photo_files(photo_name):
+    """Remove a stored photo and its thumbnails."""
+    _remove([photo_name] + [
+        f'{_thumbnail_stem(photo_name, size)}.{extension}'
+        for size in THUMBNAIL_SIZES for extension, _, _ in thumbnails.ENCODINGS
+    ])
+
+
+# ============================================================================
+# THUMBNAILS
+# ============================================================================
+
+def _thumbnail_job(photo_name):
+    """Arguments of thumbnails.make_thumbnails() for a stored photo."""
+    return _media_path(photo_name), [
+        (size, _media_path(_thumbnail_stem(photo_name, size))) for size in THUMBNAIL_SIZES
+    ]
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        # Spawned workers only import attendance.thumbnails, never Django
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.PHOTO_WORKERS, mp_context=multiprocessing.get_context('spawn')
+        )
+    return _executor
+
+
+def _log_failure(photo_name):
+    def callback(future):
+        if future.exception() is not None:
+            logger.error('Thumbnails of %s failed: %s', photo_name, future.exception())
+    return callback
+
+
+def queue_thumbnails(photo_name):
+    """
+    Generate a photo's thumbnails in the background process pool, or right
+    away when PHOTO_WORKERS is 0.
+    """
+    global _executor
+    if not settings.PHOTO_WORKERS:
+        thumbnails.make_thumbnails(*_thumbnail_job(photo_name))
+        return
+    try:
+        future = _get_executor().submit(thumbnails.make_thumbnails, *_thumbnail_job(photo_name))
+    except BrokenProcessPool:
+        # A worker died; start a fresh pool for this and later photos
+        _executor = None
+        future = _get_executor().submit(thumbnails.make_thumbnails, *_thumbnail_job(photo_name))
+    future.add_done_callback(_log_failure(photo_name))
+
+
+def build_thumbnails(photo_names, workers):
+    """
+    Generate the thumbnails of many photos with a pool of `workers`
+    processes and wait for them. Returns the names that failed.
+    """
+    failed = []
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = {
+            pool.submit(thumbnails.make_thumbnails, *_thumbnail_job(name)): name for name in photo_names
+        }
+        for future, name in futures.items():
+            if future.exception() is not None:
+                logger.error('Thumbnails of %s failed: %s', name, future.exception())
+                failed.append(name)
+    return failed
+
+
+def photo_changed(previous_name, photo_name):
+    """
+    After a student's photo is replaced or removed: once the change commits,
+    queue thumbnails of the new photo and delete the files of the old one.
+    """
+    if photo_name:
+        transaction.on_commit(lambda: queue_thumbnails(photo_name), using=current_database())
+    if previous_name:
+        transaction.on_commit(lambda: delete_photo_files(previous_name), using=current_database())
+
+
+# ============================================================================
+# COHORT SPRITE SHEETS
+# ============================================================================
+
+def _ready_photos(roster):
+    """{student id (str): photo name} of the roster's photos with thumbnails."""
+    return {
+        str(student.id): student.photo.name for student in roster
+        if student.photo and thumbnails_ready(student.photo.name)
+    }
+
+
+def _is_stale(sheet, roster):
+    """Whether photos were added, replaced or removed since the sheet was built."""
+    tiles = sheet.tiles if sheet is not None else {}
+    with_photo = set()
+    for student in roster:
+        if not student.photo:
+            continue
+        with_photo.add(str(student.id))
+        tile = tiles.get(str(student.id))
+        if (tile is None or tile[1] != student.photo.name) and thumbnails_ready(student.photo.name):
+            return True
+    return not with_photo.issuperset(tiles)
+
+
+def _plan(tiles, slot_count, photos):
+    """
+    Fit `photos` into the slots of `tiles`: unchanged photos stay put,
+    replaced ones are repainted in place, removed ones leave a blank slot
+    that new photos fill first. Returns (tiles, slot_count, paints).
+    """
+    tiles = dict(tiles)
+    paints = []
+    for student_id in [student_id for student_id in tiles if student_id not in photos]:
+        paints.append((tiles.pop(student_id)[0], None))
+    free = sorted(set(range(slot_count)) - {slot for slot, _ in tiles.values()}, reverse=True)
+    for student_id, photo_name in photos.items():
+        tile = tiles.get(student_id)
+        if tile is not None and tile[1] == photo_name:
+            continue
+        if tile is not None:
+            slot = tile[0]
+        elif free:
+            slot = free.pop()
+        else:
+            slot, slot_count = slot_count, slot_count + 1
+        tiles[student_id] = [slot, photo_name]
+        paints.append((slot, _media_path(f'{_thumbnail_stem(photo_name, TILE_SIZE)}.jpg')))
+    return tiles, slot_count, paints
+
+
+def _stylesheet(sheet, width, height):
+    """CSS giving `.roll-photo.photo-<student id>` its tile of the sheet."""
+    name = os.path.basename(_sheet_stem(sheet))
+    selectors = ',\n'.join(f'.roll-photo.photo-{student_id}' for student_id in sheet.tiles)
+    lines = [
+        f'{selectors} {{',
+        f'  background-image: url("{name}.jpg");',
+        f'  background-image: image-set(url("{name}.webp") type("image/webp"), '
+        f'url("{name}.jpg") type("image/jpeg"));',
+        f'  background-size: {width}px {height}px;',
+        '}',
+    ]
+    for student_id, (slot, _) in sheet.tiles.items():
+        x, y = thumbnails.slot_offset(slot, TILE_SIZE, SHEET_COLUMNS)
+        lines.append(f'.roll-photo.photo-{student_id} {{ background-position: -{x}px -{y}px; }}')
+    return '\n'.join(lines) + '\n'
+
+
+def _sheet_files(sheet):
+    stem = _sheet_stem(sheet)
+    return [f'{stem}.{extension}' for extension in ('png', 'webp', 'jpg', 'css')]
+
+
+def update_cohort_sheet(branch, year, roster, rebuild=False):
+    """
+    Bring a cohort's sprite sheet up to date with the photos of its roster,
+    repainting only the slots that changed unless `rebuild` is set.
+    """
+    photos = _ready_photos(roster)
+    with transaction.atomic(using=current_database()):
+        sheet, _ = CohortPhotoSheet.objects.select_for_update().get_or_create(branch=branch, year=year)
+        previous = _sheet_files(sheet) if sheet.version else []
+        master = _media_path(previous[0]) if previous else None
+        if rebuild or master is None or not os.path.exists(master):
+            tiles, slot_count, paints = _plan({}, 0, photos)
+            master = None
+        else:
+            tiles, slot_count, paints = _plan(sheet.tiles, sheet.slot_count, photos)
+            # Start over once most slots are blank, rather than carry the gaps
+            if len(tiles) * 2 < slot_count:
+                tiles, slot_count, paints = _plan({}, 0, photos)
+                master = None
+        if not paints and master is not None:
+            return sheet
+
+        sheet.tiles, sheet.slot_count = tiles, slot_count
+        if tiles:
+            layout = json.dumps(tiles, sort_keys=True).encode()
+            sheet.version = hashlib.sha1(layout).hexdigest()[:12]
+            stem = _media_path(_sheet_stem(sheet))
+            width, height = thumbnails.compose_sheet(
+                master, TILE_SIZE, SHEET_COLUMNS, slot_count, paints, stem
+            )
+            with open(f'{stem}.css', 'w') as stylesheet:
+                stylesheet.write(_stylesheet(sheet, width, height))
+        else:
+            sheet.version = ''
+        sheet.save()
+
+        stale = sorted(set(previous) - set(_sheet_files(sheet) if sheet.version else []))
+        transaction.on_commit(lambda: _remove(stale), using=current_database())
+    return sheet
+
+
+def get_cohort_sheet(branch, year, roster):
+    """
+    The cohort's sprite sheet, first repainting any photos changed since it
+    was built. None while no student on the roster has a photo ready.
+    """
+    sheet = CohortPhotoSheet.objects.filter(branch=branch, year=year).first()
+    if _is_stale(sheet, roster):
+        sheet = update_cohort_sheet(branch, year, roster)
+    return sheet if sheet is not None and sheet.version else None
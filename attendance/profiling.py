@@ -0,0 +1,175 @@
+"""
+On-demand request profiling for superusers.
+
+A request is profiled only when it carries the X-Profile header or the
+?__profile query flag *and* comes from an authenticated superuser. The mode
+is "cpu" (cProfile), "mem" (tracemalloc) or "all". Every other request
+passes straight through after two dictionary lookups, so the middleware can
+stay enabled in production.
+
+Profiles are stored under PROFILE_ROOT (BASE_DIR/profiles by default),
+named after the URL name and a timestamp, and listed in the admin at
+admin/profiles/. They show the app's code paths and data, so PROFILE_ROOT
+must stay outside MEDIA_ROOT and STATIC_ROOT, which are served publicly
+(checked by attendance.checks).
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import re
+import tracemalloc
+from datetime import datetime
+
+from django.conf import settings
+from django.utils import timezone
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_PARAM = '__profile'
+PROFILE_MODES = {'cpu', 'mem', 'all'}
+
+CPU_SUFFIX = '.prof'
+MEMORY_SUFFIX = '.mem.txt'
+
+# Number of entries kept in the stored allocation report and in summaries
+TOP_ALLOCATIONS = 25
+TOP_FUNCTIONS = 25
+
+_UNSAFE_NAME_RE = re.compile(r'[^A-Za-z0-9_-]+')
+
+
+def profile_root():
+    """Directory holding the stored profiles."""
+    return getattr(settings, 'PROFILE_ROOT', os.path.join(settings.BASE_DIR, 'profiles'))
+
+
+def requested_mode(request):
+    """Return the profiling mode asked for by a request, or None."""
+    mode = request.META.get(PROFILE_HEADER) or request.GET.get(PROFILE_PARAM)
+    if mode is None:
+        return None
+    mode = mode.lower() or 'all'
+    return mode if mode in PROFILE_MODES else 'all'
+
+
+class ProfilingMiddleware:
+    """Profile a request on demand. Must come after AuthenticationMiddleware."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = requested_mode(request)
+        if mode is None or not request.user.is_superuser:
+            return self.get_response(request)
+        return self.profile(request, mode)
+
+    def profile(self, request, mode):
+        profiler = cProfile.Profile() if mode in ('cpu', 'all') else None
+        trace_memory = mode in ('mem', 'all') and not tracemalloc.is_tracing()
+
+        if trace_memory:
+            tracemalloc.start()
+        if profiler:
+            profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            if profiler:
+                profiler.disable()
+            snapshot = None
+            if trace_memory:
+                snapshot = tracemalloc.take_snapshot()
+                tracemalloc.stop()
+
+        url_name = request.resolver_match.url_name if request.resolver_match else None
+        name = save_profile(url_name or request.path, profiler, snapshot)
+        response['X-Profile-Id'] = name
+        return response
+
+
+def save_profile(label, profiler=None, snapshot=None):
+    """Write the pstats and allocation report; return the profile's name."""
+    root = profile_root()
+    os.makedirs(root, exist_ok=True)
+    label = _UNSAFE_NAME_RE.sub('_', label).strip('_') or 'request'
+    name = f"{label}-{timezone.now():%Y%m%d-%H%M%S-%f}"
+
+    if profiler is not None:
+        profiler.dump_stats(os.path.join(root, name + CPU_SUFFIX))
+    if snapshot is not None:
+        stats = snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+        ]).statistics('lineno')
+        with open(os.path.join(root, name + MEMORY_SUFFIX), 'w') as report:
+            total = sum(stat.size for stat in stats)
+            report.write(f'Total allocated: {total / 1024:.1f} KiB\n')
+            for stat in stats[:TOP_ALLOCATIONS]:
+                report.write(f'{stat}\n')
+    return name
+
+
+# ============================================================================
+# STORED PROFILES
+# ============================================================================
+
+def _profile_path(name, suffix):
+    if _UNSAFE_NAME_RE.sub('', name) != name:
+        raise ValueError(f'Invalid profile name: {name!r}')
+    return os.path.join(profile_root(), name + suffix)
+
+
+def list_profiles():
+    """Stored profiles, newest first, as dicts with name, created and kinds."""
+    root = profile_root()
+    if not os.path.isdir(root):
+        return []
+    profiles = {}
+    for filename in os.listdir(root):
+        for suffix, kind in ((CPU_SUFFIX, 'cpu'), (MEMORY_SUFFIX, 'mem')):
+            if filename.endswith(suffix):
+                name = filename[:-len(suffix)]
+                path = os.path.join(root, filename)
+                entry = profiles.setdefault(name, {'name': name, 'kinds': [], 'created': None})
+                entry['kinds'].append(kind)
+                created = datetime.fromtimestamp(
+                    os.path.getmtime(path), tz=timezone.get_current_timezone()
+                )
+                entry['created'] = max(filter(None, [entry['created'], created]))
+    return sorted(profiles.values(), key=lambda entry: entry['created'], reverse=True)
+
+
+def hot_functions(name, limit=TOP_FUNCTIONS):
+    """Top functions of a stored CPU profile by cumulative time."""
+    path = _profile_path(name, CPU_SUFFIX)
+    if not os.path.exists(path):
+        return []
+    stats = pstats.Stats(path, stream=io.StringIO())
+    rows = []
+    for (filename, line, function), (_, calls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            'function': f'{os.path.basename(filename)}:{line}({function})',
+            'calls': calls,
+            'tottime': tottime,
+            'cumtime': cumtime,
+        })
+    rows.sort(key=lambda row: row['cumtime'], reverse=True)
+    return rows[:limit]
+
+
+def allocation_report(name):
+    """The stored top-allocations report of a profile, or an empty string."""
+    path = _profile_path(name, MEMORY_SUFFIX)
+    if not os.path.exists(path):
+        return ''
+    with open(path) as report:
+        return report.read()
+
+
+def delete_profile(name):
+    """Remove every file of a stored profile."""
+    for suffix in (CPU_SUFFIX, MEMORY_SUFFIX):
+        path = _profile_path(name, suffix)
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,134 @@
+"""
+Year-end batch promotion.
+
+Moves every active student up one year, graduates final-year students and,
+optionally, moves faculty along with their batch. Everything runs as a few
+set-based UPDATE statements in one transaction, bypassing per-object saves
+and signals, and the caches are invalidated once after commit. Each run is
+recorded in PromotionRun so it can be rolled back.
+"""
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Case, Count, F, Value, When
+from django.utils import timezone
+
+from .cache import invalidate_cohort_rosters, invalidate_dashboards
+from .models import Student, Faculty, PromotionRun, YEAR_CHOICES
+from .tenancy import current_database
+
+FIRST_YEAR = min(year for year, _ in YEAR_CHOICES)
+FINAL_YEAR = max(year for year, _ in YEAR_CHOICES)
+
+# Keeps `pk IN (...)` lists under SQLite's bound-parameter limit
+ID_CHUNK_SIZE = 500
+
+
+def _chunks(ids):
+    for start in range(0, len(ids), ID_CHUNK_SIZE):
+        yield ids[start:start + ID_CHUNK_SIZE]
+
+
+def _invalidate_caches():
+    invalidate_cohort_rosters()
+    invalidate_dashboards()
+
+
+def plan_promotion(advance_faculty=False):
+    """
+    Describe what promote() would change without writing anything.
+    Returns a list of (kind, branch, from_year, to_year, count) where
+    to_year is None for graduating students.
+    """
+    changes = []
+    cohorts = (
+        Student.objects.filter(is_active=True)
+        .values('branch', 'year')
+        .annotate(count=Count('pk'))
+        .order_by('branch', 'year')
+    )
+    for cohort in cohorts:
+        year = cohort['year']
+        to_year = None if year >= FINAL_YEAR else year + 1
+        changes.append(('students', cohort['branch'], year, to_year, cohort['count']))
+
+    if advance_faculty:
+        groups = (
+            Faculty.objects.values('branch', 'year')
+            .annotate(count=Count('pk'))
+            .order_by('branch', 'year')
+        )
+        for group in groups:
+            year = group['year']
+            to_year = FIRST_YEAR if year >= FINAL_YEAR else year + 1
+            changes.append(('faculty', group['branch'], year, to_year, group['count']))
+
+    return changes
+
+
+def promote(advance_faculty=False):
+    """Run the promotion and return its PromotionRun."""
+    now = timezone.now()
+    with transaction.atomic(using=current_database()):
+        active = Student.objects.filter(is_active=True)
+        graduating = active.filter(year__gte=FINAL_YEAR)
+        continuing = active.filter(year__lt=FINAL_YEAR)
+
+        graduated_ids = list(graduating.values_list('id', flat=True))
+        promoted_ids = list(continuing.values_list('id', flat=True))
+
+        User.objects.filter(
+            student_profile__is_active=True, student_profile__year__gte=FINAL_YEAR
+        ).update(is_active=False)
+        graduating.update(is_active=False, updated_at=now)
+        continuing.update(year=F('year') + 1, updated_at=now)
+
+        faculty_changes = []
+        if advance_faculty:
+            faculty_changes = [
+                [faculty_id, year, FIRST_YEAR if year >= FINAL_YEAR else year + 1]
+                for faculty_id, year in Faculty.objects.values_list('id', 'year')
+            ]
+            Faculty.objects.update(
+                year=Case(
+                    When(year__gte=FINAL_YEAR, then=Value(FIRST_YEAR)),
+                    default=F('year') + 1,
+                ),
+                updated_at=now,
+            )
+
+        run = PromotionRun.objects.create(
+            promoted_student_ids=promoted_ids,
+            graduated_student_ids=graduated_ids,
+            faculty_changes=faculty_changes,
+        )
+        transaction.on_commit(_invalidate_caches, using=current_database())
+    return run
+
+
+def rollback(run):
+    """Undo a promotion. Only the most recent, not yet rolled back, run qualifies."""
+    latest = PromotionRun.objects.filter(rolled_back_at__isnull=True).order_by('-created_at').first()
+    if latest is None or latest.pk != run.pk:
+        raise ValueError('Only the most recent promotion can be rolled back.')
+
+    now = timezone.now()
+    with transaction.atomic(using=current_database()):
+        for chunk in _chunks(run.promoted_student_ids):
+            Student.objects.filter(pk__in=chunk).update(year=F('year') - 1, updated_at=now)
+        for chunk in _chunks(run.graduated_student_ids):
+            Student.objects.filter(pk__in=chunk).update(is_active=True, updated_at=now)
+            User.objects.filter(student_profile__in=chunk).update(is_active=True)
+
+        # One UPDATE per original year restores every faculty member
+        by_year = {}
+        for faculty_id, old_year, _ in run.faculty_changes:
+            by_year.setdefault(old_year, []).append(faculty_id)
+        for old_year, faculty_ids in by_year.items():
+            for chunk in _chunks(faculty_ids):
+                Faculty.objects.filter(pk__in=chunk).update(year=old_year, updated_at=now)
+
+        run.rolled_back_at = now
+        run.save(update_fields=['rolled_back_at'])
+        transaction.on_commit(_invalidate_caches, using=current_database())
+    return run
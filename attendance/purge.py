@@ -0,0 +1,163 @@
+"""
+Bulk deactivation and chunked purging of students.
+
+Deleting a Student through the ORM makes Django's deletion collector load
+every related Attendance row into memory first. For graduated batches that
+is minutes of work under the write lock, so removal is split in two:
+
+* deactivate_students() flips Student.is_active and User.is_active with two
+  UPDATE statements; the students vanish from every roster immediately.
+* purge_students() later deletes the inactive students' rows with raw,
+  set-based DELETEs in bounded chunks, each in its own short transaction.
+  Every chunk leaves the database consistent, so an interrupted purge is
+  resumed simply by running it again.
+
+Raw DELETEs send no signals, so each chunk refreshes what the delete
+signals would once it commits: the rollups of the classes it removed
+attendance from, the data versions of the students and their cohorts,
+and the query cache versions of the tables it wrote.
+"""
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from . import photos, search
+from .cache import invalidate_cohort_rosters, bump_student_versions, bump_cohort_version
+from .models import (
+    Student, Attendance, AttendanceChange, AttendanceChangeSummary, LowAttendanceAlert
+)
+from .querycache import bump_tables
+from .rollups import queue_rollup_refresh
+from .tenancy import current_connection, current_database
+
+DEFAULT_CHUNK_SIZE = 5000
+STUDENTS_PER_BATCH = 100
+
+
+def deactivate_students(queryset):
+    """Deactivate the students in a queryset and block their logins."""
+    student_ids = list(queryset.values_list('id', flat=True))
+    with transaction.atomic(using=current_database()):
+        updated = Student.objects.filter(pk__in=student_ids).update(
+            is_active=False, updated_at=timezone.now()
+        )
+        User.objects.filter(student_profile__in=student_ids).update(is_active=False)
+    invalidate_cohort_rosters()
+    return updated
+
+
+def _delete_chunk(table, column, student_ids, chunk_size):
+    """Delete up to chunk_size rows of table whose column is in student_ids."""
+    placeholders = ', '.join(['%s'] * len(student_ids))
+    connection = current_connection()
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {table} WHERE id IN ('
+            f'SELECT id FROM {table} WHERE {column} IN ({placeholders}) LIMIT %s)',
+            [*student_ids, chunk_size],
+        )
+        deleted = cursor.rowcount
+        if deleted:
+            transaction.on_commit(lambda: bump_tables([table]), using=connection.alias)
+        return deleted
+
+
+def _delete_attendance_chunk(student_ids, chunk_size):
+    """
+    Delete up to chunk_size attendance rows of some students, then refresh
+    the rollups of their classes and the students' data versions.
+    """
+    table = Attendance._meta.db_table
+    placeholders = ', '.join(['%s'] * len(student_ids))
+    connection = current_connection()
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT id, schedule_id FROM {table} WHERE student_id IN ({placeholders}) LIMIT %s',
+            [*student_ids, chunk_size],
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            return 0
+        cursor.execute(
+            f"DELETE FROM {table} WHERE id IN ({', '.join(['%s'] * len(rows))})",
+            [row_id for row_id, _ in rows],
+        )
+        queue_rollup_refresh({schedule_id for _, schedule_id in rows})
+
+        def refresh():
+            bump_tables([table])
+            bump_student_versions(student_ids)
+
+        transaction.on_commit(refresh, using=connection.alias)
+        return len(rows)
+
+
+def purge_students(queryset=None, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """
+    Physically delete inactive students, their attendance and their users.
+    Only students with is_active=False are ever touched. `progress` is called
+    with a short message after each chunk. Returns (students, attendance rows).
+    """
+    queryset = Student.objects.all() if queryset is None else queryset
+    student_ids = list(queryset.filter(is_active=False).values_list('id', flat=True))
+    dependent_tables = [
+        AttendanceChange._meta.db_table,
+        AttendanceChangeSummary._meta.db_table,
+        LowAttendanceAlert._meta.db_table,
+    ]
+
+    purged_students = purged_rows = 0
+    for start in range(0, len(student_ids), STUDENTS_PER_BATCH):
+        batch = student_ids[start:start + STUDENTS_PER_BATCH]
+
+        cohorts = set(Student.objects.filter(pk__in=batch).values_list('branch', 'year'))
+
+        # Attendance and its history are the bulk of the data: bounded
+        # chunks, short transactions
+        while True:
+            deleted = _delete_attendance_chunk(batch, chunk_size)
+            purged_rows += deleted
+            if progress and deleted:
+                progress(f'Deleted {purged_rows} attendance rows')
+            if deleted < chunk_size:
+                break
+        for table in dependent_tables:
+            while True:
+                deleted = _delete_chunk(table, 'student_id', batch, chunk_size)
+                purged_rows += deleted
+                if progress and deleted:
+                    progress(f'Deleted {purged_rows} attendance rows')
+                if deleted < chunk_size:
+                    break
+
+        # The students themselves, then their now-unreferenced users
+        placeholders = ', '.join(['%s'] * len(batch))
+        with transaction.atomic(using=current_database()):
+            user_ids, photo_names = [], []
+            for user_id, photo_name in Student.objects.filter(pk__in=batch).values_list('user_id', 'photo'):
+                user_ids.append(user_id)
+                if photo_name:
+                    photo_names.append(photo_name)
+            search.unindex(search.STUDENT_FTS_TABLE, batch)
+            with current_connection().cursor() as cursor:
+                cursor.execute(
+                    f'DELETE FROM {Student._meta.db_table} WHERE id IN ({placeholders})',
+                    batch,
+                )
+            User.objects.filter(pk__in=user_ids).delete()
+            for photo_name in photo_names:
+                photos.photo_changed(photo_name, '')
+
+            def refresh_students():
+                bump_tables([Student._meta.db_table])
+                invalidate_cohort_rosters()
+                for branch, year in cohorts:
+                    bump_cohort_version(branch, year)
+
+            transaction.on_commit(refresh_students, using=current_database())
+        purged_students += len(batch)
+        if progress:
+            progress(f'Purged {purged_students}/{len(student_ids)} students')
+
+    return purged_students, purged_rows
@@ -0,0 +1,136 @@
+"""
+Query plan audit for the attendance app's hot queries.
+
+Each entry in HOT_QUERIES builds a queryset exactly the way the views do.
+`audit()` captures EXPLAIN QUERY PLAN for every one of them and reports any
+that fall back to a full table scan, so index regressions are caught by the
+test suite (attendance/tests/test_query_plans.py) and the
+`audit_query_plans` command before they reach production.
+"""
+
+import re
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.db.models import Count, Q
+
+from .models import Student, Schedule, Attendance, DailyCohortRollup
+from .tenancy import current_connection
+
+# Placeholder ids: the planner's choice does not depend on the values
+SAMPLE_STUDENT_ID = 1
+SAMPLE_FACULTY_ID = 1
+SAMPLE_SCHEDULE_ID = 1
+SAMPLE_BRANCH = 'CSE'
+SAMPLE_YEAR = 1
+SAMPLE_CHECKPOINT = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+SAMPLE_START = date(2024, 1, 1)
+SAMPLE_END = date(2024, 6, 30)
+
+# "SEARCH tbl USING ..." is an index lookup. "SCAN tbl" reads every row,
+# and "SCAN tbl USING [COVERING] INDEX" still walks the whole index.
+_FULL_SCAN_RE = re.compile(r'\bSCAN (?:TABLE )?(?!CONSTANT\b)(\w+)')
+
+
+def _count(queryset):
+    """Mirror the unordered SELECT that QuerySet.count() issues."""
+    return queryset.order_by().values('pk')
+
+
+def _student_faculty_attendance():
+    return Attendance.objects.filter(
+        student_id=SAMPLE_STUDENT_ID,
+        faculty_id=SAMPLE_FACULTY_ID,
+    )
+
+
+def _per_student_counts(attendance):
+    return attendance.values('student').annotate(
+        total=Count('id'), attended=Count('id', filter=Q(status='P'))
+    ).order_by()
+
+
+HOT_QUERIES = {
+    'cohort roster': lambda: Student.objects.filter(
+        branch=SAMPLE_BRANCH, year=SAMPLE_YEAR, is_active=True
+    ).order_by('hall_ticket_id'),
+    'faculty schedules': lambda: Schedule.objects.filter(
+        faculty_id=SAMPLE_FACULTY_ID
+    ).order_by('-date'),
+    'student/faculty attendance count': lambda: _count(_student_faculty_attendance()),
+    'student/faculty present count': lambda: _count(
+        _student_faculty_attendance().filter(status='P')
+    ),
+    'faculty attendance by student': lambda: _per_student_counts(
+        Attendance.objects.filter(faculty_id=SAMPLE_FACULTY_ID)
+    ),
+    'cohort attendance by student': lambda: _per_student_counts(
+        Attendance.objects.filter(branch=SAMPLE_BRANCH, year=SAMPLE_YEAR)
+    ),
+    'faculty schedules with marking counts': lambda: Schedule.objects.filter(
+        faculty_id=SAMPLE_FACULTY_ID
+    ).with_marking_counts().order_by('-date'),
+    'faculty unmarked schedules': lambda: Schedule.objects.filter(
+        faculty_id=SAMPLE_FACULTY_ID
+    ).incomplete().order_by('-date'),
+    'cohort schedules': lambda: Schedule.objects.filter(
+        branch=SAMPLE_BRANCH, year=SAMPLE_YEAR, date__gte=SAMPLE_START, date__lte=SAMPLE_END
+    ),
+    'student recent attendance': lambda: Attendance.objects.filter(
+        student_id=SAMPLE_STUDENT_ID
+    ).select_related('schedule').order_by('-marked_at')[:10],
+    'student attendance details': lambda: Attendance.objects.filter(
+        student_id=SAMPLE_STUDENT_ID
+    ).select_related('schedule', 'schedule__faculty').order_by('-schedule__date'),
+    'student attendance by status': lambda: _count(Attendance.objects.filter(
+        student_id=SAMPLE_STUDENT_ID, status='P'
+    )),
+    'schedule attendance by status': lambda: _count(Attendance.objects.filter(
+        schedule_id=SAMPLE_SCHEDULE_ID, status='P'
+    )),
+    'students changed since checkpoint': lambda: Attendance.objects.filter(
+        updated_at__gt=SAMPLE_CHECKPOINT
+    ).values('student').distinct(),
+    'student subject breakdown': lambda: Attendance.objects.filter(
+        student_id=SAMPLE_STUDENT_ID
+    ).values('schedule__subject', 'schedule__faculty', 'schedule__faculty__name').annotate(
+        total=Count('id'), attended=Count('id', filter=Q(status='P'))
+    ).order_by('schedule__subject', 'schedule__faculty__name'),
+    'cohort daily rollups': lambda: DailyCohortRollup.objects.filter(
+        branch=SAMPLE_BRANCH, year=SAMPLE_YEAR, date__gte=SAMPLE_START, date__lte=SAMPLE_END
+    ),
+    'faculty daily rollups': lambda: DailyCohortRollup.objects.filter(
+        branch=SAMPLE_BRANCH, year=SAMPLE_YEAR, faculty_id=SAMPLE_FACULTY_ID,
+        date__gte=SAMPLE_START, date__lte=SAMPLE_END,
+    ),
+}
+
+
+def explain(queryset):
+    """Return the EXPLAIN QUERY PLAN lines for a queryset."""
+    sql, params = queryset.query.sql_with_params()
+    with current_connection().cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def full_scans(plan):
+    """Return the tables read by a full table scan in a plan."""
+    tables = []
+    for line in plan:
+        match = _FULL_SCAN_RE.search(line)
+        if match:
+            tables.append(match.group(1))
+    return tables
+
+
+def audit(queries=None):
+    """
+    Explain every hot query.
+    Returns a list of (name, plan lines, fully scanned tables).
+    """
+    queries = queries or HOT_QUERIES
+    results = []
+    for name, build in queries.items():
+        plan = explain(build())
+        results.append((name, plan, full_scans(plan)))
+    return results
@@ -0,0 +1,316 @@
+"""
+Opt-in, self-invalidating cache of ORM query results.
+
+`Model.objects.cached()` marks a queryset so that evaluating it reuses the
+rows stored for its exact SQL and parameters, as long as none of the
+tables the SQL reads has been written since. Every INSERT, UPDATE and
+DELETE run through a Django connection on a table a cached queryset can
+read (cached_tables()) bumps a write version for that table, whether it
+comes from save(), a bulk helper, a cascade or raw SQL, so no cached query
+ever needs invalidating by hand. Writes to other tables, such as sessions,
+cost no cache write. A query reading any other table is not cached.
+Inside a transaction each table is bumped the first time it is written
+and once more on commit, however many statements write it; until then,
+that transaction's own cached queries on the tables it wrote skip the cache.
+
+Results are pickled into a per-process LRU store capped by entries and
+bytes (QUERY_CACHE_MAX_ENTRIES, QUERY_CACHE_MAX_BYTES). The write versions
+live in the shared cache, so a write in one process invalidates the
+results cached by every process.
+"""
+
+import hashlib
+import pickle
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.db import connections, models, transaction
+
+from .versions import get_versions, bump_versions
+
+DEFAULT_TIMEOUT = 300
+
+WRITE_STATEMENT = re.compile(
+    r'^\s*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|UPDATE|DELETE\s+FROM)\s+["`\[]?(\w+)',
+    re.IGNORECASE,
+)
+
+_local = threading.local()
+
+
+# ============================================================================
+# TABLE WRITE VERSIONS
+# ============================================================================
+
+def table_version_key(table):
+    return f'attendance:table-version:{table}'
+
+
+def bump_tables(tables):
+    """Invalidate every cached query reading from these tables."""
+    # The cache backend may itself write through a Django connection
+    if getattr(_local, 'bumping', False):
+        return
+    _local.bumping = True
+    try:
+        bump_versions([table_version_key(table) for table in tables])
+    finally:
+        _local.bumping = False
+
+
+class _TransactionWrites:
+    """Tables written by a connection's current transaction."""
+
+    def __init__(self):
+        self.tables = set()
+
+    def __call__(self):
+        bump_tables(sorted(self.tables))
+
+
+def _transaction_writes(connection):
+    """The _TransactionWrites of the connection's open transaction, or None."""
+    writes = getattr(connection, '_querycache_writes', None)
+    # Committing or rolling back drops the on_commit hook; it is registered
+    # at the transaction's first write, so the search ends early
+    if writes is None or not any(entry[1] is writes for entry in connection.run_on_commit):
+        return None
+    return writes
+
+
+def _written_in_transaction(connection, table):
+    writes = _transaction_writes(connection)
+    if writes is None:
+        writes = connection._querycache_writes = _TransactionWrites()
+        # Other connections keep reading the old rows until the commit and
+        # may cache them under the version bumped now, so bump once more
+        transaction.on_commit(writes, using=connection.alias)
+    if table not in writes.tables:
+        writes.tables.add(table)
+        bump_tables([table])
+
+
+def track_writes(execute, sql, params, many, context):
+    """Connection execute wrapper that bumps the version of each table written."""
+    result = execute(sql, params, many, context)
+    match = WRITE_STATEMENT.match(sql) if isinstance(sql, str) else None
+    if match and match.group(1) in cached_tables():
+        connection = context['connection']
+        if connection.in_atomic_block:
+            _written_in_transaction(connection, match.group(1))
+        else:
+            bump_tables([match.group(1)])
+    return result
+
+
+def install_write_tracking(sender, connection, **kwargs):
+    """connection_created receiver adding track_writes to every connection."""
+    if track_writes not in connection.execute_wrappers:
+        connection.execute_wrappers.append(track_writes)
+
+
+@lru_cache(maxsize=None)
+def _known_tables():
+    return frozenset(
+        model._meta.db_table for model in apps.get_models(include_auto_created=True)
+    )
+
+
+@lru_cache(maxsize=None)
+def cached_tables():
+    """
+    Tables a cached queryset can read: those of the models managed by a
+    CachingQuerySet and of the models and many-to-many tables they relate to.
+    """
+    tables = set()
+    for model in apps.get_models():
+        queryset_class = getattr(model._default_manager, '_queryset_class', None)
+        if not (queryset_class and issubclass(queryset_class, CachingQuerySet)):
+            continue
+        tables.add(model._meta.db_table)
+        for field in model._meta.get_fields(include_hidden=True):
+            if field.is_relation and field.related_model is not None:
+                tables.add(field.related_model._meta.db_table)
+            if field.many_to_many:
+                through = (field.remote_field if field.concrete else field).through
+                tables.add(through._meta.db_table)
+    return frozenset(tables)
+
+
+def tables_read_by(sql, connection):
+    """Tables of installed models that a SQL statement mentions."""
+    return sorted(
+        table for table in _known_tables() if connection.ops.quote_name(table) in sql
+    )
+
+
+# ============================================================================
+# RESULT STORE
+# ============================================================================
+
+class QueryCacheStore:
+    """Thread-safe LRU of pickled query results, capped by entries and bytes."""
+
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            # key -> (tables, versions, expires, payload)
+            self.entries = OrderedDict()
+            self.bytes = 0
+            self.hits = self.misses = self.stale = self.evictions = self.oversized = 0
+
+    def _drop(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= len(entry[3])
+
+    def peek(self, key):
+        with self.lock:
+            return self.entries.get(key)
+
+    def hit(self, key):
+        with self.lock:
+            self.hits += 1
+            if key in self.entries:
+                self.entries.move_to_end(key)
+
+    def miss(self, key, stale=False):
+        with self.lock:
+            self.misses += 1
+            if stale:
+                self.stale += 1
+                self._drop(key)
+
+    def put(self, key, tables, versions, expires, payload):
+        with self.lock:
+            if len(payload) > self.max_bytes // 4:
+                # One huge result would flush most of the store
+                self.oversized += 1
+                return
+            self._drop(key)
+            self.entries[key] = (tables, versions, expires, payload)
+            self.bytes += len(payload)
+            while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, (_, _, _, evicted) = self.entries.popitem(last=False)
+                self.bytes -= len(evicted)
+                self.evictions += 1
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'bytes': self.bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'stale': self.stale,
+                'evictions': self.evictions,
+                'oversized': self.oversized,
+                'hit_rate': round(self.hits / lookups * 100, 1) if lookups else None,
+            }
+
+
+store = QueryCacheStore(settings.QUERY_CACHE_MAX_ENTRIES, settings.QUERY_CACHE_MAX_BYTES)
+
+
+def fetch(queryset, kind, compute, timeout):
+    """
+    Return `compute()` for a cached queryset, reusing the stored result while
+    every table its SQL reads is unchanged. `kind` tells apart results of
+    the same SQL, such as rows and a count.
+    """
+    connection = connections[queryset.db]
+    try:
+        sql, params = queryset.query.get_compiler(using=queryset.db).as_sql()
+    except EmptyResultSet:
+        return compute()
+    sql = ' '.join(sql.split())
+    writes = _transaction_writes(connection) if connection.in_atomic_block else None
+    if writes is not None and writes.tables.intersection(tables_read_by(sql, connection)):
+        # Versions of these tables are only bumped again on commit
+        return compute()
+    key = hashlib.sha1(repr((
+        queryset.db, kind, queryset._iterable_class.__qualname__, queryset._fields, sql, tuple(params)
+    )).encode()).hexdigest()
+
+    entry = store.peek(key)
+    if entry is not None:
+        tables, versions, expires, payload = entry
+        if expires > time.monotonic() and get_versions([table_version_key(t) for t in tables]) == versions:
+            store.hit(key)
+            return pickle.loads(payload)
+    store.miss(key, stale=entry is not None)
+
+    # Versions are read before the query, so a write racing with it leaves
+    # the stored result already stale rather than wrongly fresh
+    tables = tables_read_by(sql, connection)
+    if not cached_tables().issuperset(tables):
+        # Writes to some of these tables bump no version
+        return compute()
+    versions = get_versions([table_version_key(table) for table in tables])
+    result = compute()
+    try:
+        payload = pickle.dumps(result, pickle.HIGHEST_PROTOCOL)
+    except (pickle.PicklingError, AttributeError, TypeError):
+        # e.g. values_list(named=True) rows, whose classes are built on the fly
+        return result
+    store.put(key, tables, versions, time.monotonic() + timeout, payload)
+    return result
+
+
+# ============================================================================
+# QUERYSET
+# ============================================================================
+
+class CachingQuerySet(models.QuerySet):
+    """QuerySet whose results can be cached with .cached()."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cache_timeout = None
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._cache_timeout = self._cache_timeout
+        return clone
+
+    def cached(self, timeout=DEFAULT_TIMEOUT):
+        """
+        Serve this queryset's rows and count from the query cache. `timeout`
+        bounds staleness for writes made outside Django's connections.
+        """
+        clone = self._chain()
+        clone._cache_timeout = timeout
+        return clone
+
+    def _use_cache(self):
+        return (
+            self._cache_timeout is not None
+            and self._result_cache is None
+            and not self.query.select_for_update
+        )
+
+    def _fetch_all(self):
+        if self._use_cache():
+            self._result_cache = fetch(
+                self, 'rows', lambda: list(self._iterable_class(self)), self._cache_timeout
+            )
+        super()._fetch_all()
+
+    def count(self):
+        if self._use_cache():
+            return fetch(self, 'count', super().count, self._cache_timeout)
+        return super().count()
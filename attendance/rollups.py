@@ -0,0 +1,228 @@
+"""
+Daily cohort attendance rollups.
+
+DailyCohortRollup keeps present/total counts per branch, year, faculty and
+day. A schedule's rollup is refreshed from that schedule's attendance alone
+whenever it is marked, so heatmaps and trend queries over a whole semester
+read a few hundred rollup rows instead of the Attendance table.
+
+Saving or deleting an attendance record queues its schedule with
+queue_rollup_refresh() (see attendance.signals), and writes that send no
+signals, such as bulk_create() and update(), queue their schedules
+themselves. Queued schedules are refreshed once the transaction commits.
+"""
+
+import threading
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncWeek
+
+from .bitmap import popcount
+from .models import Schedule, Attendance, AttendanceBitmap, DailyCohortRollup
+from .tenancy import current_database
+
+# Keeps `pk IN (...)` lists under SQLite's bound-parameter limit
+SCHEDULE_CHUNK_SIZE = 500
+
+# Upper bounds (exclusive) of the heatmap colour levels, in percent
+HEATMAP_LEVELS = (50, 75, 90)
+
+# Schedules waiting for a commit, per thread and database alias
+_pending = threading.local()
+
+
+def _schedule_counts(schedule_ids):
+    """
+    {schedule_id: [present, total]} from attendance rows, or from the bitmap
+    of a schedule without rows. A converted schedule keeps its rows, so its
+    bitmap holds the same marks and must not be counted again.
+    """
+    counts = {schedule_id: [0, 0] for schedule_id in schedule_ids}
+    rows = (
+        Attendance.objects.filter(schedule_id__in=schedule_ids)
+        .values('schedule')
+        .annotate(total=Count('id'), present=Count('id', filter=Q(status='P')))
+        .order_by()
+    )
+    for row in rows:
+        counts[row['schedule']] = [row['present'], row['total']]
+    bitmaps = AttendanceBitmap.objects.filter(
+        schedule_id__in=[schedule_id for schedule_id, (_, total) in counts.items() if not total]
+    ).values_list('schedule_id', 'marked', 'present')
+    for schedule_id, marked, present in bitmaps:
+        counts[schedule_id] = [popcount(present), popcount(marked)]
+    return counts
+
+
+def refresh_rollups(schedule_ids):
+    """Recompute the rollup rows of the given schedules with one upsert per chunk."""
+    schedule_ids = list(schedule_ids)
+    refreshed = 0
+    for start in range(0, len(schedule_ids), SCHEDULE_CHUNK_SIZE):
+        chunk = schedule_ids[start:start + SCHEDULE_CHUNK_SIZE]
+        counts = _schedule_counts(chunk)
+        schedules = Schedule.objects.filter(pk__in=chunk).only('faculty', 'date', 'branch', 'year')
+        rollups = [
+            DailyCohortRollup(
+                branch=schedule.branch,
+                year=schedule.year,
+                faculty_id=schedule.faculty_id,
+                date=schedule.date,
+                present=counts[schedule.id][0],
+                total=counts[schedule.id][1],
+            )
+            for schedule in schedules
+        ]
+        DailyCohortRollup.objects.bulk_create(
+            rollups,
+            update_conflicts=True,
+            unique_fields=['branch', 'year', 'faculty', 'date'],
+            update_fields=['present', 'total', 'updated_at'],
+        )
+        refreshed += len(rollups)
+    return refreshed
+
+
+def queue_rollup_refresh(schedule_ids):
+    """
+    Refresh the rollups of some schedules once the current transaction
+    commits, or right away outside a transaction. A schedule queued many
+    times in one transaction, e.g. once per attendance record saved, is
+    refreshed once. Schedules queued by a transaction that rolls back are
+    refreshed with the next commit, which recomputes the same counts.
+    """
+    using = current_database()
+    if not hasattr(_pending, 'schedules'):
+        _pending.schedules = {}
+    _pending.schedules.setdefault(using, set()).update(schedule_ids)
+    transaction.on_commit(lambda: _refresh_pending(using), using=using)
+
+
+def _refresh_pending(using):
+    # The first callback of a transaction refreshes everything queued
+    schedule_ids = _pending.schedules.pop(using, None)
+    if schedule_ids:
+        refresh_rollups(sorted(schedule_ids))
+
+
+def forget_rollup(branch, year, faculty_id, date):
+    """Delete the rollup row of a class that was deleted or moved to another day or faculty."""
+    DailyCohortRollup.objects.filter(
+        branch=branch, year=year, faculty_id=faculty_id, date=date
+    ).delete()
+
+
+def backfill_rollups(start=None, end=None, progress=None):
+    """Refresh the rollups of every schedule, optionally within a date range."""
+    schedules = Schedule.objects.order_by('date', 'pk')
+    if start is not None:
+        schedules = schedules.filter(date__gte=start)
+    if end is not None:
+        schedules = schedules.filter(date__lte=end)
+    schedule_ids = list(schedules.values_list('pk', flat=True))
+
+    refreshed = 0
+    for offset in range(0, len(schedule_ids), SCHEDULE_CHUNK_SIZE):
+        refreshed += refresh_rollups(schedule_ids[offset:offset + SCHEDULE_CHUNK_SIZE])
+        if progress:
+            progress(f'Refreshed {refreshed}/{len(schedule_ids)} schedules')
+    return refreshed
+
+
+# ============================================================================
+# QUERIES
+# ============================================================================
+
+def cohort_rollups(branch, year, start, end, faculty=None):
+    """Rollup rows of a cohort between two dates, optionally for one faculty."""
+    rollups = DailyCohortRollup.objects.filter(
+        branch=branch, year=year, date__gte=start, date__lte=end
+    )
+    if faculty is not None:
+        rollups = rollups.filter(faculty=faculty)
+    return rollups
+
+
+def _rate(present, total):
+    return round(present * 100 / total, 2) if total else None
+
+
+def trend(rollups, granularity='day'):
+    """
+    Present/total/rate points of a rollup queryset, per day or per week
+    (weeks start on Monday).
+    """
+    if granularity == 'week':
+        rollups = rollups.annotate(period=TruncWeek('date'))
+        period = 'period'
+    else:
+        period = 'date'
+    rows = (
+        rollups.values(period)
+        .annotate(present_sum=Sum('present'), total_sum=Sum('total'))
+        .order_by(period)
+    )
+    return [
+        {
+            'date': row[period],
+            'present': row['present_sum'],
+            'total': row['total_sum'],
+            'rate': _rate(row['present_sum'], row['total_sum']),
+        }
+        for row in rows
+    ]
+
+
+def student_daily_counts(student, start, end):
+    """A student's own {date: (present, total)} between two dates."""
+    rows = (
+        Attendance.objects.filter(
+            student=student, schedule__date__gte=start, schedule__date__lte=end
+        )
+        .values('schedule__date')
+        .annotate(total=Count('id'), present=Count('id', filter=Q(status='P')))
+        .order_by()
+    )
+    return {row['schedule__date']: (row['present'], row['total']) for row in rows}
+
+
+# ============================================================================
+# CALENDAR HEATMAP
+# ============================================================================
+
+def heatmap_level(rate):
+    """0 for no classes, then 1-4 from lowest to highest attendance."""
+    if rate is None:
+        return 0
+    for level, bound in enumerate(HEATMAP_LEVELS, start=1):
+        if rate < bound:
+            return level
+    return len(HEATMAP_LEVELS) + 1
+
+
+def build_calendar(daily_counts, start, end):
+    """
+    Lay {date: (present, total)} out for a calendar heatmap: seven rows,
+    Monday first, each holding that weekday's cell for every week.
+    """
+    first = start - timedelta(days=start.weekday())
+    weeks = []
+    day = first
+    while day <= end:
+        week = []
+        for _ in range(7):
+            present, total = daily_counts.get(day, (0, 0))
+            rate = _rate(present, total)
+            week.append({
+                'date': day,
+                'in_range': start <= day <= end,
+                'present': present,
+                'total': total,
+                'rate': rate,
+                'level': heatmap_level(rate),
+            })
+            day += timedelta(days=1)
+        weeks.append(week)
+    return [list(row) for row in zip(*weeks)]
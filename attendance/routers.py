@@ -0,0 +1,147 @@
+"""
+Database routing for read replicas.
+
+Reads of attendance models made inside a view decorated with
+`replica_reads` go to one of the aliases in settings.DATABASE_REPLICAS;
+everything else, and every write, goes to the primary (`default`).
+After a request writes, ReplicaStickinessMiddleware pins that session to
+the primary for settings.REPLICA_STICKY_SECONDS so users always see their
+own changes even while the replicas lag behind.
+"""
+
+import contextvars
+import logging
+import random
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+
+logger = logging.getLogger('attendance.routing')
+
+PRIMARY_DB = 'default'
+STICKY_SESSION_KEY = '_primary_db_until'
+
+# Only app data is replicated for reads; auth and sessions stay on the
+# primary so a fresh login is never lost to replication lag.
+REPLICATED_APP_LABELS = {'attendance'}
+
+
+class RoutingState:
+    """Per-request routing decisions."""
+
+    def __init__(self, sticky=False):
+        self.sticky = sticky
+        self.replica = None
+        self.wrote = False
+
+
+_state = contextvars.ContextVar('attendance_routing_state', default=None)
+
+
+def get_replicas():
+    """Return the configured replica aliases."""
+    return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+
+def replica_reads(view_func):
+    """
+    Decorator for read-only views: route their ORM reads to a replica,
+    unless the session is currently pinned to the primary.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        state = _state.get()
+        replicas = get_replicas()
+        if state is not None and replicas and not state.sticky:
+            state.replica = random.choice(replicas)
+        return view_func(request, *args, **kwargs)
+    return wrapper
+
+
+@contextmanager
+def primary_reads():
+    """
+    Send the reads of a block to the primary even inside a replica_reads
+    view, e.g. to compute a value stored in the shared cache: a result read
+    from a lagging replica would outlive the request that read it.
+    """
+    state = _state.get()
+    if state is None or state.replica is None:
+        yield
+        return
+    replica, state.replica = state.replica, None
+    try:
+        yield
+    finally:
+        state.replica = replica
+
+
+class ReplicaRouter:
+    """Send replica-safe reads to a replica and all writes to the primary."""
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if (
+            state is None
+            or state.replica is None
+            or state.wrote
+            or model._meta.app_label not in REPLICATED_APP_LABELS
+        ):
+            return PRIMARY_DB
+        logger.debug('read %s -> %s', model._meta.label, state.replica)
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None and model._meta.app_label in REPLICATED_APP_LABELS:
+            state.wrote = True
+        logger.debug('write %s -> %s', model._meta.label, PRIMARY_DB)
+        return PRIMARY_DB
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY_DB, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive their schema from the primary
+        if db in get_replicas():
+            return False
+        return None
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Track whether a request wrote to the primary and keep that session's
+    reads on the primary for a short window afterwards.
+    Must come after SessionMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not get_replicas():
+            return self.get_response(request)
+
+        pinned_until = request.session.get(STICKY_SESSION_KEY, 0)
+        state = RoutingState(sticky=pinned_until > time.time())
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+
+        if state.wrote:
+            window = getattr(settings, 'REPLICA_STICKY_SECONDS', 10)
+            request.session[STICKY_SESSION_KEY] = time.time() + window
+        logger.info(
+            '%s %s routed reads to %s',
+            request.method,
+            request.path,
+            state.replica or PRIMARY_DB,
+        )
+        return response
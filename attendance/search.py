@@ -0,0 +1,147 @@
+"""
+Indexed search over students and schedules.
+
+On SQLite the searchable text is mirrored into FTS5 virtual tables that are
+kept in sync by signals (see signals.py) and can be rebuilt with the
+`rebuild_search_index` command. On PostgreSQL the columns carry trigram GIN
+indexes, so plain icontains/istartswith lookups are index-backed and no
+mirror table is needed. Any other backend falls back to unindexed lookups.
+"""
+
+import re
+
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Student, Schedule
+from .tenancy import current_connection
+
+STUDENT_FTS_TABLE = 'attendance_student_fts'
+SCHEDULE_FTS_TABLE = 'attendance_schedule_fts'
+
+TYPEAHEAD_LIMIT = 10
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def uses_fts():
+    """Return True when the database being served keeps FTS5 mirror tables."""
+    return current_connection().vendor == 'sqlite'
+
+
+def build_match_query(term):
+    """
+    Turn free text into an FTS5 MATCH expression.
+    Every word must match as a prefix, so "dat str" finds "Data Structures".
+    """
+    tokens = _TOKEN_RE.findall(term)
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def _fts_filter(queryset, table, term):
+    """Filter by primary key against an FTS5 MATCH subquery."""
+    match = build_match_query(term)
+    if not match:
+        return queryset
+    return queryset.filter(
+        pk__in=RawSQL(f'SELECT rowid FROM {table} WHERE {table} MATCH %s', [match])
+    )
+
+
+def _fallback_filter(queryset, fields, term, prefix=False):
+    """Filter with one OR'ed lookup per field for every word in term."""
+    lookup = 'istartswith' if prefix else 'icontains'
+    for token in _TOKEN_RE.findall(term):
+        condition = Q()
+        for field in fields:
+            condition |= Q(**{f'{field}__{lookup}': token})
+        queryset = queryset.filter(condition)
+    return queryset
+
+
+# ============================================================================
+# QUERIES
+# ============================================================================
+
+STUDENT_SEARCH_FIELDS = ('hall_ticket_id', 'name', 'user__username')
+SCHEDULE_SEARCH_FIELDS = ('subject', 'topic', 'faculty__name')
+
+
+def search_students(queryset, term, prefix=False):
+    """
+    Restrict a Student queryset to rows matching the search term.
+    FTS5 always matches word prefixes; `prefix` selects istartswith over
+    icontains on the other backends.
+    """
+    if not term.strip():
+        return queryset
+    if uses_fts():
+        return _fts_filter(queryset, STUDENT_FTS_TABLE, term)
+    return _fallback_filter(queryset, STUDENT_SEARCH_FIELDS, term, prefix=prefix)
+
+
+def search_schedules(queryset, term, prefix=False):
+    """Restrict a Schedule queryset to rows matching the search term."""
+    if not term.strip():
+        return queryset
+    if uses_fts():
+        return _fts_filter(queryset, SCHEDULE_FTS_TABLE, term)
+    return _fallback_filter(queryset, SCHEDULE_SEARCH_FIELDS, term, prefix=prefix)
+
+
+# ============================================================================
+# INDEX MAINTENANCE (SQLite only)
+# ============================================================================
+
+_STUDENT_SELECT = (
+    'SELECT s.id, s.hall_ticket_id, s.name, u.username '
+    'FROM attendance_student s JOIN auth_user u ON u.id = s.user_id'
+)
+_SCHEDULE_SELECT = (
+    'SELECT sc.id, sc.subject, sc.topic, f.name '
+    'FROM attendance_schedule sc JOIN attendance_faculty f ON f.id = sc.faculty_id'
+)
+
+
+def _sync(table, select_sql, columns, where, params):
+    """Replace the mirror rows selected by `where` in one DELETE and one INSERT."""
+    with current_connection().cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {table} WHERE rowid IN (SELECT id FROM ({select_sql} WHERE {where}))',
+            params,
+        )
+        cursor.execute(
+            f'INSERT INTO {table} (rowid, {columns}) {select_sql} WHERE {where}', params
+        )
+
+
+def index_students(where='1=1', params=()):
+    """Refresh the student mirror rows selected by a SQL condition on s/u."""
+    if uses_fts():
+        _sync(STUDENT_FTS_TABLE, _STUDENT_SELECT, 'hall_ticket_id, name, username', where, params)
+
+
+def index_schedules(where='1=1', params=()):
+    """Refresh the schedule mirror rows selected by a SQL condition on sc/f."""
+    if uses_fts():
+        _sync(SCHEDULE_FTS_TABLE, _SCHEDULE_SELECT, 'subject, topic, faculty_name', where, params)
+
+
+def unindex(table, ids):
+    """Drop mirror rows for deleted objects."""
+    if uses_fts() and ids:
+        placeholders = ', '.join(['%s'] * len(ids))
+        with current_connection().cursor() as cursor:
+            cursor.execute(f'DELETE FROM {table} WHERE rowid IN ({placeholders})', list(ids))
+
+
+def rebuild_index():
+    """Rebuild both mirror tables from scratch and return their row counts."""
+    if not uses_fts():
+        return None
+    with current_connection().cursor() as cursor:
+        cursor.execute(f'DELETE FROM {STUDENT_FTS_TABLE}')
+        cursor.execute(f'DELETE FROM {SCHEDULE_FTS_TABLE}')
+    index_students()
+    index_schedules()
+    return Student.objects.count(), Schedule.objects.count()
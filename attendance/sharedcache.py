@@ -0,0 +1,317 @@
+"""
+Cache backend shared by every worker process on a host, without a server.
+
+Entries live in one SQLite file in WAL mode, read through a memory map, so
+readers never block each other or a writer and a value written by one
+process is seen by all the others. Integers are stored as SQLite integers,
+which lets incr() update version counters atomically in one statement.
+
+The file is bounded by MAX_ENTRIES and MAX_BYTES. Triggers keep a running
+count of both, so every write can check the bounds without scanning. Once
+a bound is passed, expired entries go first, then the least recently used
+ones. Reads refresh an entry's last use at most every LRU_RESOLUTION
+seconds, so a hot key does not turn every read into a write. A value
+larger than the culling target (MAX_BYTES less a 1/CULL_FREQUENCY slice)
+would evict every other entry, so it is not stored: set() drops the key,
+add() returns False and set_many() returns it among the failed keys.
+incr() raises OverflowError rather than leave the 64-bit integer range.
+
+    CACHES = {'default': {
+        'BACKEND': 'attendance.sharedcache.SharedSQLiteCache',
+        'LOCATION': '/var/tmp/attendance-cache.sqlite3',
+        'OPTIONS': {'MAX_ENTRIES': 100000, 'MAX_BYTES': 256 * 1024 * 1024},
+    }}
+"""
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires REAL,
+    accessed REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed);
+CREATE TABLE IF NOT EXISTS cache_totals (entries INTEGER NOT NULL, bytes INTEGER NOT NULL);
+INSERT INTO cache_totals SELECT 0, 0 WHERE NOT EXISTS (SELECT 1 FROM cache_totals);
+CREATE TRIGGER IF NOT EXISTS cache_inserted AFTER INSERT ON cache BEGIN
+    UPDATE cache_totals SET entries = entries + 1, bytes = bytes + NEW.size;
+END;
+CREATE TRIGGER IF NOT EXISTS cache_deleted AFTER DELETE ON cache BEGIN
+    UPDATE cache_totals SET entries = entries - 1, bytes = bytes - OLD.size;
+END;
+CREATE TRIGGER IF NOT EXISTS cache_resized AFTER UPDATE OF size ON cache BEGIN
+    UPDATE cache_totals SET bytes = bytes - OLD.size + NEW.size;
+END;
+"""
+
+UPSERT = """
+INSERT INTO cache (key, value, size, expires, accessed) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET
+    value = excluded.value, size = excluded.size,
+    expires = excluded.expires, accessed = excluded.accessed
+"""
+
+LIVE = '(expires IS NULL OR expires > ?)'
+
+# SQLite stores integers in this range natively; anything else is pickled
+INTEGER_RANGE = range(-2 ** 63, 2 ** 63)
+
+# Bound on the number of SQL variables in one IN (...) list
+BATCH_SIZE = 500
+
+
+class SharedSQLiteCache(BaseCache):
+    """Django cache backend storing entries in a WAL-mode SQLite file."""
+
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.path = location
+        self.max_bytes = options.get('MAX_BYTES')
+        self.lru_resolution = options.get('LRU_RESOLUTION', 1.0)
+        self.busy_timeout = options.get('BUSY_TIMEOUT', 5.0)
+        self.mmap_size = options.get('MMAP_SIZE', 256 * 1024 * 1024)
+        self._local = threading.local()
+
+    # ------------------------------------------------------------------
+    # Connections
+    # ------------------------------------------------------------------
+
+    @property
+    def _db(self):
+        # One connection per thread, reopened in a forked worker
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != os.getpid():
+            db = self._connect()
+            self._local.db, self._local.pid = db, os.getpid()
+        return db
+
+    def _connect(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        db = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None,
+                             check_same_thread=False)
+        db.execute('PRAGMA journal_mode = WAL')
+        db.execute('PRAGMA synchronous = NORMAL')
+        db.execute(f'PRAGMA mmap_size = {int(self.mmap_size)}')
+        try:
+            db.executescript(f'BEGIN IMMEDIATE; {SCHEMA} COMMIT;')
+        except BaseException:
+            if db.in_transaction:
+                db.execute('ROLLBACK')
+            raise
+        return db
+
+    def close(self, **kwargs):
+        # Django closes caches after every request; the connections are kept
+        pass
+
+    # ------------------------------------------------------------------
+    # Encoding
+    # ------------------------------------------------------------------
+
+    def _encode(self, value):
+        if type(value) is int and value in INTEGER_RANGE:
+            return value, 8
+        data = pickle.dumps(value, self.pickle_protocol)
+        return data, len(data)
+
+    @staticmethod
+    def _decode(value):
+        return value if isinstance(value, int) else pickle.loads(value)
+
+    # ------------------------------------------------------------------
+    # Bounds
+    # ------------------------------------------------------------------
+
+    def _over_bounds(self, db):
+        entries, size = db.execute('SELECT entries, bytes FROM cache_totals').fetchone()
+        return entries > self._max_entries or (self.max_bytes is not None and size > self.max_bytes)
+
+    def _cull(self, db):
+        """Drop expired entries, then least recently used ones until within bounds."""
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            db.execute('DELETE FROM cache WHERE expires <= ?', [time.time()])
+            entries, size = db.execute('SELECT entries, bytes FROM cache_totals').fetchone()
+            # Like Django's backends, cull a 1/CULL_FREQUENCY slice beyond the bound
+            if entries > self._max_entries:
+                excess = entries - self._max_entries + self._max_entries // self._cull_frequency
+                db.execute(
+                    'DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed LIMIT ?)',
+                    [excess],
+                )
+                size = db.execute('SELECT bytes FROM cache_totals').fetchone()[0]
+            if self.max_bytes is not None and size > self.max_bytes:
+                # Keep the most recently used entries that fit in the target
+                target = self.max_bytes - self.max_bytes // self._cull_frequency
+                db.execute(
+                    'DELETE FROM cache WHERE key IN (SELECT key FROM ('
+                    '  SELECT key, SUM(size) OVER ('
+                    '    ORDER BY accessed DESC, key ROWS UNBOUNDED PRECEDING'
+                    '  ) AS kept FROM cache'
+                    ') WHERE kept > ?)',
+                    [target],
+                )
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+
+    def _fits(self, size):
+        # Culling keeps the most recent entries within this target
+        return self.max_bytes is None or size <= self.max_bytes - self.max_bytes // self._cull_frequency
+
+    def _written(self, db):
+        if self._over_bounds(db):
+            self._cull(db)
+
+    # ------------------------------------------------------------------
+    # Cache API
+    # ------------------------------------------------------------------
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        db = self._db
+        row = db.execute(
+            f'SELECT value, accessed FROM cache WHERE key = ? AND {LIVE}', [key, now]
+        ).fetchone()
+        if row is None:
+            return default
+        if row[1] < now - self.lru_resolution:
+            db.execute('UPDATE cache SET accessed = ? WHERE key = ?', [now, key])
+        return self._decode(row[0])
+
+    def get_many(self, keys, version=None):
+        keys = {self.make_and_validate_key(key, version=version): key for key in keys}
+        now = time.time()
+        db = self._db
+        found, touched = {}, []
+        stored = list(keys)
+        for start in range(0, len(stored), BATCH_SIZE):
+            batch = stored[start:start + BATCH_SIZE]
+            placeholders = ', '.join('?' * len(batch))
+            rows = db.execute(
+                f'SELECT key, value, accessed FROM cache WHERE key IN ({placeholders}) AND {LIVE}',
+                batch + [now],
+            )
+            for key, value, accessed in rows:
+                found[keys[key]] = self._decode(value)
+                if accessed < now - self.lru_resolution:
+                    touched.append((now, key))
+        if touched:
+            db.executemany('UPDATE cache SET accessed = ? WHERE key = ?', touched)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        value, size = self._encode(value)
+        db = self._db
+        if not self._fits(size):
+            db.execute('DELETE FROM cache WHERE key = ?', [key])
+            return
+        db.execute(UPSERT, [key, value, size, self.get_backend_timeout(timeout), time.time()])
+        self._written(db)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires, now = self.get_backend_timeout(timeout), time.time()
+        rows, failed = [], []
+        for key, value in data.items():
+            value, size = self._encode(value)
+            if self._fits(size):
+                rows.append((self.make_and_validate_key(key, version=version), value, size, expires, now))
+            else:
+                failed.append(key)
+        db = self._db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            db.executemany(UPSERT, rows)
+            db.executemany(
+                'DELETE FROM cache WHERE key = ?',
+                [(self.make_and_validate_key(key, version=version),) for key in failed],
+            )
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        self._written(db)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        value, size = self._encode(value)
+        if not self._fits(size):
+            return False
+        now = time.time()
+        db = self._db
+        # Only an expired entry may be overwritten
+        cursor = db.execute(
+            UPSERT + ' WHERE cache.expires IS NOT NULL AND cache.expires <= ?',
+            [key, value, size, self.get_backend_timeout(timeout), now, now],
+        )
+        added = cursor.rowcount > 0
+        if added:
+            self._written(db)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._db.execute(
+            f'UPDATE cache SET expires = ? WHERE key = ? AND {LIVE}',
+            [self.get_backend_timeout(timeout), key, time.time()],
+        )
+        return cursor.rowcount > 0
+
+    def incr(self, key, delta=1, version=None):
+        """Add `delta` to an integer in a single statement, atomic across processes."""
+        stored = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        db = self._db
+        # SQLite turns an overflowing sum into a REAL, so refuse it instead
+        if delta >= 0:
+            bound, limit = 'value <= ?', INTEGER_RANGE[-1] - delta
+        else:
+            bound, limit = 'value >= ?', INTEGER_RANGE[0] - delta
+        row = db.execute(
+            f"UPDATE cache SET value = value + ?, accessed = ? "
+            f"WHERE key = ? AND typeof(value) = 'integer' AND {bound} AND {LIVE} RETURNING value",
+            [delta, now, stored, limit, now],
+        ).fetchone()
+        if row is not None:
+            return row[0]
+        if db.execute(
+            f"SELECT 1 FROM cache WHERE key = ? AND typeof(value) = 'integer' AND {LIVE}", [stored, now]
+        ).fetchone():
+            raise OverflowError(f"Adding {delta} to '{key}' leaves the 64-bit integer range")
+        raise ValueError(f"Key '{key}' not found")
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._db.execute(
+            f'SELECT 1 FROM cache WHERE key = ? AND {LIVE}', [key, time.time()]
+        ).fetchone() is not None
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._db.execute('DELETE FROM cache WHERE key = ?', [key]).rowcount > 0
+
+    def delete_many(self, keys, version=None):
+        keys = [(self.make_and_validate_key(key, version=version),) for key in keys]
+        if keys:
+            self._db.executemany('DELETE FROM cache WHERE key = ?', keys)
+
+    def clear(self):
+        self._db.execute('DELETE FROM cache')
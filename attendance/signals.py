@@ -0,0 +1,192 @@
+"""
+Signal handlers for the attendance app.
+Keeps derived data (the search index, caches, rollups and denormalized
+cohort columns) in step with model writes.
+
+Cache invalidations and version bumps run once the write commits. Bumped
+earlier, a request could still read the old rows before the commit and
+cache them, or answer 304 for them, under the new version.
+"""
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import photos, rollups, search
+from .cache import (
+    invalidate_cohort_rosters, invalidate_student_summaries, bump_student_versions, bump_cohort_version
+)
+from .models import Student, Faculty, Schedule, Attendance, AttendanceBitmap
+from .tenancy import current_database
+
+
+@receiver(pre_save, sender=Student)
+def remember_student_photo(sender, instance, update_fields=None, **kwargs):
+    """Note the stored photo name, to spot a replaced photo after the save."""
+    if update_fields is None or 'photo' in update_fields:
+        instance._previous_photo = (
+            Student.objects.filter(pk=instance.pk).values_list('photo', flat=True).first() or ''
+            if instance.pk else ''
+        )
+
+
+@receiver(post_save, sender=Student)
+def index_student(sender, instance, **kwargs):
+    """Refresh the search entry and cohort rosters after a student is saved."""
+    search.index_students('s.id = %s', [instance.pk])
+    transaction.on_commit(invalidate_cohort_rosters, using=current_database())
+
+
+@receiver(post_save, sender=Student)
+def process_student_photo(sender, instance, **kwargs):
+    """Thumbnail a new photo and remove the files of the one it replaced."""
+    previous = instance.__dict__.pop('_previous_photo', None)
+    if previous is not None and previous != instance.photo.name:
+        photos.photo_changed(previous, instance.photo.name)
+
+
+@receiver(post_delete, sender=Student)
+def unindex_student(sender, instance, **kwargs):
+    """Remove a deleted student from the search index and cohort rosters."""
+    search.unindex(search.STUDENT_FTS_TABLE, [instance.pk])
+    transaction.on_commit(invalidate_cohort_rosters, using=current_database())
+    if instance.photo:
+        photos.photo_changed(instance.photo.name, '')
+
+
+@receiver(post_save, sender=User)
+def index_user_student(sender, instance, created, **kwargs):
+    """Usernames are searchable, so re-index the linked student on change."""
+    if not created:
+        search.index_students('u.id = %s', [instance.pk])
+
+
+@receiver(pre_save, sender=Schedule)
+def set_schedule_cohort(sender, instance, update_fields=None, **kwargs):
+    """
+    Copy the faculty's cohort onto a new class, or a class given to another
+    faculty. Later changes to the faculty leave past classes in the cohort
+    they were held for, like their rollups.
+    """
+    if update_fields is not None and not {'faculty', 'date'} & set(update_fields):
+        return
+    previous = (
+        Schedule.objects.filter(pk=instance.pk)
+        .values('branch', 'year', 'faculty_id', 'date').first()
+        if instance.pk else None
+    )
+    # The rollup row the class was counted under, for move_schedule_rollup
+    instance._previous_rollup = previous
+    if update_fields is not None and 'faculty' not in update_fields:
+        return
+    previous_faculty_id = previous['faculty_id'] if previous else None
+    if instance.branch is None or previous_faculty_id != instance.faculty_id:
+        instance.branch, instance.year = instance.faculty.branch, instance.faculty.year
+        instance._cohort_moved = previous is not None
+        if previous and (previous['branch'], previous['year']) != (instance.branch, instance.year):
+            # Its old cohort's pages list it too, for bump_schedule_cohort_version
+            instance._previous_cohort = previous['branch'], previous['year']
+
+
+@receiver(post_save, sender=Schedule)
+def move_schedule_attendance(sender, instance, **kwargs):
+    """Carry a reassigned class's faculty and cohort over to its attendance records."""
+    if instance.__dict__.pop('_cohort_moved', False):
+        # update() skips auto_now; incremental exports and alerts look for updated_at
+        Attendance.objects.filter(schedule=instance).update(
+            faculty_id=instance.faculty_id, branch=instance.branch, year=instance.year,
+            updated_at=timezone.now(),
+        )
+
+
+@receiver(post_save, sender=Schedule)
+def move_schedule_rollup(sender, instance, **kwargs):
+    """Count a class moved to another day, faculty or cohort under its new rollup row."""
+    previous = instance.__dict__.pop('_previous_rollup', None)
+    if previous is None:
+        return
+    current = {
+        'branch': instance.branch, 'year': instance.year,
+        'faculty_id': instance.faculty_id, 'date': instance.date,
+    }
+    if previous != current:
+        rollups.forget_rollup(**previous)
+        rollups.queue_rollup_refresh([instance.pk])
+
+
+@receiver(post_save, sender=Schedule)
+def index_schedule(sender, instance, **kwargs):
+    """Refresh the search entry of a saved schedule."""
+    search.index_schedules('sc.id = %s', [instance.pk])
+
+
+@receiver(post_delete, sender=Schedule)
+def unindex_schedule(sender, instance, **kwargs):
+    """Remove a deleted schedule from the search index."""
+    search.unindex(search.SCHEDULE_FTS_TABLE, [instance.pk])
+
+
+@receiver(post_delete, sender=Schedule)
+def forget_schedule_rollup(sender, instance, **kwargs):
+    """Drop the rollup row of a deleted class."""
+    rollups.forget_rollup(instance.branch, instance.year, instance.faculty_id, instance.date)
+
+
+@receiver(post_save, sender=Schedule)
+@receiver(post_delete, sender=Schedule)
+def bump_schedule_cohort_version(sender, instance, **kwargs):
+    """
+    Student pages list class details, so a class change outdates the pages
+    of the cohort it was held for, and of its previous cohort after a move.
+    """
+    cohorts = {(instance.branch, instance.year)}
+    previous = instance.__dict__.pop('_previous_cohort', None)
+    if previous is not None:
+        cohorts.add(previous)
+
+    def bump():
+        for branch, year in cohorts:
+            bump_cohort_version(branch, year)
+
+    transaction.on_commit(bump, using=current_database())
+
+
+@receiver(post_save, sender=Faculty)
+def index_faculty_schedules(sender, instance, created, **kwargs):
+    """Faculty names are searchable on schedules, so re-index them on change."""
+    if not created:
+        search.index_schedules('f.id = %s', [instance.pk])
+
+
+@receiver(pre_save, sender=Attendance)
+def set_attendance_cohort(sender, instance, **kwargs):
+    """Copy the class's faculty and cohort onto a new attendance record."""
+    if instance.faculty_id is None:
+        schedule = instance.schedule
+        instance.faculty_id, instance.branch, instance.year = (
+            schedule.faculty_id, schedule.branch, schedule.year
+        )
+
+
+@receiver(post_save, sender=Attendance)
+@receiver(post_delete, sender=Attendance)
+def invalidate_attendance_summary(sender, instance, **kwargs):
+    """Drop the cached dashboard totals and page ETags of the affected student."""
+    student_ids = [instance.student_id]
+
+    def invalidate():
+        invalidate_student_summaries(student_ids)
+        bump_student_versions(student_ids)
+
+    transaction.on_commit(invalidate, using=current_database())
+
+
+@receiver(post_save, sender=Attendance)
+@receiver(post_delete, sender=Attendance)
+@receiver(post_save, sender=AttendanceBitmap)
+@receiver(post_delete, sender=AttendanceBitmap)
+def refresh_schedule_rollup(sender, instance, **kwargs):
+    """Recount the class's rollup once the write commits, whichever code path made it."""
+    rollups.queue_rollup_refresh([instance.schedule_id])
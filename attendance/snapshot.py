@@ -0,0 +1,329 @@
+"""
+Point-in-time columnar export of the attendance data for offline analysis.
+
+On SQLite the live database is first copied with the online backup API, so
+the export reads a private copy and never holds locks on the live file. On
+other databases the export runs inside one REPEATABLE READ transaction.
+
+Each table is read in chunks of `chunk_size` rows, so memory stays bounded
+whatever the table size. Parquet (pyarrow) writes one row group per chunk
+into one file per table. NumPy writes one compressed `.npz` part per chunk.
+Either way, string columns are dictionary-encoded.
+
+Exports are recorded in `manifest.json` in the output directory, together
+with each table's high-water mark. An incremental export then only holds
+the rows created or updated since the previous export.
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.db import models, transaction
+from django.utils import timezone
+
+from .models import Student, Faculty, Schedule, Attendance
+from .tenancy import current_connection
+
+DEFAULT_CHUNK_SIZE = 50000
+MANIFEST_NAME = 'manifest.json'
+
+# Exported models, with the column that marks new or changed rows.
+# Schedule has no updated_at, so edits to existing classes only appear in
+# full exports; deletions likewise only show up in full exports.
+EXPORTS = [
+    (Student, 'updated_at'),
+    (Faculty, 'updated_at'),
+    (Schedule, 'created_at'),
+    (Attendance, 'updated_at'),
+]
+
+KIND_INT = 'int'
+KIND_BOOL = 'bool'
+KIND_STRING = 'string'
+KIND_DATE = 'date'
+KIND_DATETIME = 'datetime'
+
+
+class SnapshotError(Exception):
+    """Raised when an export cannot be produced."""
+
+
+def available_formats():
+    """Output formats whose libraries are installed, preferred first."""
+    formats = []
+    try:
+        import pyarrow  # noqa: F401
+        formats.append('parquet')
+    except ImportError:
+        pass
+    try:
+        import numpy  # noqa: F401
+        formats.append('npz')
+    except ImportError:
+        pass
+    return formats
+
+
+def _column_kind(field):
+    if isinstance(field, models.DateTimeField):
+        return KIND_DATETIME
+    if isinstance(field, models.DateField):
+        return KIND_DATE
+    if isinstance(field, models.BooleanField):
+        return KIND_BOOL
+    if isinstance(field, (models.AutoField, models.IntegerField, models.ForeignKey)):
+        return KIND_INT
+    return KIND_STRING
+
+
+def table_columns(model):
+    """[(column name, kind)] of a model's concrete fields."""
+    return [(field.column, _column_kind(field)) for field in model._meta.concrete_fields]
+
+
+# ============================================================================
+# CONSISTENT READS
+# ============================================================================
+
+@contextmanager
+def consistent_cursor():
+    """
+    Yield a DB-API cursor that sees one point in time: a backup copy on
+    SQLite, a REPEATABLE READ transaction elsewhere.
+    """
+    connection = current_connection()
+    if connection.vendor == 'sqlite':
+        connection.ensure_connection()
+        with tempfile.TemporaryDirectory() as directory:
+            copy = sqlite3.connect(os.path.join(directory, 'snapshot.sqlite3'))
+            try:
+                connection.connection.backup(copy)
+                yield copy.cursor()
+            finally:
+                copy.close()
+    else:
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+            yield cursor
+
+
+def iter_chunks(cursor, model, since_column=None, since=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield lists of row tuples of a model's table, in primary key order."""
+    columns = ', '.join(column for column, _ in table_columns(model))
+    sql = f'SELECT {columns} FROM {model._meta.db_table}'
+    params = []
+    if since is not None:
+        sql += f' WHERE {since_column} > %s'
+        params.append(since)
+    sql += f' ORDER BY {model._meta.pk.column}'
+    if isinstance(cursor, sqlite3.Cursor):
+        sql = sql.replace('%s', '?')
+    cursor.execute(sql, params)
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield rows
+
+
+def _to_naive_utc(value):
+    """Normalise a datetime from any backend to naive UTC."""
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        value = value.astimezone(dt_timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _normalise(value, kind):
+    # SQLite returns dates and datetimes as ISO strings, other backends as objects
+    if value is None:
+        return None
+    if kind == KIND_DATETIME:
+        value = _to_naive_utc(value)
+        return value.isoformat(sep=' ') if isinstance(value, datetime) else value
+    if kind == KIND_DATE:
+        return value.isoformat() if isinstance(value, date) else value
+    return value
+
+
+def chunk_columns(model, rows):
+    """Transpose a chunk of rows into {column: (kind, values)}."""
+    columns = {}
+    for index, (column, kind) in enumerate(table_columns(model)):
+        columns[column] = (kind, [_normalise(row[index], kind) for row in rows])
+    return columns
+
+
+# ============================================================================
+# WRITERS
+# ============================================================================
+
+class NpzWriter:
+    """One compressed .npz part per chunk, strings as codes plus a dictionary."""
+
+    def __init__(self, directory, table):
+        import numpy
+        self.numpy = numpy
+        self.directory = os.path.join(directory, table)
+        os.makedirs(self.directory, exist_ok=True)
+        self.parts = 0
+
+    def _arrays(self, column, kind, values):
+        np = self.numpy
+        if kind == KIND_STRING:
+            strings = np.array(['' if value is None else value for value in values], dtype=str)
+            dictionary, codes = np.unique(strings, return_inverse=True)
+            return {f'{column}.codes': codes.astype(np.int32), f'{column}.dictionary': dictionary}
+        if kind == KIND_DATETIME:
+            return {column: np.array(values, dtype='datetime64[us]')}
+        if kind == KIND_DATE:
+            return {column: np.array(values, dtype='datetime64[D]')}
+        if kind == KIND_BOOL:
+            return {column: np.array(values, dtype=bool)}
+        return {column: np.array(values, dtype=np.int64)}
+
+    def write(self, columns):
+        arrays = {}
+        for column, (kind, values) in columns.items():
+            arrays.update(self._arrays(column, kind, values))
+        path = os.path.join(self.directory, f'part-{self.parts:05d}.npz')
+        self.numpy.savez_compressed(path, **arrays)
+        self.parts += 1
+
+    def close(self):
+        pass
+
+
+class ParquetWriter:
+    """One Parquet file per table, one row group per chunk."""
+
+    def __init__(self, directory, table):
+        import pyarrow
+        import pyarrow.parquet
+        self.pa = pyarrow
+        self.path = os.path.join(directory, f'{table}.parquet')
+        self.parquet = pyarrow.parquet
+        self.writer = None
+
+    def _array(self, kind, values):
+        pa = self.pa
+        if kind == KIND_STRING:
+            return pa.array(values, type=pa.string()).dictionary_encode()
+        if kind == KIND_DATETIME:
+            return pa.array(
+                [datetime.fromisoformat(value) if value else None for value in values],
+                type=pa.timestamp('us'),
+            )
+        if kind == KIND_DATE:
+            return pa.array(
+                [date.fromisoformat(value) if value else None for value in values],
+                type=pa.date32(),
+            )
+        if kind == KIND_BOOL:
+            return pa.array([None if value is None else bool(value) for value in values], type=pa.bool_())
+        return pa.array(values, type=pa.int64())
+
+    def write(self, columns):
+        table = self.pa.table({
+            column: self._array(kind, values) for column, (kind, values) in columns.items()
+        })
+        if self.writer is None:
+            self.writer = self.parquet.ParquetWriter(self.path, table.schema, compression='zstd')
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+WRITERS = {'npz': NpzWriter, 'parquet': ParquetWriter}
+
+
+# ============================================================================
+# EXPORT
+# ============================================================================
+
+def read_manifest(output):
+    """The export manifest of an output directory."""
+    path = os.path.join(output, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {'snapshots': []}
+    with open(path) as manifest:
+        return json.load(manifest)
+
+
+def _write_manifest(output, manifest):
+    path = os.path.join(output, MANIFEST_NAME)
+    with open(path + '.tmp', 'w') as handle:
+        json.dump(manifest, handle, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def _max_value(current, values):
+    present = [value for value in values if value is not None]
+    if not present:
+        return current
+    latest = max(present)
+    return latest if current is None or latest > current else current
+
+
+def export_snapshot(output, output_format=None, incremental=False,
+                    chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """
+    Export every table into a new snapshot directory under `output` and
+    record it in the manifest. Returns the snapshot's manifest entry.
+    """
+    formats = available_formats()
+    output_format = output_format or (formats[0] if formats else None)
+    if output_format is None:
+        raise SnapshotError('Install pyarrow (Parquet) or numpy (.npz) to export snapshots.')
+    if output_format not in formats:
+        raise SnapshotError(f'The {output_format} format needs a library that is not installed.')
+
+    os.makedirs(output, exist_ok=True)
+    manifest = read_manifest(output)
+    previous = manifest['snapshots'][-1] if manifest['snapshots'] else None
+    if incremental and previous is None:
+        raise SnapshotError('There is no earlier snapshot to export changes since.')
+
+    name = timezone.now().strftime('%Y%m%dT%H%M%S%f')
+    directory = os.path.join(output, name)
+    os.makedirs(directory)
+    entry = {
+        'name': name,
+        'format': output_format,
+        'kind': 'incremental' if incremental else 'full',
+        'base': previous['name'] if incremental else None,
+        'tables': {},
+    }
+
+    with consistent_cursor() as cursor:
+        for model, since_column in EXPORTS:
+            table = model._meta.db_table
+            since = previous['tables'][table]['high_water_mark'] if incremental else None
+            high_water_mark = since
+            rows_written = 0
+            writer = WRITERS[output_format](directory, table)
+            try:
+                for rows in iter_chunks(cursor, model, since_column, since, chunk_size):
+                    columns = chunk_columns(model, rows)
+                    writer.write(columns)
+                    rows_written += len(rows)
+                    high_water_mark = _max_value(high_water_mark, columns[since_column][1])
+                    if progress:
+                        progress(f'{table}: {rows_written} rows')
+            finally:
+                writer.close()
+            entry['tables'][table] = {
+                'rows': rows_written,
+                'columns': dict(table_columns(model)),
+                'high_water_mark': high_water_mark,
+            }
+
+    manifest['snapshots'].append(entry)
+    _write_manifest(output, manifest)
+    return entry
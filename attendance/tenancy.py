@@ -0,0 +1,257 @@
+"""
+Serving several colleges from one deployment.
+
+settings.TENANTS maps each college's slug to its database alias, a SQLite
+file or a PostgreSQL schema of its own, and to the host names it is served
+on. TenantMiddleware resolves the tenant of a request from its host, or
+from the first path segment when TENANT_RESOLUTION is 'path', and serves
+the request inside use_tenant().
+
+Inside use_tenant() TenantRouter sends every ORM query to the tenant's
+alias. Each tenant alias keeps its own connections, persistent ones
+included. Code that opens a transaction, registers an on_commit()
+callback or runs raw SQL names the database with current_database() or
+current_connection(), as django.db.connection and a bare
+transaction.atomic() always mean the default database. make_cache_key
+puts the tenant in every cache key, so colleges never see each other's
+rosters, summaries or data versions.
+
+Commands built on TenantCommand take --tenant and --all-tenants, and run
+once per tenant, each tenant in its own process, --parallel at a time.
+"""
+
+import contextvars
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import Http404
+from django.urls import get_script_prefix, set_script_prefix
+
+_tenant = contextvars.ContextVar('attendance_tenant', default=None)
+
+
+class TenantError(Exception):
+    """Raised for an unknown tenant."""
+
+
+def get_tenants():
+    """Return the configured {slug: config} of every tenant."""
+    return getattr(settings, 'TENANTS', {})
+
+
+def current_tenant():
+    """Slug of the tenant being served, or None outside use_tenant()."""
+    return _tenant.get()
+
+
+def tenant_database(slug):
+    """Database alias of a tenant."""
+    try:
+        return get_tenants()[slug]['DATABASE']
+    except KeyError:
+        raise TenantError(f'Unknown tenant "{slug}".') from None
+
+
+def current_database():
+    """Alias of the database being served: the current tenant's, or the default one."""
+    slug = _tenant.get()
+    return tenant_database(slug) if slug is not None else DEFAULT_DB_ALIAS
+
+
+def current_connection():
+    """Connection to current_database(), for raw SQL."""
+    return connections[current_database()]
+
+
+@contextmanager
+def use_tenant(slug):
+    """
+    Run a block against one tenant's database and cache keys. With slug
+    None the block runs unscoped, against the default database.
+    """
+    if slug is None:
+        yield
+        return
+    tenant_database(slug)
+    token = _tenant.set(slug)
+    try:
+        yield
+    finally:
+        _tenant.reset(token)
+
+
+def prepare_tenant_database(slug):
+    """Create the PostgreSQL schema of a tenant that keeps its tables in one."""
+    schema = get_tenants()[slug].get('SCHEMA')
+    connection = connections[tenant_database(slug)]
+    if schema and connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(f'CREATE SCHEMA IF NOT EXISTS {connection.ops.quote_name(schema)}')
+
+
+def make_cache_key(key, key_prefix, version):
+    """Cache KEY_FUNCTION scoping every key to the current tenant."""
+    return f'{key_prefix}:{version}:{_tenant.get() or ""}:{key}'
+
+
+# ============================================================================
+# ROUTING
+# ============================================================================
+
+class TenantRouter:
+    """Send every read and write made for a tenant to the tenant's database."""
+
+    def db_for_read(self, model, **hints):
+        slug = _tenant.get()
+        return tenant_database(slug) if slug is not None else None
+
+    db_for_write = db_for_read
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {config['DATABASE'] for config in get_tenants().values()}
+        if obj1._state.db in aliases or obj2._state.db in aliases:
+            return obj1._state.db == obj2._state.db
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Every tenant database holds the whole schema, auth and sessions included
+        return None
+
+
+class TenantMiddleware:
+    """
+    Resolve the tenant of a request and serve it inside use_tenant().
+    Must come before SessionMiddleware: sessions live in the tenant's database.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.hosts = {
+            host.lower(): slug
+            for slug, config in get_tenants().items()
+            for host in config.get('HOSTS', [])
+        }
+
+    def __call__(self, request):
+        if not get_tenants():
+            return self.get_response(request)
+        # Static and media files are shared by every tenant
+        if request.path_info.startswith((settings.STATIC_URL, settings.MEDIA_URL)):
+            return self.get_response(request)
+
+        if getattr(settings, 'TENANT_RESOLUTION', 'host') == 'path':
+            return self.serve_from_path(request)
+        slug = self.hosts.get(request.get_host().rsplit(':', 1)[0].lower())
+        if slug is None:
+            raise Http404('No college is served on this host.')
+        request.tenant = slug
+        with use_tenant(slug):
+            return self.get_response(request)
+
+    def serve_from_path(self, request):
+        """Serve /<slug>/... with the slug moved into the script prefix."""
+        slug, _, rest = request.path_info.lstrip('/').partition('/')
+        if slug not in get_tenants():
+            raise Http404('No college is served at this address.')
+        script_name = f"{request.META.get('SCRIPT_NAME', '').rstrip('/')}/{slug}"
+        request.META['SCRIPT_NAME'] = script_name
+        request.path_info = f'/{rest}'
+        request.path = f'{script_name}{request.path_info}'
+        request.tenant = slug
+
+        # reverse() and redirects then keep the tenant in every URL
+        previous_prefix = get_script_prefix()
+        set_script_prefix(f'{script_name}/')
+        try:
+            with use_tenant(slug):
+                return self.get_response(request)
+        finally:
+            set_script_prefix(previous_prefix)
+
+
+# ============================================================================
+# MANAGEMENT COMMANDS
+# ============================================================================
+
+def _execute_for_tenant(module, slug, args, options):
+    """Run a command for one tenant in a worker process, returning its output."""
+    import django
+    django.setup()
+    stdout, stderr = io.StringIO(), io.StringIO()
+    command = import_module(module).Command()
+    with use_tenant(slug):
+        command.execute(*args, stdout=stdout, stderr=stderr, **options)
+    return stdout.getvalue(), stderr.getvalue()
+
+
+class TenantCommandMixin:
+    """
+    Adds --tenant and --all-tenants to a management command. One tenant
+    runs in this process; several run in worker processes, --parallel at a
+    time, and their output is printed per tenant as each one finishes.
+    """
+
+    def create_parser(self, prog_name, subcommand, **kwargs):
+        parser = super().create_parser(prog_name, subcommand, **kwargs)
+        tenants = parser.add_mutually_exclusive_group()
+        tenants.add_argument(
+            '--tenant', action='append', choices=sorted(get_tenants()),
+            help='Run for this tenant; repeat for several.',
+        )
+        tenants.add_argument('--all-tenants', action='store_true', help='Run for every tenant.')
+        parser.add_argument(
+            '--parallel', type=int, default=os.cpu_count() or 1,
+            help='Tenants run at the same time with several tenants.',
+        )
+        return parser
+
+    def execute(self, *args, **options):
+        tenant = options.pop('tenant', None)
+        all_tenants = options.pop('all_tenants', False)
+        parallel = options.pop('parallel', None) or 1
+        if all_tenants:
+            slugs = sorted(get_tenants())
+        else:
+            slugs = [tenant] if isinstance(tenant, str) else list(tenant or [])
+        if not slugs:
+            return super().execute(*args, **options)
+        if len(slugs) == 1:
+            with use_tenant(slugs[0]):
+                return super().execute(*args, **options)
+        self.execute_in_parallel(slugs, parallel, args, options)
+
+    def execute_in_parallel(self, slugs, parallel, args, options):
+        stdout = options.pop('stdout', None) or self.stdout
+        stderr = options.pop('stderr', None) or self.stderr
+        failed = []
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=min(parallel, len(slugs)), mp_context=context) as pool:
+            futures = {
+                pool.submit(_execute_for_tenant, type(self).__module__, slug, args, options): slug
+                for slug in slugs
+            }
+            for future in as_completed(futures):
+                slug = futures[future]
+                try:
+                    out, err = future.result()
+                except Exception as exc:
+                    failed.append(slug)
+                    stderr.write(f'[{slug}] {exc}\n')
+                    continue
+                for line in out.splitlines():
+                    stdout.write(f'[{slug}] {line}\n')
+                for line in err.splitlines():
+                    stderr.write(f'[{slug}] {line}\n')
+        if failed:
+            raise CommandError(f"Failed for {len(failed)} tenant(s): {', '.join(sorted(failed))}")
+
+
+class TenantCommand(TenantCommandMixin, BaseCommand):
+    """BaseCommand taking --tenant and --all-tenants."""
@@ -0,0 +1,39 @@
+"""
+Shared fixtures for the attendance tests.
+"""
+
+from itertools import count
+
+from django.contrib.auth.models import User
+
+from attendance.models import Student, Faculty
+
+_sequence = count(1)
+
+
+def make_student(branch='CSE', year=1, **fields):
+    """Create a student with its user account."""
+    number = next(_sequence)
+    user = User.objects.create_user(username=f'student{number}')
+    return Student.objects.create(
+        user=user,
+        hall_ticket_id=fields.pop('hall_ticket_id', f'HT{number:05d}'),
+        name=fields.pop('name', f'Student {number}'),
+        branch=branch,
+        year=year,
+        **fields,
+    )
+
+
+def make_faculty(branch='CSE', year=1, subject='Mathematics', **fields):
+    """Create a faculty member with their user account."""
+    number = next(_sequence)
+    user = User.objects.create_user(username=f'faculty{number}')
+    return Faculty.objects.create(
+        user=user,
+        name=fields.pop('name', f'Faculty {number}'),
+        subject=subject,
+        branch=branch,
+        year=year,
+        **fields,
+    )
@@ -0,0 +1,55 @@
+from datetime import date, timedelta
+
+from django.test import SimpleTestCase, TestCase
+
+from attendance.alerts import (
+    CHECKPOINT_NAME, HIGH_WATER_MARK_LAG, classes_needed, detect_crossings
+)
+from attendance.models import Schedule, Attendance, AlertCheckpoint, LowAttendanceAlert
+
+from .helpers import make_faculty, make_student
+
+
+class ClassesNeededTests(SimpleTestCase):
+
+    def test_classes_needed(self):
+        self.assertEqual(classes_needed(3, 4), 0)
+        self.assertEqual(classes_needed(1, 2), 2)
+        self.assertEqual(classes_needed(0, 1), 3)
+
+
+class DetectCrossingsTests(TestCase):
+
+    def setUp(self):
+        faculty = make_faculty()
+        self.schedules = [
+            Schedule.objects.create(faculty=faculty, date=date(2024, 1, day), subject='M', topic='T')
+            for day in (1, 2)
+        ]
+        self.student = make_student()
+        self.other = make_student()
+
+    def test_late_commit_behind_the_mark_is_picked_up(self):
+        Attendance.objects.create(student=self.student, schedule=self.schedules[0], status='P')
+        Attendance.objects.create(student=self.other, schedule=self.schedules[0], status='P')
+        self.assertEqual(detect_crossings(), (0, 0))
+        mark = AlertCheckpoint.objects.get(name=CHECKPOINT_NAME).high_water_mark
+
+        # Stamped before the last run, committed after it
+        late = Attendance.objects.create(student=self.student, schedule=self.schedules[1], status='A')
+        Attendance.objects.filter(pk=late.pk).update(updated_at=mark - HIGH_WATER_MARK_LAG / 2)
+        self.assertEqual(detect_crossings(), (1, 0))
+        self.assertEqual(AlertCheckpoint.objects.get(name=CHECKPOINT_NAME).high_water_mark, mark)
+
+        # Re-reading the overlap opens no second alert
+        self.assertEqual(detect_crossings(), (0, 0))
+        self.assertEqual(LowAttendanceAlert.objects.filter(student=self.student).count(), 1)
+
+    def test_rows_older_than_the_lag_are_not_reread(self):
+        record = Attendance.objects.create(student=self.student, schedule=self.schedules[0], status='A')
+        self.assertEqual(detect_crossings(), (1, 0))
+        mark = AlertCheckpoint.objects.get(name=CHECKPOINT_NAME).high_water_mark
+        Attendance.objects.filter(pk=record.pk).update(
+            status='P', updated_at=mark - HIGH_WATER_MARK_LAG - timedelta(seconds=1)
+        )
+        self.assertEqual(detect_crossings(), (0, 0))
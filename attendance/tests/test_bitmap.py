@@ -0,0 +1,103 @@
+from datetime import date
+
+from django.test import SimpleTestCase, TestCase
+
+from attendance import bitmap
+from attendance.models import Schedule, Attendance, CohortRosterMember
+
+from .helpers import make_faculty, make_student
+
+
+class EncodingTests(SimpleTestCase):
+
+    def test_statuses_round_trip(self):
+        roster = [11, 7, 42, 3, 19, 5, 8, 23, 31]
+        statuses = {11: 'P', 42: 'A', 3: 'P', 31: 'A'}
+
+        marked, present = bitmap.encode_statuses(roster, statuses)
+
+        self.assertEqual(len(marked), 2)
+        self.assertEqual(bitmap.popcount(marked), 4)
+        self.assertEqual(bitmap.popcount(present), 2)
+        decoded = bitmap.decode_statuses(roster, marked, present)
+        self.assertEqual(decoded, {student_id: statuses.get(student_id) for student_id in roster})
+
+    def test_students_off_the_roster_are_ignored(self):
+        marked, present = bitmap.encode_statuses([1, 2], {2: 'P', 99: 'P'})
+        self.assertEqual(bitmap.decode_statuses([1, 2], marked, present), {1: None, 2: 'P'})
+
+    def test_empty_roster(self):
+        self.assertEqual(bitmap.encode_statuses([], {1: 'P'}), (b'', b''))
+        self.assertEqual(bitmap.decode_statuses([], b'', b''), {})
+
+    def test_ids_round_trip(self):
+        ids = [1, 2 ** 40, 7, 2 ** 64 - 1]
+        packed = bitmap.pack_ids(ids)
+        self.assertEqual(len(packed), 8 * len(ids))
+        self.assertEqual(bitmap.unpack_ids(packed), ids)
+
+    def test_popcount(self):
+        self.assertEqual(bitmap.popcount(0b1011), 3)
+        self.assertEqual(bitmap.popcount(b'\xff\x01'), 9)
+
+    def test_roster_digest_depends_on_order_and_cohort(self):
+        digest = bitmap.roster_digest('CSE', 1, [1, 2])
+        self.assertEqual(digest, bitmap.roster_digest('CSE', 1, [1, 2]))
+        self.assertNotEqual(digest, bitmap.roster_digest('CSE', 1, [2, 1]))
+        self.assertNotEqual(digest, bitmap.roster_digest('CSE', 2, [1, 2]))
+
+
+class BitmapStorageTests(TestCase):
+
+    def setUp(self):
+        self.faculty = make_faculty()
+        self.students = [make_student() for _ in range(3)]
+        self.schedules = [
+            Schedule.objects.create(faculty=self.faculty, date=date(2024, 1, day), subject='M', topic='T')
+            for day in (1, 2)
+        ]
+
+    def test_rosters_index_their_members(self):
+        roster = bitmap.freeze_roster('CSE', 1, [s.id for s in self.students])
+        self.assertEqual(
+            list(CohortRosterMember.objects.filter(roster=roster).order_by('position')
+                 .values_list('student_id', flat=True)),
+            [s.id for s in self.students],
+        )
+        # An identical roster is shared, not indexed twice
+        self.assertEqual(bitmap.freeze_roster('CSE', 1, [s.id for s in self.students]), roster)
+        self.assertEqual(CohortRosterMember.objects.count(), 3)
+
+    def test_summaries_match_row_storage(self):
+        first, second, third = self.students
+        bitmap.store_schedule_attendance(self.schedules[0], {first.id: 'P', second.id: 'A'})
+        bitmap.store_schedule_attendance(self.schedules[1], {first.id: 'A', third.id: 'P'})
+        # A student outside the frozen roster widens it
+        newcomer = make_student(branch='IT')
+        bitmap.store_schedule_attendance(self.schedules[1], {newcomer.id: 'P'})
+
+        self.assertEqual(
+            bitmap.student_summary(first),
+            {'total_classes': 2, 'attended_classes': 1, 'absent_classes': 1},
+        )
+        self.assertEqual(bitmap.student_summary(newcomer, faculty=self.faculty)['attended_classes'], 1)
+        self.assertEqual(bitmap.student_summary(second, faculty=make_faculty())['total_classes'], 0)
+
+        per_student, per_schedule = bitmap.cohort_summary(self.faculty)
+        self.assertEqual(per_student[first.id], [2, 1])
+        self.assertEqual(per_student[newcomer.id], [1, 1])
+        self.assertEqual(per_schedule[self.schedules[0].pk], {'present': 1, 'absent': 1, 'unmarked': 1})
+        self.assertEqual(per_schedule[self.schedules[1].pk], {'present': 2, 'absent': 1, 'unmarked': 1})
+
+    def test_rows_convert_to_bitmaps(self):
+        first, second, _ = self.students
+        Attendance.objects.create(student=first, schedule=self.schedules[0], status='P')
+        Attendance.objects.create(student=second, schedule=self.schedules[0], status='A')
+
+        self.assertEqual(bitmap.convert_rows_to_bitmaps([s.pk for s in self.schedules]), 1)
+        self.assertEqual(
+            bitmap.student_summary(second),
+            {'total_classes': 1, 'attended_classes': 0, 'absent_classes': 1},
+        )
+        # The pages keep reading the rows
+        self.assertEqual(Attendance.objects.count(), 2)
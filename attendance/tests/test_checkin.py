@@ -0,0 +1,102 @@
+from datetime import date
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from attendance import checkin
+from attendance.checks import check_checkin_buffer
+from attendance.models import Schedule, Attendance, AttendanceChange
+
+from .helpers import make_faculty, make_student
+
+SECRET = 'window-secret'
+
+
+class RotatingCodeTests(SimpleTestCase):
+
+    def test_current_code_and_rotation(self):
+        code, remaining = checkin.current_code(SECRET, now=95)
+        self.assertEqual(len(code), checkin.CODE_DIGITS)
+        self.assertEqual(code, checkin.code_for_step(SECRET, 3))
+        self.assertEqual(remaining, 25)
+
+    def test_previous_code_is_still_valid(self):
+        now = 95
+        self.assertTrue(checkin.code_is_valid(SECRET, checkin.code_for_step(SECRET, 3), now))
+        self.assertTrue(checkin.code_is_valid(SECRET, checkin.code_for_step(SECRET, 2), now))
+        self.assertFalse(checkin.code_is_valid(SECRET, checkin.code_for_step(SECRET, 1), now))
+        self.assertFalse(checkin.code_is_valid('other-secret', checkin.code_for_step(SECRET, 3), now))
+
+
+# Warming threads cannot see the test transaction
+@override_settings(SUMMARY_WARM_WORKERS=0)
+class CheckInTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.faculty = make_faculty()
+        self.student = make_student()
+        self.schedule = Schedule.objects.create(
+            faculty=self.faculty, date=date(2024, 1, 1), subject='M', topic='T'
+        )
+        self.window = checkin.open_window(self.schedule)
+
+    def code(self):
+        return checkin.current_code(self.window.secret)[0]
+
+    def test_check_in_is_buffered_until_flushed(self):
+        result, window_id, flush_due = checkin.check_in(self.student, self.code())
+        self.assertEqual((result, window_id, flush_due), (checkin.CHECKED_IN, self.window.id, True))
+        self.assertFalse(Attendance.objects.exists())
+        self.assertEqual(checkin.checked_in_count(self.window.id), 1)
+
+        result, _, flush_due = checkin.check_in(self.student, self.code())
+        self.assertEqual((result, flush_due), (checkin.ALREADY_CHECKED_IN, False))
+
+        self.assertEqual(checkin.flush_window(self.window.id), 1)
+        self.assertEqual(Attendance.objects.get().status, 'P')
+        self.assertEqual(checkin.flush_window(self.window.id), 0)
+
+    def test_rejections(self):
+        step = checkin.current_step()
+        valid = {checkin.code_for_step(self.window.secret, s) for s in (step, step - 1)}
+        wrong = next(code for code in ('000000', '111111', '222222') if code not in valid)
+        self.assertEqual(checkin.check_in(self.student, wrong)[0], checkin.INVALID_CODE)
+        outsider = make_student(branch='ECE')
+        self.assertEqual(checkin.check_in(outsider, self.code())[0], checkin.NO_OPEN_WINDOW)
+
+    def test_one_flusher_at_a_time(self):
+        checkin.check_in(self.student, self.code())
+        flush_pending = checkin._flush_pending
+        racing = []
+
+        def flush_with_a_racer(window_id):
+            # e.g. the window closing while the background flush runs
+            racing.append(checkin.flush_window(window_id, wait=False))
+            return flush_pending(window_id)
+
+        with self.captureOnCommitCallbacks(execute=True), \
+                mock.patch.object(checkin, '_flush_pending', flush_with_a_racer):
+            self.assertEqual(checkin.flush_window(self.window.id), 1)
+        self.assertEqual(racing, [0])
+        self.assertEqual(AttendanceChange.objects.count(), 1)
+        self.assertIsNone(cache.get(checkin._flush_claim_key(self.window.id)))
+
+    @override_settings(CHECKIN_FLUSH_WORKERS=0)
+    def test_view_does_not_flush_on_the_request(self):
+        self.client.force_login(self.student.user)
+        with mock.patch.object(checkin, 'flush_window') as flush_window:
+            response = self.client.post('/student/checkin/', {'code': self.code()})
+        self.assertEqual(response.status_code, 302)
+        flush_window.assert_not_called()
+        self.assertFalse(Attendance.objects.exists())
+
+
+class CheckInBufferCheckTests(SimpleTestCase):
+
+    def test_per_process_cache_with_several_workers(self):
+        with override_settings(WEB_CONCURRENCY=4):
+            self.assertEqual([e.id for e in check_checkin_buffer(None)], ['attendance.E004'])
+        with override_settings(WEB_CONCURRENCY=1):
+            self.assertEqual(check_checkin_buffer(None), [])
@@ -0,0 +1,58 @@
+from datetime import date
+
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.test import RequestFactory, TestCase
+
+from attendance.http import student_page_etag
+from attendance.models import Schedule, Attendance, Faculty
+
+from .helpers import make_faculty, make_student
+
+
+class StudentPageETagTests(TestCase):
+
+    def setUp(self):
+        self.student = make_student()
+        self.schedule = Schedule.objects.create(
+            faculty=make_faculty(), date=date(2024, 1, 1), subject='M', topic='T'
+        )
+
+    def etag(self):
+        request = RequestFactory().get('/student/dashboard/')
+        request.user = self.student.user
+        request._messages = CookieStorage(request)
+        return student_page_etag(request)
+
+    def test_attendance_changes_the_etag_on_commit(self):
+        before = self.etag()
+        with self.captureOnCommitCallbacks(execute=True):
+            Attendance.objects.create(student=self.student, schedule=self.schedule, status='P')
+            # Until the commit, other requests still see the old rows
+            self.assertEqual(self.etag(), before)
+        self.assertNotEqual(self.etag(), before)
+
+    def test_class_changes_the_etag_on_commit(self):
+        before = self.etag()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.schedule.topic = 'Limits'
+            self.schedule.save()
+            self.assertEqual(self.etag(), before)
+        self.assertNotEqual(self.etag(), before)
+
+    def test_class_change_outdates_the_cohort_it_was_held_for(self):
+        # The faculty now teaches another year; the class stays with year 1
+        Faculty.objects.filter(pk=self.schedule.faculty_id).update(year=2)
+        self.schedule.refresh_from_db()
+        before = self.etag()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.schedule.topic = 'Limits'
+            self.schedule.save()
+        self.assertNotEqual(self.etag(), before)
+
+    def test_moved_class_outdates_its_previous_cohort(self):
+        before = self.etag()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.schedule.faculty = make_faculty(branch='ECE', year=2)
+            self.schedule.save()
+        self.assertEqual((self.schedule.branch, self.schedule.year), ('ECE', 2))
+        self.assertNotEqual(self.etag(), before)
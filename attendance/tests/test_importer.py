@@ -0,0 +1,82 @@
+import io
+from datetime import date
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from attendance import importer
+from attendance.importer import _column_index, import_register, parse_header_date
+from attendance.models import Attendance, AttendanceChange
+
+from .helpers import make_faculty, make_student
+
+
+class SheetParsingTests(SimpleTestCase):
+
+    def test_parse_header_date(self):
+        self.assertEqual(parse_header_date('2024-01-05'), date(2024, 1, 5))
+        self.assertEqual(parse_header_date('05/01/2024'), date(2024, 1, 5))
+        self.assertEqual(parse_header_date('05.01.2024'), date(2024, 1, 5))
+        self.assertEqual(parse_header_date('2024-01-05 00:00:00'), date(2024, 1, 5))
+        self.assertEqual(parse_header_date(45296), date(2024, 1, 5))
+        self.assertEqual(parse_header_date(45296.0), date(2024, 1, 5))
+        self.assertIsNone(parse_header_date(12))
+        self.assertIsNone(parse_header_date('Name'))
+
+    def test_column_index(self):
+        self.assertEqual(_column_index('A1'), 0)
+        self.assertEqual(_column_index('Z30'), 25)
+        self.assertEqual(_column_index('AA1'), 26)
+        self.assertEqual(_column_index('AB12'), 27)
+
+
+# Warming threads cannot see the test transaction
+@override_settings(SUMMARY_WARM_WORKERS=0)
+class ImportRegisterTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.faculty = make_faculty()
+        self.students = [make_student(hall_ticket_id=f'CSE00{n}') for n in (1, 2)]
+
+    def sheet(self, *rows):
+        lines = ['Hall Ticket ID,Name,2024-01-01,02/01/2024', *rows]
+        return io.BytesIO('\n'.join(lines).encode())
+
+    def test_round_trip(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            report = import_register(
+                self.sheet('cse001,A,P,A', 'CSE002,B,present,', 'XYZ,C,P,P'),
+                'register.csv', self.faculty,
+            )
+        self.assertEqual((report.rows, report.schedules_created, report.created), (3, 2, 3))
+        self.assertEqual(report.problem_counts['unknown'], 1)
+        self.assertEqual(
+            sorted(Attendance.objects.values_list('student__hall_ticket_id', 'schedule__date', 'status')),
+            [('CSE001', date(2024, 1, 1), 'P'), ('CSE001', date(2024, 1, 2), 'A'),
+             ('CSE002', date(2024, 1, 1), 'P')],
+        )
+        self.assertEqual(AttendanceChange.objects.count(), 3)
+
+        report = import_register(self.sheet('CSE001,A,A,A'), 'register.csv', self.faculty)
+        self.assertEqual((report.created, report.unchanged), (0, 1))
+        self.assertEqual(report.problem_counts['conflicts'], 1)
+
+    def test_rolled_back_chunk_logs_nothing(self):
+        bulk_create = Attendance.objects.bulk_create
+        calls = []
+
+        def failing_second_chunk(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 2:
+                raise RuntimeError('disk full')
+            return bulk_create(*args, **kwargs)
+
+        with self.captureOnCommitCallbacks(execute=True), \
+                mock.patch.object(importer, 'CHUNK_SIZE', 1), \
+                mock.patch.object(Attendance.objects, 'bulk_create', failing_second_chunk):
+            with self.assertRaises(RuntimeError):
+                import_register(self.sheet('CSE001,A,P,', 'CSE002,B,P,'), 'register.csv', self.faculty)
+        self.assertEqual(Attendance.objects.count(), 1)
+        self.assertEqual(AttendanceChange.objects.count(), 1)
@@ -0,0 +1,57 @@
+import cProfile
+import os
+import tempfile
+
+from django.conf import settings
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from attendance import profiling
+from attendance.checks import check_profile_root
+
+
+class RequestedModeTests(SimpleTestCase):
+
+    def test_modes(self):
+        factory = RequestFactory()
+        self.assertIsNone(profiling.requested_mode(factory.get('/')))
+        self.assertEqual(profiling.requested_mode(factory.get('/?__profile=CPU')), 'cpu')
+        self.assertEqual(profiling.requested_mode(factory.get('/?__profile')), 'all')
+        self.assertEqual(profiling.requested_mode(factory.get('/', HTTP_X_PROFILE='bogus')), 'all')
+
+
+class StoredProfileTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        override = override_settings(PROFILE_ROOT=directory.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_round_trip(self):
+        profiler = cProfile.Profile()
+        profiler.runcall(sorted, range(100))
+
+        name = profiling.save_profile('student/dashboard', profiler)
+
+        self.assertTrue(name.startswith('student_dashboard-'))
+        self.assertEqual([(p['name'], p['kinds']) for p in profiling.list_profiles()], [(name, ['cpu'])])
+        self.assertTrue(profiling.hot_functions(name))
+        self.assertEqual(profiling.allocation_report(name), '')
+        profiling.delete_profile(name)
+        self.assertEqual(profiling.list_profiles(), [])
+
+    def test_names_cannot_leave_the_profile_root(self):
+        with self.assertRaises(ValueError):
+            profiling.hot_functions('../settings')
+
+
+class ProfileRootCheckTests(SimpleTestCase):
+
+    def test_default_root_is_not_served(self):
+        self.assertFalse(os.fspath(profiling.profile_root()).startswith(os.fspath(settings.MEDIA_ROOT)))
+        self.assertEqual(check_profile_root(None), [])
+
+    def test_root_inside_media_root(self):
+        with override_settings(PROFILE_ROOT=os.path.join(settings.MEDIA_ROOT, 'profiles')):
+            self.assertEqual([error.id for error in check_profile_root(None)], ['attendance.E003'])
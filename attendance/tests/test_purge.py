@@ -0,0 +1,59 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from attendance.cache import student_version_key, cohort_version_key
+from attendance.models import Student, Schedule, Attendance, DailyCohortRollup
+from attendance.purge import deactivate_students, purge_students
+from attendance.rollups import refresh_rollups
+from attendance.versions import get_versions
+
+from .helpers import make_faculty, make_student
+
+
+class PurgeTests(TestCase):
+
+    def setUp(self):
+        self.faculty = make_faculty()
+        self.staying = make_student()
+        self.leaving = [make_student() for _ in range(3)]
+        self.schedules = [
+            Schedule.objects.create(faculty=self.faculty, date=date(2024, 1, day), subject='M', topic='T')
+            for day in (1, 2)
+        ]
+        for schedule in self.schedules:
+            for student in [self.staying, *self.leaving]:
+                Attendance.objects.create(student=student, schedule=schedule, status='P')
+        refresh_rollups([schedule.pk for schedule in self.schedules])
+
+    def test_deactivation_keeps_the_rows(self):
+        self.assertEqual(deactivate_students(Student.objects.filter(pk=self.leaving[0].pk)), 1)
+        self.leaving[0].refresh_from_db()
+        self.assertFalse(self.leaving[0].is_active)
+        self.assertFalse(User.objects.get(pk=self.leaving[0].user_id).is_active)
+        self.assertEqual(Attendance.objects.filter(student=self.leaving[0]).count(), 2)
+
+    def test_only_inactive_students_are_purged(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(purge_students(), (0, 0))
+        self.assertEqual(Student.objects.count(), 4)
+
+    def test_purge_refreshes_rollups_and_versions(self):
+        deactivate_students(Student.objects.filter(pk__in=[s.pk for s in self.leaving]))
+        keys = [student_version_key(self.leaving[0].pk), cohort_version_key('CSE', 1)]
+        before = get_versions(keys)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            purged, rows = purge_students(chunk_size=2)
+
+        self.assertEqual((purged, rows), (3, 6))
+        self.assertEqual(list(Student.objects.all()), [self.staying])
+        self.assertEqual(Attendance.objects.count(), 2)
+        self.assertEqual(
+            list(DailyCohortRollup.objects.order_by('date').values_list('present', 'total')),
+            [(1, 1), (1, 1)],
+        )
+        after = get_versions(keys)
+        self.assertNotEqual(after[0], before[0])
+        self.assertNotEqual(after[1], before[1])
@@ -0,0 +1,23 @@
+from django.db import connection
+from django.test import TestCase
+
+from attendance.query_plans import HOT_QUERIES, audit, full_scans
+
+
+class QueryPlanTests(TestCase):
+    """Every hot query must be answered from an index on the migrated schema."""
+
+    def test_full_scan_detection(self):
+        self.assertEqual(full_scans(['SCAN attendance_student']), ['attendance_student'])
+        self.assertEqual(full_scans(['SCAN attendance_student USING INDEX idx']), ['attendance_student'])
+        self.assertEqual(full_scans(['SEARCH attendance_student USING INDEX idx (branch=?)']), [])
+        self.assertEqual(full_scans(['SCAN CONSTANT ROW']), [])
+
+    def test_hot_queries_use_indexes(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('The audit reads SQLite EXPLAIN QUERY PLAN output.')
+        results = audit()
+        self.assertEqual(len(results), len(HOT_QUERIES))
+        for name, plan, scanned in results:
+            with self.subTest(name):
+                self.assertEqual(scanned, [], '\n'.join(plan))
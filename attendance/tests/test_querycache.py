@@ -0,0 +1,101 @@
+from datetime import date
+from unittest import mock
+
+from django.contrib.sessions.models import Session
+from django.db import transaction
+from django.test import SimpleTestCase, TransactionTestCase
+from django.utils import timezone
+
+from attendance import querycache
+from attendance.models import Schedule
+from attendance.querycache import QueryCacheStore, cached_tables, table_version_key
+from attendance.versions import get_versions
+
+from .helpers import make_faculty
+
+
+class QueryCacheStoreTests(SimpleTestCase):
+
+    def test_least_recently_used_entry_is_evicted(self):
+        store = QueryCacheStore(max_entries=2, max_bytes=1000)
+        store.put('a', [], [], 0, b'1')
+        store.put('b', [], [], 0, b'2')
+        store.hit('a')
+        store.put('c', [], [], 0, b'3')
+        self.assertEqual(list(store.entries), ['a', 'c'])
+        self.assertEqual(store.stats()['evictions'], 1)
+
+    def test_oversized_results_are_not_stored(self):
+        store = QueryCacheStore(max_entries=10, max_bytes=100)
+        store.put('a', [], [], 0, b'x' * 26)
+        self.assertIsNone(store.peek('a'))
+        self.assertEqual(store.stats()['oversized'], 1)
+
+
+class CachedQuerySetTests(TransactionTestCase):
+
+    def setUp(self):
+        querycache.store.clear()
+        self.faculty = make_faculty()
+        Schedule.objects.create(faculty=self.faculty, date=date(2024, 1, 1), subject='M', topic='T')
+
+    def schedules(self):
+        return list(Schedule.objects.cached().filter(faculty=self.faculty))
+
+    def test_rows_are_reused_until_a_table_is_written(self):
+        self.assertEqual(len(self.schedules()), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(len(self.schedules()), 1)
+        with transaction.atomic():
+            Schedule.objects.create(faculty=self.faculty, date=date(2024, 1, 2), subject='M', topic='T')
+            # Until the commit, the writing transaction reads past the cache
+            self.assertEqual(len(self.schedules()), 2)
+        self.assertEqual(len(self.schedules()), 2)
+        with self.assertNumQueries(0):
+            self.schedules()
+
+    def test_only_cached_tables_are_tracked(self):
+        self.assertIn(Schedule._meta.db_table, cached_tables())
+        self.assertIn('auth_user', cached_tables())
+        self.assertNotIn(Session._meta.db_table, cached_tables())
+
+        keys = [table_version_key(Session._meta.db_table), table_version_key(Schedule._meta.db_table)]
+        before = get_versions(keys)
+        Session.objects.create(session_key='k' * 32, session_data='', expire_date=timezone.now())
+        Schedule.objects.update(topic='Limits')
+        after = get_versions(keys)
+        self.assertEqual(after[0], before[0])
+        self.assertNotEqual(after[1], before[1])
+
+
+class TransactionWriteTests(TransactionTestCase):
+
+    def setUp(self):
+        self.faculty = make_faculty()
+        self.schedule_key = table_version_key(Schedule._meta.db_table)
+
+    def schedule_bumps(self, bump_versions):
+        return sum(call.args[0].count(self.schedule_key) for call in bump_versions.call_args_list)
+
+    def test_tables_are_bumped_once_and_on_commit(self):
+        with mock.patch('attendance.querycache.bump_versions') as bump_versions:
+            with transaction.atomic():
+                for day in range(1, 6):
+                    Schedule.objects.create(
+                        faculty=self.faculty, date=date(2024, 1, day), subject='M', topic='T'
+                    )
+                self.assertEqual(self.schedule_bumps(bump_versions), 1)
+            self.assertEqual(self.schedule_bumps(bump_versions), 2)
+
+    def test_rolled_back_writes_do_not_hide_later_ones(self):
+        with mock.patch('attendance.querycache.bump_versions') as bump_versions:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                Schedule.objects.update(topic='Draft')
+                raise RuntimeError
+            with transaction.atomic():
+                with self.assertRaises(RuntimeError), transaction.atomic():
+                    Schedule.objects.update(topic='Draft')
+                    raise RuntimeError
+                Schedule.objects.update(topic='Final')
+            # Rolled back: 1; savepoint rolled back: 1; then 1 now and 1 on commit
+            self.assertEqual(self.schedule_bumps(bump_versions), 4)
@@ -0,0 +1,102 @@
+from datetime import date
+
+from django.test import SimpleTestCase, TestCase
+
+from attendance.bitmap import convert_rows_to_bitmaps, store_schedule_attendance
+from attendance.models import Schedule, Attendance, DailyCohortRollup
+from attendance.rollups import build_calendar, cohort_rollups, heatmap_level, refresh_rollups, trend
+
+from .helpers import make_faculty, make_student
+
+
+class HeatmapTests(SimpleTestCase):
+
+    def test_levels(self):
+        self.assertEqual(heatmap_level(None), 0)
+        self.assertEqual(heatmap_level(0), 1)
+        self.assertEqual(heatmap_level(50), 2)
+        self.assertEqual(heatmap_level(89.99), 3)
+        self.assertEqual(heatmap_level(100), 4)
+
+    def test_calendar_rows_are_weekdays(self):
+        # 2024-01-03 is a Wednesday
+        rows = build_calendar({date(2024, 1, 3): (1, 2)}, date(2024, 1, 3), date(2024, 1, 9))
+        self.assertEqual(len(rows), 7)
+        self.assertEqual([cell['date'] for cell in rows[0]], [date(2024, 1, 1), date(2024, 1, 8)])
+        self.assertFalse(rows[0][0]['in_range'])
+        wednesday = rows[2][0]
+        self.assertEqual((wednesday['rate'], wednesday['level']), (50.0, 2))
+        self.assertEqual(rows[3][0]['level'], 0)
+
+
+class RollupRefreshTests(TestCase):
+
+    def setUp(self):
+        self.faculty = make_faculty()
+        self.students = [make_student() for _ in range(2)]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.schedule = Schedule.objects.create(
+                faculty=self.faculty, date=date(2024, 1, 1), subject='M', topic='T'
+            )
+
+    def rollups(self):
+        return list(DailyCohortRollup.objects.values_list('faculty_id', 'date', 'present', 'total'))
+
+    def test_saves_and_deletes_refresh_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            records = [
+                Attendance.objects.create(student=student, schedule=self.schedule, status='P')
+                for student in self.students
+            ]
+            self.assertEqual(self.rollups(), [])
+        self.assertEqual(self.rollups(), [(self.faculty.pk, date(2024, 1, 1), 2, 2)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            records[0].status = 'A'
+            records[0].save()
+            records[1].delete()
+        self.assertEqual(self.rollups(), [(self.faculty.pk, date(2024, 1, 1), 0, 1)])
+
+    def test_moved_class_leaves_its_old_row(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Attendance.objects.create(student=self.students[0], schedule=self.schedule, status='P')
+        other = make_faculty()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.schedule.faculty = other
+            self.schedule.date = date(2024, 1, 2)
+            self.schedule.save()
+        self.assertEqual(self.rollups(), [(other.pk, date(2024, 1, 2), 1, 1)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.schedule.delete()
+        self.assertEqual(self.rollups(), [])
+
+    def test_trend_by_week(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Attendance.objects.create(student=self.students[0], schedule=self.schedule, status='P')
+            Attendance.objects.create(student=self.students[1], schedule=self.schedule, status='A')
+            later = Schedule.objects.create(
+                faculty=self.faculty, date=date(2024, 1, 3), subject='M', topic='T'
+            )
+            Attendance.objects.create(student=self.students[0], schedule=later, status='P')
+        points = trend(cohort_rollups('CSE', 1, date(2024, 1, 1), date(2024, 1, 31)), 'week')
+        self.assertEqual(len(points), 1)
+        self.assertEqual((points[0]['present'], points[0]['total']), (2, 3))
+        self.assertEqual(points[0]['rate'], 66.67)
+
+    def test_converting_to_bitmaps_keeps_the_counts(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for student in self.students:
+                Attendance.objects.create(student=student, schedule=self.schedule, status='P')
+        self.assertEqual(self.rollups(), [(self.faculty.pk, date(2024, 1, 1), 2, 2)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            convert_rows_to_bitmaps([self.schedule.pk])
+        refresh_rollups([self.schedule.pk])
+        self.assertEqual(self.rollups(), [(self.faculty.pk, date(2024, 1, 1), 2, 2)])
+
+    def test_bitmap_only_classes_are_counted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            store_schedule_attendance(self.schedule, {self.students[0].pk: 'P', self.students[1].pk: 'A'})
+        self.assertEqual(self.rollups(), [(self.faculty.pk, date(2024, 1, 1), 1, 2)])
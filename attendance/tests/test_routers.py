@@ -0,0 +1,52 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from attendance.cache import cached_compute
+from attendance.models import Attendance
+from attendance.routers import RoutingState, ReplicaRouter, _state, primary_reads, replica_reads
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(SimpleTestCase):
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.token = _state.set(RoutingState())
+        self.addCleanup(_state.reset, self.token)
+
+    def read_alias(self, model=Attendance):
+        return self.router.db_for_read(model)
+
+    def run_view(self, func):
+        return replica_reads(lambda request: func())(None)
+
+    def test_reads_outside_replica_views_use_the_primary(self):
+        self.assertEqual(self.read_alias(), 'default')
+
+    def test_replica_views_read_attendance_from_a_replica(self):
+        self.assertEqual(self.run_view(self.read_alias), 'replica')
+        # Auth and sessions stay on the primary
+        self.assertEqual(self.run_view(lambda: self.read_alias(User)), 'default')
+
+    def test_sticky_sessions_read_from_the_primary(self):
+        _state.get().sticky = True
+        self.assertEqual(self.run_view(self.read_alias), 'default')
+
+    def test_reads_after_a_write_use_the_primary(self):
+        def view():
+            self.router.db_for_write(Attendance)
+            return self.read_alias()
+        self.assertEqual(self.run_view(view), 'default')
+
+    def test_primary_reads(self):
+        def view():
+            with primary_reads():
+                inside = self.read_alias()
+            return inside, self.read_alias()
+        self.assertEqual(self.run_view(view), ('default', 'replica'))
+
+    def test_cached_values_are_computed_from_the_primary(self):
+        key = 'tests:routers:cached'
+        self.addCleanup(cache.delete, key)
+        self.assertEqual(self.run_view(lambda: cached_compute(key, self.read_alias, timeout=5)), 'default')
@@ -0,0 +1,49 @@
+from datetime import date
+
+from django.test import TestCase
+
+from attendance.models import Schedule, Attendance
+
+from .helpers import make_faculty, make_student
+
+
+class MarkingCompletenessTests(TestCase):
+
+    def setUp(self):
+        self.faculty = make_faculty()
+        self.students = [make_student() for _ in range(3)]
+        # Another cohort's student never counts towards these classes
+        make_student(branch='IT')
+        self.marked = Schedule.objects.create(faculty=self.faculty, date=date(2024, 1, 1), subject='M', topic='T')
+        self.partial = Schedule.objects.create(faculty=self.faculty, date=date(2024, 1, 2), subject='M', topic='T')
+        self.empty = Schedule.objects.create(faculty=self.faculty, date=date(2024, 1, 3), subject='M', topic='T')
+        for student in self.students:
+            Attendance.objects.create(student=student, schedule=self.marked, status='P')
+        Attendance.objects.create(student=self.students[0], schedule=self.partial, status='A')
+
+    def test_marking_counts(self):
+        counts = {
+            schedule.pk: (schedule.cohort_size, schedule.present_count, schedule.absent_count,
+                          schedule.unmarked_count)
+            for schedule in Schedule.objects.with_marking_counts()
+        }
+        self.assertEqual(counts[self.marked.pk], (3, 3, 0, 0))
+        self.assertEqual(counts[self.partial.pk], (3, 0, 1, 2))
+        self.assertEqual(counts[self.empty.pk], (3, 0, 0, 3))
+
+    def test_incomplete(self):
+        self.assertQuerysetEqual(
+            Schedule.objects.incomplete().order_by('date'), [self.partial, self.empty]
+        )
+
+    def test_inactive_students_need_no_mark(self):
+        for student in self.students[1:]:
+            student.is_active = False
+            student.save()
+        self.assertQuerysetEqual(Schedule.objects.incomplete(), [self.empty])
+
+    def test_incomplete_combines_with_counts(self):
+        schedules = Schedule.objects.filter(faculty=self.faculty).incomplete().with_marking_counts()
+        self.assertEqual(
+            sorted((s.date.day, s.unmarked_count) for s in schedules), [(2, 2), (3, 3)]
+        )
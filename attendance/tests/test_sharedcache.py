@@ -0,0 +1,60 @@
+import os
+import tempfile
+
+from django.test import SimpleTestCase
+
+from attendance.sharedcache import SharedSQLiteCache
+
+
+class SharedSQLiteCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache = SharedSQLiteCache(os.path.join(directory.name, 'cache.sqlite3'), {
+            'OPTIONS': {'MAX_ENTRIES': 1000, 'MAX_BYTES': 1000, 'CULL_FREQUENCY': 4},
+        })
+        self.addCleanup(lambda: self.cache._db.close())
+
+    def test_add_only_sets_missing_keys(self):
+        self.assertTrue(self.cache.add('key', 'first'))
+        self.assertFalse(self.cache.add('key', 'second'))
+        self.assertEqual(self.cache.get('key'), 'first')
+
+    def test_incr(self):
+        self.cache.set('counter', 1)
+        self.assertEqual(self.cache.incr('counter', 2), 3)
+        self.assertEqual(self.cache.decr('counter'), 2)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+        self.cache.set('pickled', 'text')
+        with self.assertRaises(ValueError):
+            self.cache.incr('pickled')
+
+    def test_incr_refuses_to_overflow(self):
+        self.cache.set('counter', 2 ** 63 - 2)
+        self.assertEqual(self.cache.incr('counter'), 2 ** 63 - 1)
+        with self.assertRaises(OverflowError):
+            self.cache.incr('counter')
+        self.assertEqual(self.cache.get('counter'), 2 ** 63 - 1)
+        self.cache.set('counter', -2 ** 63)
+        with self.assertRaises(OverflowError):
+            self.cache.decr('counter')
+
+    def test_cull_keeps_the_most_recent_entries(self):
+        for number in range(10):
+            self.cache.set(f'key{number}', b'x' * 150)
+        self.assertIsNotNone(self.cache.get('key9'))
+        self.assertIsNone(self.cache.get('key0'))
+        entries, size = self.cache._db.execute('SELECT entries, bytes FROM cache_totals').fetchone()
+        self.assertLessEqual(size, 1000)
+        self.assertEqual(entries, len(self.cache.get_many([f'key{n}' for n in range(10)])))
+
+    def test_oversized_values_are_not_stored(self):
+        self.cache.set('small', 1)
+        self.cache.set('big', b'old')
+        self.cache.set('big', b'x' * 800)
+        self.assertIsNone(self.cache.get('big'))
+        self.assertFalse(self.cache.add('other', b'x' * 800))
+        self.assertEqual(self.cache.set_many({'big': b'x' * 800, 'ok': 2}), ['big'])
+        self.assertEqual(self.cache.get_many(['small', 'ok']), {'small': 1, 'ok': 2})
@@ -0,0 +1,35 @@
+from datetime import date
+
+from django.test import TestCase
+
+from attendance.alerts import detect_crossings, CHECKPOINT_NAME
+from attendance.models import Schedule, Attendance, AlertCheckpoint, Student
+from attendance.purge import deactivate_students
+
+from .helpers import make_faculty, make_student
+
+
+class HighWaterMarkTests(TestCase):
+    """Bulk updates must move updated_at past the incremental jobs' high-water marks."""
+
+    def setUp(self):
+        self.student = make_student()
+        self.schedule = Schedule.objects.create(
+            faculty=make_faculty(), date=date(2024, 1, 1), subject='M', topic='T'
+        )
+        Attendance.objects.create(student=self.student, schedule=self.schedule, status='P')
+        detect_crossings()
+        self.high_water_mark = AlertCheckpoint.objects.get(name=CHECKPOINT_NAME).high_water_mark
+
+    def test_reassigned_class_moves_its_rows_past_the_mark(self):
+        other = make_faculty(branch='ECE', year=2)
+        self.schedule.faculty = other
+        self.schedule.save()
+        moved = Attendance.objects.filter(updated_at__gt=self.high_water_mark)
+        self.assertEqual(list(moved.values_list('faculty_id', 'branch', 'year')), [(other.pk, 'ECE', 2)])
+
+    def test_deactivation_touches_updated_at(self):
+        before = self.student.updated_at
+        deactivate_students(Student.objects.filter(pk=self.student.pk))
+        self.student.refresh_from_db()
+        self.assertGreater(self.student.updated_at, before)
@@ -0,0 +1,85 @@
+from django.db import connections
+from django.http import Http404, HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.urls import get_script_prefix, reverse
+
+from attendance.models import Student
+from attendance.tenancy import (
+    TenantError, TenantMiddleware, TenantRouter, current_database, current_tenant, make_cache_key, use_tenant,
+)
+
+TENANTS = {
+    'north': {'DATABASE': 'default', 'HOSTS': ['north.example.edu', 'www.north.example.edu']},
+    'south': {'DATABASE': 'tenant_south', 'HOSTS': ['south.example.edu']},
+}
+
+
+@override_settings(TENANTS=TENANTS)
+class UseTenantTests(SimpleTestCase):
+
+    def test_routes_to_the_tenant_database(self):
+        router = TenantRouter()
+        self.assertIsNone(router.db_for_read(Student))
+        self.assertEqual(current_database(), 'default')
+        with use_tenant('south'):
+            self.assertEqual(current_tenant(), 'south')
+            self.assertEqual(current_database(), 'tenant_south')
+            self.assertEqual(router.db_for_read(Student), 'tenant_south')
+            self.assertEqual(router.db_for_write(Student), 'tenant_south')
+        self.assertIsNone(current_tenant())
+
+    def test_connections_are_left_alone(self):
+        default = connections['default']
+        with use_tenant('south'):
+            self.assertIs(connections['default'], default)
+
+    def test_nesting_and_no_tenant(self):
+        with use_tenant('north'):
+            with use_tenant('south'):
+                self.assertEqual(current_tenant(), 'south')
+            with use_tenant(None):
+                self.assertEqual(current_tenant(), 'north')
+            self.assertEqual(current_tenant(), 'north')
+
+    def test_unknown_tenant(self):
+        with self.assertRaises(TenantError):
+            with use_tenant('east'):
+                pass
+
+    def test_cache_keys_carry_the_tenant(self):
+        self.assertEqual(make_cache_key('roster', 'p', 1), 'p:1::roster')
+        with use_tenant('north'):
+            self.assertEqual(make_cache_key('roster', 'p', 1), 'p:1:north:roster')
+
+
+@override_settings(TENANTS=TENANTS)
+class TenantMiddlewareTests(SimpleTestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.middleware = TenantMiddleware(self.serve)
+
+    def serve(self, request):
+        return HttpResponse(f'{current_tenant()} {request.path_info} {reverse("home")}')
+
+    def test_tenant_from_host(self):
+        request = self.factory.get('/student/dashboard/', HTTP_HOST='www.north.example.edu:8000')
+        self.assertEqual(self.middleware(request).content, b'north /student/dashboard/ /')
+        self.assertEqual(request.tenant, 'north')
+
+    def test_unknown_host(self):
+        with self.assertRaises(Http404):
+            self.middleware(self.factory.get('/', HTTP_HOST='east.example.edu'))
+
+    def test_static_files_are_shared(self):
+        request = self.factory.get('/static/app.css', HTTP_HOST='east.example.edu')
+        self.assertEqual(self.middleware(request).content, b'None /static/app.css /')
+
+    @override_settings(TENANT_RESOLUTION='path')
+    def test_tenant_from_path(self):
+        request = self.factory.get('/south/student/dashboard/')
+        self.assertEqual(self.middleware(request).content, b'south /student/dashboard/ /south/')
+        self.assertEqual(request.path, '/south/student/dashboard/')
+        self.assertEqual(get_script_prefix(), '/')
+        with self.assertRaises(Http404):
+            self.middleware(self.factory.get('/east/student/dashboard/'))
@@ -0,0 +1,66 @@
+from datetime import date
+
+from django.test import TestCase
+
+from attendance.models import Schedule
+from attendance.timetable import expand_timetable_dates, format_skipped_dates, generate_timetable
+
+from .helpers import make_faculty
+
+
+class ExpandTimetableDatesTests(TestCase):
+
+    def test_weekdays_in_range(self):
+        # 2024-01-01 is a Monday
+        dates = expand_timetable_dates(date(2024, 1, 1), date(2024, 1, 14), [0, 2])
+        self.assertEqual(dates, [
+            date(2024, 1, 1), date(2024, 1, 3), date(2024, 1, 8), date(2024, 1, 10),
+        ])
+
+    def test_holidays_are_left_out(self):
+        dates = expand_timetable_dates(
+            date(2024, 1, 1), date(2024, 1, 14), ['0'], holidays=[date(2024, 1, 8)]
+        )
+        self.assertEqual(dates, [date(2024, 1, 1)])
+
+    def test_empty_range(self):
+        self.assertEqual(expand_timetable_dates(date(2024, 1, 2), date(2024, 1, 1), [0, 1]), [])
+
+
+class GenerateTimetableTests(TestCase):
+
+    def setUp(self):
+        self.faculty = make_faculty(branch='ECE', year=2, subject='Signals')
+
+    def test_creates_one_class_per_faculty_and_date(self):
+        dates = [date(2024, 1, 1), date(2024, 1, 2)]
+        created, skipped = generate_timetable([self.faculty], dates, 'Intro')
+
+        self.assertEqual(created, 2)
+        self.assertEqual(skipped, {})
+        schedules = Schedule.objects.filter(faculty=self.faculty).order_by('date')
+        self.assertEqual([s.date for s in schedules], dates)
+        self.assertTrue(all(
+            (s.subject, s.branch, s.year) == ('Signals', 'ECE', 2) for s in schedules
+        ))
+
+    def test_existing_classes_are_skipped(self):
+        Schedule.objects.create(faculty=self.faculty, date=date(2024, 1, 2), subject='Signals', topic='Old')
+
+        created, skipped = generate_timetable(
+            [self.faculty], [date(2024, 1, 1), date(2024, 1, 2), date(2024, 1, 1)], 'New'
+        )
+
+        self.assertEqual(created, 1)
+        self.assertEqual(skipped, {self.faculty: [date(2024, 1, 2)]})
+        self.assertEqual(Schedule.objects.get(date=date(2024, 1, 2)).topic, 'Old')
+
+    def test_nothing_to_create(self):
+        self.assertEqual(generate_timetable([], [date(2024, 1, 1)], 'Intro'), (0, {}))
+
+
+class FormatSkippedDatesTests(TestCase):
+
+    def test_long_lists_are_shortened(self):
+        dates = [date(2024, 1, day) for day in range(1, 5)]
+        self.assertEqual(format_skipped_dates(dates, limit=2), '01/01/2024, 02/01/2024 and 2 more')
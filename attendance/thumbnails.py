@@ -0,0 +1,90 @@
+"""
+Image processing for student photos: square thumbnails and sprite sheets.
+
+Nothing here imports Django, so make_thumbnails() can run in the worker
+processes of attendance.photos without setting up the project.
+"""
+
+import os
+
+from PIL import Image, ImageOps
+
+# (extension, Pillow format, save options). JPEG is written last, so its
+# presence means every encoding of a thumbnail is complete.
+ENCODINGS = (
+    ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+    ('jpg', 'JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+)
+
+# Fill of empty sprite slots and of transparent photo areas
+BACKGROUND = (233, 236, 239)
+
+
+def _save(image, stem, encodings=ENCODINGS):
+    """Write `image` as stem.<extension> for each encoding, atomically."""
+    os.makedirs(os.path.dirname(stem), exist_ok=True)
+    for extension, image_format, options in encodings:
+        path = f'{stem}.{extension}'
+        image.save(path + '.tmp', image_format, **options)
+        os.replace(path + '.tmp', path)
+
+
+def _flatten(image):
+    """RGB copy of an image, with any transparency over BACKGROUND."""
+    if image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        flat = Image.new('RGB', image.size, BACKGROUND)
+        flat.paste(image, mask=image.getchannel('A'))
+        return flat
+    return image.convert('RGB')
+
+
+def make_thumbnails(source, targets):
+    """
+    Write square, centre-cropped thumbnails of the image at `source`.
+    `targets` is [(size, stem)]; each is saved as every ENCODINGS format,
+    in the order given.
+    """
+    largest = max(size for size, _ in targets)
+    with Image.open(source) as image:
+        # Let the JPEG decoder downscale while decoding, which is much cheaper
+        image.draft('RGB', (largest * 2, largest * 2))
+        image = _flatten(ImageOps.exif_transpose(image))
+    for size, stem in targets:
+        _save(ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS), stem)
+    return [stem for _, stem in targets]
+
+
+def slot_offset(slot, tile, columns):
+    """Pixel position (x, y) of a slot in a sprite sheet."""
+    return (slot % columns) * tile, (slot // columns) * tile
+
+
+def sheet_size(slot_count, tile, columns):
+    """Pixel size (width, height) of a sprite sheet with `slot_count` slots."""
+    return columns * tile, max(1, -(-slot_count // columns)) * tile
+
+
+def compose_sheet(previous, tile, columns, slot_count, paints, stem):
+    """
+    Paint tiles onto a sprite sheet and write it as stem.png (the lossless
+    master that later repaints start from) plus every ENCODINGS format.
+    `previous` is the path of the last master, or None to start blank;
+    `paints` is [(slot, thumbnail path, or None to blank the slot)].
+    """
+    sheet = Image.new('RGB', sheet_size(slot_count, tile, columns), BACKGROUND)
+    if previous is not None:
+        with Image.open(previous) as master:
+            sheet.paste(master.convert('RGB').crop((0, 0, sheet.width, min(master.height, sheet.height))))
+    for slot, path in paints:
+        x, y = slot_offset(slot, tile, columns)
+        if path is None:
+            sheet.paste(BACKGROUND, (x, y, x + tile, y + tile))
+            continue
+        with Image.open(path) as thumbnail:
+            thumbnail = thumbnail.convert('RGB')
+            if thumbnail.size != (tile, tile):
+                thumbnail = ImageOps.fit(thumbnail, (tile, tile), Image.Resampling.LANCZOS)
+            sheet.paste(thumbnail, (x, y))
+    _save(sheet, stem, (('png', 'PNG', {}),) + ENCODINGS)
+    return sheet.size
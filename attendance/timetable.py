@@ -0,0 +1,104 @@
+"""
+Recurring timetable generation for the attendance app.
+Expands a weekly pattern over a date range into Schedule rows and inserts
+a whole semester at once instead of one form submission per class.
+"""
+
+from datetime import timedelta
+
+from . import search
+from .models import Schedule
+
+WEEKDAY_CHOICES = [
+    (0, 'Monday'),
+    (1, 'Tuesday'),
+    (2, 'Wednesday'),
+    (3, 'Thursday'),
+    (4, 'Friday'),
+    (5, 'Saturday'),
+    (6, 'Sunday'),
+]
+
+# Longest range accepted in one go (a little over an academic year)
+MAX_TIMETABLE_DAYS = 400
+
+
+def expand_timetable_dates(start_date, end_date, weekdays, holidays=()):
+    """
+    Return every date between start_date and end_date (inclusive) that falls
+    on one of the given weekdays (0 = Monday) and is not a holiday.
+    """
+    weekdays = {int(day) for day in weekdays}
+    holidays = set(holidays)
+    dates = []
+    current = start_date
+    while current <= end_date:
+        if current.weekday() in weekdays and current not in holidays:
+            dates.append(current)
+        current += timedelta(days=1)
+    return dates
+
+
+def generate_timetable(faculties, dates, topic, subject=None):
+    """
+    Create one Schedule per faculty per date.
+
+    Existing (faculty, date) pairs are found with a single query and the
+    remaining rows are written with a single bulk_create. When subject is
+    not given, each faculty member's own subject is used.
+
+    Returns a tuple (created_count, skipped) where skipped maps each faculty
+    to the sorted list of dates that already had a class. created_count is
+    an upper bound: a class another request adds between the lookup and the
+    insert is skipped by the insert but still counted here.
+    """
+    faculties = list(faculties)
+    dates = sorted(set(dates))
+    if not faculties or not dates:
+        return 0, {}
+
+    # One query for every conflicting (faculty, date) pair in the range
+    existing = set(
+        Schedule.objects.filter(
+            faculty__in=faculties,
+            date__range=(dates[0], dates[-1]),
+        ).values_list('faculty_id', 'date')
+    )
+
+    new_schedules = []
+    skipped = {}
+    for faculty in faculties:
+        for date in dates:
+            if (faculty.id, date) in existing:
+                skipped.setdefault(faculty, []).append(date)
+                continue
+            new_schedules.append(Schedule(
+                faculty=faculty,
+                date=date,
+                subject=subject or faculty.subject,
+                topic=topic,
+                branch=faculty.branch,
+                year=faculty.year,
+            ))
+
+    # ignore_conflicts covers rows inserted concurrently after the lookup;
+    # the database does not report which rows it skipped
+    Schedule.objects.bulk_create(new_schedules, ignore_conflicts=True)
+
+    # bulk_create skips post_save, so refresh the search index in one pass
+    if new_schedules:
+        faculty_ids = [faculty.id for faculty in faculties]
+        placeholders = ', '.join(['%s'] * len(faculty_ids))
+        search.index_schedules(
+            f'sc.faculty_id IN ({placeholders}) AND sc.date BETWEEN %s AND %s',
+            [*faculty_ids, dates[0].isoformat(), dates[-1].isoformat()],
+        )
+    return len(new_schedules), skipped
+
+
+def format_skipped_dates(dates, limit=10):
+    """Summarise a list of skipped dates for a single flash message."""
+    shown = ', '.join(date.strftime('%d/%m/%Y') for date in dates[:limit])
+    if len(dates) > limit:
+        shown += f' and {len(dates) - limit} more'
+    return shown
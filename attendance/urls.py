@@ -21,11 +21,27 @@ urlpatterns = [
     # Student views
     path('student/dashboard/', views.student_dashboard, name='student_dashboard'),
     path('student/attendance/details/', views.student_attendance_details, name='student_attendance_details'),
+    path('student/attendance/calendar/', views.student_attendance_calendar, name='student_attendance_calendar'),
+    path('student/checkin/', views.student_checkin, name='student_checkin'),
     
     # Faculty views
     path('faculty/dashboard/', views.faculty_dashboard, name='faculty_dashboard'),
     path('faculty/schedule/create/', views.create_schedule, name='create_schedule'),
+    path('faculty/schedule/recurring/', views.create_recurring_schedule, name='create_recurring_schedule'),
     path('faculty/schedule/all/', views.view_all_schedules, name='view_all_schedules'),
+    path('faculty/attendance/import/', views.import_attendance, name='import_attendance'),
     path('faculty/attendance/mark/<int:schedule_id>/', views.mark_attendance, name='mark_attendance'),
+    path('faculty/attendance/mark/<int:schedule_id>/roster/', views.mark_attendance_roster, name='mark_attendance_roster'),
+    path('faculty/attendance/mark/<int:schedule_id>/students/<int:student_id>/', views.mark_student_attendance, name='mark_student_attendance'),
     path('faculty/students/', views.view_student_list, name='view_student_list'),
+    path('faculty/attendance/history/<int:schedule_id>/', views.schedule_attendance_history, name='schedule_attendance_history'),
+    path('faculty/students/<int:student_id>/history/', views.student_attendance_history, name='student_attendance_history'),
+    path('faculty/students/<int:student_id>/photo/', views.student_photo, name='student_photo'),
+    path('faculty/search/typeahead/', views.search_typeahead, name='search_typeahead'),
+    path('faculty/checkin/open/<int:schedule_id>/', views.open_checkin, name='open_checkin'),
+    path('faculty/checkin/<int:window_id>/', views.checkin_display, name='checkin_display'),
+    path('faculty/checkin/<int:window_id>/status/', views.checkin_status, name='checkin_status'),
+    path('faculty/checkin/<int:window_id>/close/', views.close_checkin, name='close_checkin'),
+    path('faculty/attendance/calendar/', views.faculty_attendance_calendar, name='faculty_attendance_calendar'),
+    path('faculty/attendance/trend/', views.attendance_trend, name='attendance_trend'),
 ]
@@ -0,0 +1,36 @@
+"""
+Version counters kept in the shared cache.
+
+A counter is bumped whenever the data it stands for changes. Anything
+derived from that data, such as a page ETag or a cached query result,
+records the counter values it was built from and is stale once they move.
+"""
+
+import time
+
+from django.core.cache import cache
+
+
+def _fresh_version():
+    # Start from the clock rather than 1, so a counter lost to eviction or a
+    # restart never repeats a value that derived data was built from
+    return time.time_ns() // 1000
+
+
+def get_versions(keys):
+    """Current values of version counters, creating missing ones."""
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _fresh_version(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_versions(keys):
+    """Mark the data behind some version counters as changed."""
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _fresh_version(), timeout=None)
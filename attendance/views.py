@@ -4,22 +4,57 @@ Handles authentication, dashboards, and attendance management for both students
 """
 
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import HttpResponse, JsonResponse
+from django.core.paginator import Paginator
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.http import require_http_methods, condition
+from django.views.decorators.cache import cache_control
+from django.db import transaction
 from django.db.models import Q, Count
 from django.utils import timezone
-from datetime import timedelta
+import csv
+from datetime import date, timedelta
 from functools import wraps
 
-from .models import Student, Faculty, Schedule, Attendance, BRANCH_CHOICES, YEAR_CHOICES
+from .models import (
+    Student, Faculty, Schedule, Attendance, AttendanceChange, AttendanceChangeSummary,
+    CheckInWindow, ATTENDANCE_STATUS_CHOICES, BRANCH_CHOICES, YEAR_CHOICES
+)
 from .forms import (
     StudentRegistrationForm, StudentLoginForm,
     FacultyRegistrationForm, FacultyLoginForm,
     UnifiedRegistrationForm, UnifiedLoginForm,
-    ScheduleForm, AttendanceForm
+    ScheduleForm, AttendanceForm, RecurringScheduleForm,
+    CheckInWindowForm, CheckInForm, StudentPhotoForm, AttendanceImportForm
 )
+from .timetable import generate_timetable, format_skipped_dates
+from .importer import SheetError, import_register
+from . import search
+from .routers import replica_reads
+from .http import student_page_etag
+from .cache import get_cohort_roster, get_student_summary, queue_summary_warming
+from .audit import get_change_log
+from .alerts import ATTENDANCE_THRESHOLD
+from . import rollups
+from . import checkin
+from . import photos
+from .tenancy import current_database
+
+
+# Number of schedules shown per page in view_all_schedules
+SCHEDULES_PER_PAGE = 20
+
+# Number of change log entries shown per page in the history views
+CHANGES_PER_PAGE = 50
+
+# Days covered by the attendance calendar heatmaps
+CALENDAR_DAYS = 182
+
+# Default and maximum date range of the attendance trend API
+TREND_DEFAULT_DAYS = 90
+TREND_MAX_DAYS = 400
 
 
 # ============================================================================
@@ -196,6 +231,9 @@ def user_logout(request):
 # ============================================================================
 
 @student_required
+@replica_reads
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=student_page_etag)
 def student_dashboard(request):
     """
     Student dashboard showing attendance overview (READ-ONLY).
@@ -216,10 +254,11 @@ def student_dashboard(request):
     # Get all attendance records for this student
     attendance_records = Attendance.objects.filter(student=student).select_related('schedule')
     
-    # Calculate statistics dynamically
-    total_classes = attendance_records.count()
-    attended_classes = attendance_records.filter(status='P').count()
-    absent_classes = attendance_records.filter(status='A').count()
+    # Calculate statistics dynamically (cached until the student's attendance changes)
+    summary = get_student_summary(student)
+    total_classes = summary['total_classes']
+    attended_classes = summary['attended_classes']
+    absent_classes = summary['absent_classes']
     
     # Calculate attendance percentage
     if total_classes > 0:
@@ -234,7 +273,7 @@ def student_dashboard(request):
         percentage_if_absent_one_more = 0
     
     # Check if attendance is below 75% (warning condition)
-    is_below_threshold = attendance_percentage < 75
+    is_below_threshold = attendance_percentage < ATTENDANCE_THRESHOLD
     
     # Get recent attendance records
     recent_attendances = attendance_records[:10]
@@ -248,12 +287,16 @@ def student_dashboard(request):
         'percentage_if_absent_one_more': percentage_if_absent_one_more,
         'is_below_threshold': is_below_threshold,
         'recent_attendances': recent_attendances,
+        'subject_breakdown': summary['subjects'],
     }
     
     return render(request, 'student_dashboard.html', context)
 
 
 @student_required
+@replica_reads
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=student_page_etag)
 def student_attendance_details(request):
     """
     View for detailed attendance records of a student (READ-ONLY).
@@ -290,57 +333,93 @@ def student_attendance_details(request):
     return render(request, 'student_attendance_details.html', context)
 
 
-# ============================================================================
-# FACULTY DASHBOARD AND ATTENDANCE MARKING
-# ============================================================================
-
-@faculty_required
-def faculty_dashboard(request):
+@student_required
+@replica_reads
+def student_attendance_calendar(request):
     """
-    Faculty dashboard showing schedules and attendance summary.
-    Displays recent schedules and attendance statistics.
+    Calendar heatmap of the student's own attendance per day
+    over the last CALENDAR_DAYS days.
     """
     
-    faculty = request.user.faculty_profile
+    student = request.user.student_profile
+    end = timezone.localdate()
+    start = end - timedelta(days=CALENDAR_DAYS - 1)
     
-    # Get recent schedules for this faculty
-    recent_schedules = Schedule.objects.filter(faculty=faculty).order_by('-date')[:5]
+    daily_counts = rollups.student_daily_counts(student, start, end)
     
-    # Get attendance summary for students in the same branch and year
-    students_in_batch = Student.objects.filter(
-        branch=faculty.branch,
-        year=faculty.year
-    )
+    context = {
+        'student': student,
+        'heading': f'{student.hall_ticket_id} - {student.name}',
+        'calendar_rows': rollups.build_calendar(daily_counts, start, end),
+        'start': start,
+        'end': end,
+        'back_url': 'student_dashboard',
+    }
     
-    # Calculate attendance summary for each student
-    student_summaries = []
-    for student in students_in_batch:
-        attendance_records = Attendance.objects.filter(
-            student=student,
-            schedule__faculty=faculty
-        )
-        total = attendance_records.count()
-        attended = attendance_records.filter(status='P').count()
-        absent = total - attended
+    return render(request, 'attendance_calendar.html', context)
+
+
+# ============================================================================
+# FACULTY DASHBOARD AND ATTENDANCE MARKING
+# ============================================================================
+
+def _faculty_attendance_rows(faculty, students):
+    """
+    Attendance totals of each student in the faculty's classes, counted
+    with one grouped query on the (faculty, student, status) index.
+    """
+    counts = {
+        row['student']: (row['total'], row['attended'])
+        for row in Attendance.objects.filter(faculty=faculty)
+        .values('student')
+        .annotate(total=Count('id'), attended=Count('id', filter=Q(status='P')))
+        .order_by()
+    }
+    rows = []
+    for student in students:
+        total, attended = counts.get(student.id, (0, 0))
         
         if total > 0:
             percentage = round((attended / total) * 100, 2)
         else:
             percentage = 0
         
-        student_summaries.append({
+        rows.append({
             'student': student,
             'total_classes': total,
             'attended_classes': attended,
-            'absent_classes': absent,
+            'absent_classes': total - attended,
             'percentage': percentage,
         })
+    return rows
+
+
+@faculty_required
+@replica_reads
+def faculty_dashboard(request):
+    """
+    Faculty dashboard showing schedules and attendance summary.
+    Displays recent schedules and attendance statistics.
+    """
+    
+    faculty = request.user.faculty_profile
+    
+    # Get recent schedules for this faculty with marking completeness
+    recent_schedules = Schedule.objects.cached().filter(
+        faculty=faculty
+    ).with_marking_counts().order_by('-date')[:5]
+    
+    # Get attendance summary for students in the same branch and year
+    students_in_batch = get_cohort_roster(faculty.branch, faculty.year)
+    
+    # Calculate attendance summary for each student
+    student_summaries = _faculty_attendance_rows(faculty, students_in_batch)
     
     context = {
         'faculty': faculty,
         'recent_schedules': recent_schedules,
         'student_summaries': student_summaries,
-        'total_students_in_batch': students_in_batch.count(),
+        'total_students_in_batch': len(students_in_batch),
     }
     
     return render(request, 'faculty_dashboard.html', context)
@@ -369,11 +448,151 @@ def create_schedule(request):
     return render(request, 'create_schedule.html', {'form': form, 'faculty': faculty})
 
 
+@faculty_required
+def create_recurring_schedule(request):
+    """
+    View for faculty to generate a whole timetable at once.
+    Creates one schedule per selected weekday in the date range and
+    reports dates that were already scheduled in a single message.
+    """
+    
+    faculty = request.user.faculty_profile
+    
+    if request.method == 'POST':
+        form = RecurringScheduleForm(request.POST)
+        if form.is_valid():
+            dates = form.get_dates()
+            created, skipped = generate_timetable(
+                [faculty],
+                dates,
+                topic=form.cleaned_data['topic'],
+                subject=form.cleaned_data['subject'],
+            )
+            
+            if created:
+                messages.success(request, f'Timetable created with {created} classes.')
+            elif not dates:
+                messages.warning(request, 'No class dates fall within the selected range.')
+            
+            skipped_dates = skipped.get(faculty, [])
+            if skipped_dates:
+                messages.warning(
+                    request,
+                    f'Skipped {len(skipped_dates)} dates that already have a class: '
+                    f'{format_skipped_dates(skipped_dates)}.'
+                )
+            return redirect('view_all_schedules')
+    else:
+        form = RecurringScheduleForm(initial={'subject': faculty.subject})
+    
+    return render(request, 'create_recurring_schedule.html', {'form': form, 'faculty': faculty})
+
+
+# Unmarked classes whose dates head the blank register download
+REGISTER_TEMPLATE_DATES = 31
+
+
+def _register_template(faculty):
+    """Blank register CSV for the faculty's cohort and their unmarked classes."""
+    dates = sorted(
+        Schedule.objects.filter(faculty=faculty, date__lte=timezone.localdate())
+        .incomplete().order_by('-date').values_list('date', flat=True)[:REGISTER_TEMPLATE_DATES]
+    ) or [timezone.localdate()]
+    response = HttpResponse(content_type='text/csv')
+    response['Content-Disposition'] = (
+        f'attachment; filename="register-{faculty.branch}-{faculty.year}.csv"'
+    )
+    writer = csv.writer(response)
+    writer.writerow(['Hall Ticket ID', 'Name'] + [day.isoformat() for day in dates])
+    for student in get_cohort_roster(faculty.branch, faculty.year):
+        writer.writerow([student.hall_ticket_id, student.name] + [''] * len(dates))
+    return response
+
+
+@faculty_required
+def import_attendance(request):
+    """
+    View for faculty to import paper attendance registers covering many dates.
+    Creates the missing classes, saves every readable mark and shows a
+    report of the rows and cells that could not be imported.
+    Only faculty can import attendance.
+    """
+    
+    faculty = request.user.faculty_profile
+    
+    if request.GET.get('template') == '1':
+        return _register_template(faculty)
+    
+    report = None
+    if request.method == 'POST':
+        form = AttendanceImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            sheet = form.cleaned_data['sheet']
+            try:
+                report = import_register(
+                    sheet,
+                    sheet.name,
+                    faculty,
+                    actor=request.user,
+                    topic=form.cleaned_data['topic'],
+                    overwrite=form.cleaned_data['overwrite'],
+                )
+            except SheetError as error:
+                form.add_error('sheet', str(error))
+            else:
+                if report.saved:
+                    messages.success(request, f'Imported {report.saved} attendance marks.')
+                else:
+                    messages.warning(request, 'No new attendance marks were found in the register.')
+    else:
+        form = AttendanceImportForm()
+    
+    context = {
+        'form': form,
+        'faculty': faculty,
+        'report': report,
+    }
+    
+    return render(request, 'import_attendance.html', context)
+
+def _record_statuses(request, schedule, statuses):
+    """
+    Save {student_id: status} for a class, writing only the students whose
+    status changed, with their change log entries. Returns the changed ids.
+    """
+    change_log = get_change_log(request)
+    changed = []
+    with transaction.atomic(using=current_database()):
+        previous = dict(
+            Attendance.objects.filter(
+                schedule=schedule, student_id__in=list(statuses)
+            ).values_list('student_id', 'status')
+        )
+        for student_id, status in statuses.items():
+            if previous.get(student_id) == status:
+                continue
+            # Create or update attendance record
+            Attendance.objects.update_or_create(
+                student_id=student_id,
+                schedule=schedule,
+                defaults={'status': status}
+            )
+            change_log.record(student_id, schedule.id, previous.get(student_id), status)
+            changed.append(student_id)
+        if changed:
+            # The post_save handlers refresh the class's rollup on commit.
+            # The students are notified now and open their dashboards at once
+            queue_summary_warming(changed)
+    return changed
+
+
 @faculty_required
 def mark_attendance(request, schedule_id):
     """
     View for faculty to mark attendance for a specific class.
-    Displays all students in the same branch and year.
+    The roll-call grid is rendered client-side from mark_attendance_roster
+    and autosaves each toggle through mark_student_attendance; posting the
+    form saves every student at once.
     Only faculty can mark attendance.
     """
     
@@ -381,51 +600,118 @@ def mark_attendance(request, schedule_id):
     schedule = get_object_or_404(Schedule, id=schedule_id, faculty=faculty)
     
     # Get all students in the same branch and year
-    students = Student.objects.filter(
-        branch=faculty.branch,
-        year=faculty.year
-    ).order_by('hall_ticket_id')
+    students = get_cohort_roster(faculty.branch, faculty.year)
     
     if request.method == 'POST':
         form = AttendanceForm(students, request.POST)
         if form.is_valid():
-            # Save attendance for each student
-            for student in students:
-                status = form.cleaned_data.get(f'student_{student.id}')
-                # Create or update attendance record
-                Attendance.objects.update_or_create(
-                    student=student,
-                    schedule=schedule,
-                    defaults={'status': status}
-                )
+            _record_statuses(request, schedule, {
+                student.id: form.cleaned_data[f'student_{student.id}'] for student in students
+            })
             
             messages.success(request, f'Attendance marked for {schedule.date}.')
             return redirect('faculty_dashboard')
     else:
         form = AttendanceForm(students)
     
+    open_window = CheckInWindow.objects.filter(
+        schedule=schedule, closed_at__isnull=True, expires_at__gt=timezone.now()
+    ).first()
+    
+    # One sprite sheet image holds the whole cohort's photos
+    photo_sheet = photos.get_cohort_sheet(faculty.branch, faculty.year, students)
+    
     context = {
         'form': form,
         'schedule': schedule,
         'faculty': faculty,
         'students': students,
+        'open_window': open_window,
+        'checkin_form': CheckInWindowForm(),
+        'photo_sheet_css': photos.sheet_stylesheet_url(photo_sheet) if photo_sheet else None,
     }
     
     return render(request, 'mark_attendance.html', context)
 
 
 @faculty_required
+def mark_attendance_roster(request, schedule_id):
+    """
+    JSON roster of a class with each student's current status, rendered
+    into the roll-call grid by mark_attendance.
+    """
+    
+    faculty = request.user.faculty_profile
+    schedule = get_object_or_404(Schedule, id=schedule_id, faculty=faculty)
+    students = get_cohort_roster(faculty.branch, faculty.year)
+    
+    # Show self check-ins buffered so far as already marked present
+    checkin.flush_open_windows(schedule)
+    statuses = dict(
+        Attendance.objects.filter(schedule=schedule).values_list('student_id', 'status')
+    )
+    
+    return JsonResponse({
+        'students': [
+            {
+                'id': student.id,
+                'hall_ticket_id': student.hall_ticket_id,
+                'name': student.name,
+                'status': statuses.get(student.id),
+            }
+            for student in students
+        ],
+    })
+
+
+@faculty_required
+@require_http_methods(['POST'])
+def mark_student_attendance(request, schedule_id, student_id):
+    """
+    JSON upsert of one student's status for a class, sent by the
+    roll-call grid each time a toggle settles.
+    """
+    
+    faculty = request.user.faculty_profile
+    schedule = get_object_or_404(Schedule, id=schedule_id, faculty=faculty)
+    status = request.POST.get('status')
+    
+    if status not in dict(ATTENDANCE_STATUS_CHOICES):
+        return JsonResponse({'error': 'Status must be P or A.'}, status=400)
+    roster = get_cohort_roster(faculty.branch, faculty.year)
+    if not any(student.id == student_id for student in roster):
+        return JsonResponse({'error': 'This student is not on the class roster.'}, status=404)
+    
+    changed = _record_statuses(request, schedule, {student_id: status})
+    
+    return JsonResponse({'student': student_id, 'status': status, 'changed': bool(changed)})
+
+
+@faculty_required
+@replica_reads
 def view_all_schedules(request):
     """
     View for faculty to see all schedules and manage attendance.
+    Shows a page of schedules with present/absent/unmarked counts, and
+    can be limited to classes that still have unmarked students.
     Only faculty can view and manage schedules.
     """
     
     faculty = request.user.faculty_profile
-    schedules = Schedule.objects.filter(faculty=faculty).order_by('-date')
+    unmarked_only = request.GET.get('unmarked') == '1'
+    
+    schedules = Schedule.objects.cached().filter(faculty=faculty)
+    if unmarked_only:
+        schedules = schedules.incomplete()
+    schedules = schedules.with_marking_counts()
+    
+    paginator = Paginator(schedules.order_by('-date'), SCHEDULES_PER_PAGE)
+    page_obj = paginator.get_page(request.GET.get('page'))
     
     context = {
-        'schedules': schedules,
+        'schedules': page_obj,
+        'page_obj': page_obj,
+        'unmarked_only': unmarked_only,
         'faculty': faculty,
     }
     
@@ -433,6 +719,7 @@ def view_all_schedules(request):
 
 
 @faculty_required
+@replica_reads
 def view_student_list(request):
     """
     View for faculty to see all students in their batch.
@@ -445,41 +732,362 @@ def view_student_list(request):
     # Start with students in the same branch and year
     students = Student.objects.filter(
         branch=faculty.branch,
-        year=faculty.year
+        year=faculty.year,
+        is_active=True
     ).order_by('hall_ticket_id')
     
+    # Optional search by hall ticket ID, name or username
+    query = request.GET.get('q', '').strip()
+    if query:
+        students = search.search_students(students, query)
+    
     # Calculate attendance for each student
-    student_data = []
-    for student in students:
-        attendance_records = Attendance.objects.filter(
-            student=student,
-            schedule__faculty=faculty
-        )
-        total = attendance_records.count()
-        attended = attendance_records.filter(status='P').count()
-        absent = total - attended
-        
-        if total > 0:
-            percentage = round((attended / total) * 100, 2)
-        else:
-            percentage = 0
-        
-        student_data.append({
-            'student': student,
-            'total_classes': total,
-            'attended_classes': attended,
-            'absent_classes': absent,
-            'percentage': percentage,
-        })
+    student_data = _faculty_attendance_rows(faculty, students)
     
     context = {
         'faculty': faculty,
         'student_data': student_data,
+        'query': query,
     }
     
     return render(request, 'view_student_list.html', context)
 
 
+@faculty_required
+def student_photo(request, student_id):
+    """
+    View for faculty to upload the photo of a student in their batch,
+    shown on the roll-call page. Thumbnails are generated in the background.
+    """
+    
+    faculty = request.user.faculty_profile
+    student = get_object_or_404(
+        Student, id=student_id, branch=faculty.branch, year=faculty.year, is_active=True
+    )
+    
+    if request.method == 'POST':
+        form = StudentPhotoForm(request.POST, request.FILES, instance=student)
+        if form.is_valid():
+            form.save()
+            messages.success(request, f'Photo of {student.name} uploaded.')
+            return redirect('student_photo', student_id=student.id)
+    else:
+        form = StudentPhotoForm(instance=student)
+    
+    context = {
+        'faculty': faculty,
+        'student': student,
+        'form': form,
+        'thumbnail': photos.thumbnail_urls(student),
+    }
+    
+    return render(request, 'student_photo.html', context)
+
+
+@faculty_required
+@replica_reads
+def schedule_attendance_history(request, schedule_id):
+    """
+    View for faculty to see every attendance change made for one class,
+    plus the daily summaries of compacted older changes.
+    """
+    
+    faculty = request.user.faculty_profile
+    schedule = get_object_or_404(Schedule, id=schedule_id, faculty=faculty)
+    
+    changes = AttendanceChange.objects.filter(
+        schedule=schedule
+    ).select_related('student', 'actor').order_by('-changed_at')
+    summaries = AttendanceChangeSummary.objects.filter(
+        schedule=schedule
+    ).select_related('student').order_by('-date', 'student__hall_ticket_id')
+    
+    context = {
+        'faculty': faculty,
+        'heading': f'{schedule.subject} on {schedule.date:%d/%m/%Y}',
+        'changes': Paginator(changes, CHANGES_PER_PAGE).get_page(request.GET.get('page')),
+        'summaries': summaries,
+        'show_student': True,
+    }
+    
+    return render(request, 'attendance_history.html', context)
+
+
+@faculty_required
+@replica_reads
+def student_attendance_history(request, student_id):
+    """
+    View for faculty to see every attendance change for one student
+    in their own classes, e.g. to settle a disputed absence.
+    """
+    
+    faculty = request.user.faculty_profile
+    student = get_object_or_404(Student, id=student_id)
+    
+    changes = AttendanceChange.objects.filter(
+        student=student, schedule__faculty=faculty
+    ).select_related('schedule', 'actor').order_by('-changed_at')
+    summaries = AttendanceChangeSummary.objects.filter(
+        student=student, schedule__faculty=faculty
+    ).select_related('schedule').order_by('-date')
+    
+    context = {
+        'faculty': faculty,
+        'heading': f'{student.hall_ticket_id} - {student.name}',
+        'changes': Paginator(changes, CHANGES_PER_PAGE).get_page(request.GET.get('page')),
+        'summaries': summaries,
+        'show_schedule': True,
+    }
+    
+    return render(request, 'attendance_history.html', context)
+
+
+@faculty_required
+@replica_reads
+def search_typeahead(request):
+    """
+    JSON prefix-match typeahead for faculty.
+    `type=students` searches the faculty's batch, `type=topics` searches
+    the topics of the faculty's own schedules.
+    """
+    
+    faculty = request.user.faculty_profile
+    query = request.GET.get('q', '').strip()
+    kind = request.GET.get('type', 'students')
+    
+    if not query:
+        return JsonResponse({'results': []})
+    
+    if kind == 'topics':
+        schedules = search.search_schedules(
+            Schedule.objects.filter(faculty=faculty), query, prefix=True
+        )
+        topics = (
+            schedules.order_by('topic')
+            .values_list('topic', flat=True)
+            .distinct()[:search.TYPEAHEAD_LIMIT]
+        )
+        results = [{'topic': topic} for topic in topics]
+    else:
+        students = search.search_students(
+            Student.objects.filter(branch=faculty.branch, year=faculty.year, is_active=True),
+            query,
+            prefix=True,
+        )
+        results = [
+            {'id': student_id, 'hall_ticket_id': hall_ticket_id, 'name': name}
+            for student_id, hall_ticket_id, name in students.values_list(
+                'id', 'hall_ticket_id', 'name'
+            )[:search.TYPEAHEAD_LIMIT]
+        ]
+    
+    return JsonResponse({'results': results})
+
+
+# ============================================================================
+# CLASSROOM CHECK-IN
+# ============================================================================
+
+@faculty_required
+@require_http_methods(['POST'])
+def open_checkin(request, schedule_id):
+    """
+    Open a check-in window on a class; students then check themselves
+    in with the rotating code shown by checkin_display.
+    """
+    
+    faculty = request.user.faculty_profile
+    schedule = get_object_or_404(Schedule, id=schedule_id, faculty=faculty)
+    form = CheckInWindowForm(request.POST)
+    if not form.is_valid():
+        messages.error(request, 'Please choose a window length between 1 and '
+                                f'{checkin.MAX_WINDOW_MINUTES} minutes.')
+        return redirect('mark_attendance', schedule_id=schedule.id)
+    
+    window = checkin.open_window(schedule, request.user, form.cleaned_data['minutes'])
+    return redirect('checkin_display', window_id=window.id)
+
+
+@faculty_required
+def checkin_display(request, window_id):
+    """
+    Full-screen rotating code for the projector, refreshed by checkin_status.
+    """
+    
+    faculty = request.user.faculty_profile
+    window = get_object_or_404(
+        CheckInWindow.objects.select_related('schedule'), id=window_id, schedule__faculty=faculty
+    )
+    code, rotates_in = checkin.current_code(window.secret)
+    
+    context = {
+        'faculty': faculty,
+        'window': window,
+        'schedule': window.schedule,
+        'code': code,
+        'rotates_in': rotates_in,
+        'checked_in': checkin.checked_in_count(window.id),
+        'roster_size': len(get_cohort_roster(faculty.branch, faculty.year)),
+    }
+    
+    return render(request, 'checkin_display.html', context)
+
+
+@faculty_required
+def checkin_status(request, window_id):
+    """
+    JSON current code and check-in count of a window, polled by checkin_display.
+    """
+    
+    faculty = request.user.faculty_profile
+    window = get_object_or_404(CheckInWindow, id=window_id, schedule__faculty=faculty)
+    code, rotates_in = checkin.current_code(window.secret)
+    
+    return JsonResponse({
+        'code': code if window.is_open else None,
+        'rotates_in': rotates_in,
+        'expires_in': max(int((window.expires_at - timezone.now()).total_seconds()), 0),
+        'is_open': window.is_open,
+        'checked_in': checkin.checked_in_count(window.id),
+    })
+
+
+@faculty_required
+@require_http_methods(['POST'])
+def close_checkin(request, window_id):
+    """
+    Close a check-in window, write its check-ins and go on to mark the rest.
+    """
+    
+    faculty = request.user.faculty_profile
+    window = get_object_or_404(
+        CheckInWindow.objects.select_related('schedule__faculty'),
+        id=window_id, schedule__faculty=faculty
+    )
+    if window.closed_at is None:
+        checkin.close_window(window)
+    messages.success(
+        request,
+        f'Check-in closed with {checkin.checked_in_count(window.id)} students. '
+        'Mark the remaining students below.'
+    )
+    return redirect('mark_attendance', schedule_id=window.schedule_id)
+
+
+@student_required
+def student_checkin(request):
+    """
+    View for students to check in to the current class with its code.
+    Only a cache write happens here; check-ins reach the database in batches.
+    """
+    
+    student = request.user.student_profile
+    
+    if request.method == 'POST':
+        form = CheckInForm(request.POST)
+        if form.is_valid():
+            if checkin.too_many_attempts(student):
+                messages.error(request, 'Too many wrong codes. Please wait for the next code.')
+                return redirect('student_checkin')
+            result, window_id, flush_due = checkin.check_in(student, form.cleaned_data['code'])
+            if flush_due:
+                checkin.queue_flush(window_id)
+            
+            if result == checkin.CHECKED_IN:
+                messages.success(request, 'You are checked in. Enjoy the class!')
+                return redirect('student_dashboard')
+            elif result == checkin.ALREADY_CHECKED_IN:
+                messages.info(request, 'You are already checked in to this class.')
+                return redirect('student_dashboard')
+            elif result == checkin.NO_OPEN_WINDOW:
+                messages.error(request, 'There is no open check-in for your class right now.')
+            elif result == checkin.NOT_ON_ROSTER:
+                messages.error(request, 'You are not on the roster of this class.')
+            else:
+                checkin.record_failed_attempt(student)
+                messages.error(request, 'That code is not valid. Check the screen and try again.')
+    else:
+        form = CheckInForm()
+    
+    return render(request, 'student_checkin.html', {'form': form, 'student': student})
+
+
+# ============================================================================
+# ATTENDANCE CALENDAR AND TRENDS (read from DailyCohortRollup only)
+# ============================================================================
+
+@faculty_required
+@replica_reads
+def faculty_attendance_calendar(request):
+    """
+    Calendar heatmap of the faculty's cohort attendance per day,
+    across all faculty teaching the cohort or, with ?mine=1, only their own classes.
+    """
+    
+    faculty = request.user.faculty_profile
+    mine = request.GET.get('mine') == '1'
+    end = timezone.localdate()
+    start = end - timedelta(days=CALENDAR_DAYS - 1)
+    
+    points = rollups.trend(rollups.cohort_rollups(
+        faculty.branch, faculty.year, start, end, faculty=faculty if mine else None
+    ))
+    daily_counts = {point['date']: (point['present'], point['total']) for point in points}
+    
+    context = {
+        'faculty': faculty,
+        'heading': f'{faculty.get_branch_display()} - Year {faculty.year}',
+        'calendar_rows': rollups.build_calendar(daily_counts, start, end),
+        'start': start,
+        'end': end,
+        'mine': mine,
+        'back_url': 'faculty_dashboard',
+    }
+    
+    return render(request, 'attendance_calendar.html', context)
+
+
+@faculty_required
+@replica_reads
+def attendance_trend(request):
+    """
+    JSON attendance trend of the faculty's cohort.
+    Accepts `start`/`end` (YYYY-MM-DD), `granularity=day|week` and `mine=1`.
+    """
+    
+    faculty = request.user.faculty_profile
+    try:
+        end = date.fromisoformat(request.GET['end']) if request.GET.get('end') else timezone.localdate()
+        start = (
+            date.fromisoformat(request.GET['start']) if request.GET.get('start')
+            else end - timedelta(days=TREND_DEFAULT_DAYS - 1)
+        )
+    except ValueError:
+        return JsonResponse({'error': 'Dates must be in YYYY-MM-DD format.'}, status=400)
+    if start > end or (end - start).days >= TREND_MAX_DAYS:
+        return JsonResponse(
+            {'error': f'The date range must be between 1 and {TREND_MAX_DAYS} days.'}, status=400
+        )
+    granularity = 'week' if request.GET.get('granularity') == 'week' else 'day'
+    mine = request.GET.get('mine') == '1'
+    
+    points = rollups.trend(
+        rollups.cohort_rollups(
+            faculty.branch, faculty.year, start, end, faculty=faculty if mine else None
+        ),
+        granularity,
+    )
+    
+    return JsonResponse({
+        'branch': faculty.branch,
+        'year': faculty.year,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'granularity': granularity,
+        'points': [{**point, 'date': point['date'].isoformat()} for point in points],
+    })
+
+
 # ============================================================================
 # ERROR VIEWS
 # ============================================================================
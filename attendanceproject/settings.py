@@ -29,10 +29,16 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Compresses what every later middleware has produced
+    'attendance.http.CompressionMiddleware',
+    # Picks the college's database before sessions are read from it
+    'attendance.tenancy.TenantMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'attendance.routers.ReplicaStickinessMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'attendance.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -57,13 +63,106 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'attendanceproject.wsgi.application'
 
-# Database
+# Database: SQLite unless DATABASE_ENGINE=postgresql
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('DATABASE_NAME', BASE_DIR / 'db.sqlite3'),
     }
 }
+if os.environ.get('DATABASE_ENGINE') == 'postgresql':
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('DATABASE_NAME', 'attendance'),
+        'USER': os.environ.get('DATABASE_USER', ''),
+        'PASSWORD': os.environ.get('DATABASE_PASSWORD', ''),
+        'HOST': os.environ.get('DATABASE_HOST', ''),
+        'PORT': os.environ.get('DATABASE_PORT', ''),
+    }
+
+# PRAGMAs run on every new SQLite connection (attendance/checks.py), e.g.
+# {'journal_mode': 'WAL', 'synchronous': 'NORMAL'} in production
+SQLITE_PRAGMAS = {}
+
+# Worker processes serving requests (gunicorn reads the same variable);
+# with more than one, the cache must be shared between them
+WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', 1))
+
+# Read replicas for dashboard reads (see attendance/routers.py).
+# Set USE_SQLITE_REPLICA=1 to try it locally with a second SQLite file
+# refreshed by `python manage.py sync_replicas`.
+if os.environ.get('USE_SQLITE_REPLICA') == '1':
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db_replica.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
+# Colleges served by this deployment (see attendance/tenancy.py), each with
+# its own SQLite file, or its own schema when the default database is
+# PostgreSQL. Slugs are lowercase identifiers, e.g.
+#   ATTENDANCE_TENANTS="north=north.example.edu,south=south.example.edu|www.south.example.edu"
+# With TENANT_RESOLUTION=path the college comes from the URL (/north/...)
+# instead of the host. Without tenants the app serves the default database.
+TENANTS = {}
+TENANT_RESOLUTION = os.environ.get('TENANT_RESOLUTION', 'host')
+for entry in filter(None, os.environ.get('ATTENDANCE_TENANTS', '').split(',')):
+    slug, _, hosts = entry.strip().partition('=')
+    alias = f'tenant_{slug}'
+    if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+        options = DATABASES['default'].get('OPTIONS', {})
+        DATABASES[alias] = {
+            **DATABASES['default'],
+            'OPTIONS': {**options, 'options': f'-c search_path={slug}'},
+        }
+        TENANTS[slug] = {'DATABASE': alias, 'SCHEMA': slug}
+    else:
+        DATABASES[alias] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': BASE_DIR / f'db_{slug}.sqlite3'}
+        TENANTS[slug] = {'DATABASE': alias}
+    TENANTS[slug]['HOSTS'] = [host for host in hosts.split('|') if host]
+
+# Tenant routing comes first: a college's reads never go to the replicas
+DATABASE_ROUTERS = ['attendance.tenancy.TenantRouter', 'attendance.routers.ReplicaRouter']
+
+# Seconds a session keeps reading from the primary after it writes
+REPLICA_STICKY_SECONDS = 10
+
+# Cache (cohort rosters and dashboard data, see attendance/cache.py)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'attendance',
+        # Self check-ins are buffered here until flushed (attendance.checkin),
+        # so the cache must not cull them: a full classroom is ~200 keys
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+        },
+    }
+}
+
+# With several worker processes, point SHARED_CACHE_PATH at a local file so
+# they share one cache (attendance/sharedcache.py): rosters are warmed once
+# and invalidations and version bumps reach every worker.
+if os.environ.get('SHARED_CACHE_PATH'):
+    CACHES['default'] = {
+        'BACKEND': 'attendance.sharedcache.SharedSQLiteCache',
+        'LOCATION': os.environ['SHARED_CACHE_PATH'],
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+            'MAX_BYTES': int(os.environ.get('SHARED_CACHE_MAX_BYTES', 256 * 1024 * 1024)),
+        },
+    }
+
+# Every cache key carries the tenant, so colleges never share cached data
+if TENANTS:
+    for cache_settings in CACHES.values():
+        cache_settings['KEY_FUNCTION'] = 'attendance.tenancy.make_cache_key'
+
+# Per-process store of .cached() query results (attendance/querycache.py)
+QUERY_CACHE_MAX_ENTRIES = int(os.environ.get('QUERY_CACHE_MAX_ENTRIES', 2000))
+QUERY_CACHE_MAX_BYTES = int(os.environ.get('QUERY_CACHE_MAX_BYTES', 32 * 1024 * 1024))
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -99,6 +198,22 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Processes generating student photo thumbnails in the background
+# (attendance/photos.py); 0 generates them during the upload request.
+PHOTO_WORKERS = int(os.environ.get('PHOTO_WORKERS', 2))
+
+# Threads recomputing student dashboard summaries after attendance is marked
+# (attendance/cache.py); 0 recomputes them at the end of the marking request.
+SUMMARY_WARM_WORKERS = int(os.environ.get('SUMMARY_WARM_WORKERS', 2))
+
+# Threads flushing buffered check-ins to the database (attendance/checkin.py);
+# 0 leaves them to the marking page and the flush_checkins command.
+CHECKIN_FLUSH_WORKERS = int(os.environ.get('CHECKIN_FLUSH_WORKERS', 1))
+
+# Request profiles taken by attendance.profiling.ProfilingMiddleware; never
+# under MEDIA_ROOT or STATIC_ROOT, which are served publicly
+PROFILE_ROOT = BASE_DIR / 'profiles'
+
 # Default primary auto field
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -106,3 +221,28 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGIN_URL = 'home'
 LOGIN_REDIRECT_URL = 'home'
 LOGOUT_REDIRECT_URL = 'home'
+
+# Email: low-attendance alert digests. The console backend prints them;
+# set EMAIL_BACKEND / EMAIL_HOST to deliver real mail.
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 25))
+EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'attendance@localhost')
+
+# Logging: routing decisions are logged by 'attendance.routing'
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'attendance.routing': {
+            'handlers': ['console'],
+            'level': os.environ.get('DB_ROUTING_LOG_LEVEL', 'WARNING'),
+        },
+    },
+}
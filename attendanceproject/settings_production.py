@@ -0,0 +1,62 @@
+"""
+Production settings for attendanceproject, configured from the environment.
+
+    DJANGO_SETTINGS_MODULE=attendanceproject.settings_production
+    DJANGO_SECRET_KEY        required
+    DJANGO_ALLOWED_HOSTS     comma-separated host names
+    DATABASE_ENGINE, ...     see settings.py; SQLite runs in WAL mode
+    CONN_MAX_AGE             seconds a worker keeps its connections (600)
+    SHARED_CACHE_PATH        cache file shared by the workers
+                             (default /var/tmp/attendance-cache.sqlite3)
+    WEB_CONCURRENCY          worker processes
+
+Passes `python manage.py check --deploy --tag performance --database default`.
+"""
+
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .settings import *  # noqa: F401,F403
+from .settings import CACHES, DATABASES, TEMPLATES, TENANTS
+
+DEBUG = False
+
+try:
+    SECRET_KEY = os.environ['DJANGO_SECRET_KEY']
+except KeyError:
+    raise ImproperlyConfigured('Set DJANGO_SECRET_KEY for production.') from None
+
+ALLOWED_HOSTS = [host for host in os.environ.get('DJANGO_ALLOWED_HOSTS', '').split(',') if host]
+# Every college's hosts are served as well
+ALLOWED_HOSTS += [host for tenant in TENANTS.values() for host in tenant['HOSTS']]
+
+# Workers keep their connections between requests, checked before reuse
+for database in DATABASES.values():
+    database['CONN_MAX_AGE'] = int(os.environ.get('CONN_MAX_AGE', 600))
+    database['CONN_HEALTH_CHECKS'] = True
+
+# Readers never wait for a writer; commits sync the WAL at checkpoints only
+SQLITE_PRAGMAS = {'journal_mode': 'WAL', 'synchronous': 'NORMAL'}
+
+# Templates are compiled once per worker
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+
+# One cache shared by every worker on the host (attendance/sharedcache.py)
+if CACHES['default']['BACKEND'] != 'attendance.sharedcache.SharedSQLiteCache':
+    CACHES['default'] = {
+        'BACKEND': 'attendance.sharedcache.SharedSQLiteCache',
+        'LOCATION': '/var/tmp/attendance-cache.sqlite3',
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+            'MAX_BYTES': int(os.environ.get('SHARED_CACHE_MAX_BYTES', 256 * 1024 * 1024)),
+        },
+    }
+    if TENANTS:
+        CACHES['default']['KEY_FUNCTION'] = 'attendance.tenancy.make_cache_key'
@@ -6,7 +6,16 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from attendance.admin import profile_list_view, profile_detail_view, profile_delete_view, query_cache_view
+
 urlpatterns = [
+    # Stored request profiles, listed inside the admin site
+    path('admin/profiles/', admin.site.admin_view(profile_list_view), name='admin_profiles'),
+    path('admin/profiles/<str:name>/', admin.site.admin_view(profile_detail_view),
+         name='admin_profile_detail'),
+    path('admin/profiles/<str:name>/delete/', admin.site.admin_view(profile_delete_view),
+         name='admin_profile_delete'),
+    path('admin/query-cache/', admin.site.admin_view(query_cache_view), name='admin_query_cache'),
     path('admin/', admin.site.urls),
     path('', include('attendance.urls')),
 ]